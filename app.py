@@ -11,7 +11,7 @@ from openai import OpenAI
 import concurrent.futures
 from datetime import datetime
 from dotenv import load_dotenv
-from src.graph.builder import GraphBuilder
+from src.graph.runtime import GraphRuntime, warm_up_graph_runtime
 from src.core.vector_db.vdb_update import UpdateVectorDB
 from src.core.database.google_sheets_auth import GoogleSheetsAuth
 
@@ -28,6 +28,7 @@ IMG_LOGO = "src/visualizations/Alexandr.ia_1.png"
 IMG_BOT = "src/visualizations/chatbot.png"
 IMG_USER = "src/visualizations/usuario.png"
 URL_AZURE_STORAGE = "https://sachatbotdeveusa.blob.core.windows.net/rag/alexandria/visualizations/"
+STREAM_ANSWER = os.getenv("CHAT_STREAM_ANSWER", "true").lower() == "true"
 
 def type_learning_to_int(type_learning: str) -> int:
     mapping = {
@@ -39,14 +40,11 @@ def type_learning_to_int(type_learning: str) -> int:
 
 async def chat(user_question: str, user_id: str, alexandria_type_learning: int):
     try:
-        graph_builder = GraphBuilder()
-        graph = graph_builder.build()
+        runtime = GraphRuntime._get_instance()
 
-        response = await graph.ainvoke({
-            "user_id": user_id,
-            "user_question": user_question,
-            "alexandria_type_learning": alexandria_type_learning
-        })
+        response = await runtime.run(user_question=user_question,
+                                     user_id=user_id,
+                                     alexandria_type_learning=alexandria_type_learning)
 
     except Exception as e:
         print(f"Error graph: {e}")
@@ -55,8 +53,24 @@ async def chat(user_question: str, user_id: str, alexandria_type_learning: int):
     return response.get('node_retrieve_docs', []), response.get('chatbot_answer', ".|."), response.get('chatbot_answer_visualization', ".|.")
 
 
+def chat_stream(user_question: str, user_id: str, alexandria_type_learning: int):
+    # Tokens for st.write_stream, final state available once the stream is consumed
+    runtime = GraphRuntime._get_instance()
+
+    return runtime._stream(user_question=user_question,
+                           user_id=user_id,
+                           alexandria_type_learning=alexandria_type_learning)
+
+
+@st.cache_resource(show_spinner="Preparando Alexandr.ia...")
+def init_graph_runtime():
+    # Built once per process and shared by every session
+    return warm_up_graph_runtime()
+
+
 def run_async(func, *args, **kwargs):
-    return asyncio.run(func(*args, **kwargs))
+    # All graph executions share the runtime event loop (and its async clients)
+    return GraphRuntime._get_instance()._run_coroutine(func(*args, **kwargs))
 
 
 def run_clean_chat_history():
@@ -109,7 +123,7 @@ def init_page():
         st.session_state.messages = []
 
 
-def run_update_vector_db():
+def run_update_vector_db(full_rebuild: bool = False):
     node_vector_db = UpdateVectorDB(index_name="langchain-vector-demo")
     
     # Option B: Direct Google Drive API
@@ -118,7 +132,13 @@ def run_update_vector_db():
         st.error("Error: GOOGLE_DRIVE_FOLDER_ID not set correctly in .env")
         return False
     
-    node_vector_db._drive_upload_vector_store(folder_id=folder_id)
+    progress_bar = st.progress(0.0, text="Descargando documentos de Drive...")
+
+    def on_progress(done: int, total: int, file_name: str):
+        progress_bar.progress(done / total, text=f"Procesados {done}/{total}: {file_name}")
+
+    node_vector_db._drive_upload_vector_store(folder_id=folder_id, full_rebuild=full_rebuild, progress_callback=on_progress)
+    progress_bar.empty()
     return True
 
 # ---------- Callbacks ----------
@@ -149,6 +169,7 @@ def main():
 
 
         try:
+            init_graph_runtime()
 
             #region Sidebar
             st.sidebar.markdown("### Limpiar historial")
@@ -205,8 +226,10 @@ def main():
             
             st.sidebar.markdown("### Actualizar DB Vectorial")
             with st.sidebar: 
+                full_rebuild = st.checkbox("Reconstruir desde cero", value=False,
+                                           help="Vuelve a indexar todos los documentos (blue/green, sin cortar el servicio)")
                 if st.button("Actualizar", type="secondary",  icon="🔄"):
-                    state =  run_update_vector_db()
+                    state =  run_update_vector_db(full_rebuild=full_rebuild)
 
                     if state:
                         m = st.success("Documentos agregados a la DB vectorial", icon="✅")
@@ -259,38 +282,48 @@ def main():
                     st.markdown(user_question)
 
                 try:
-                    with st.spinner("Consultando..."):
+                    start = time.time()
 
-                        start = time.time()
-                        with concurrent.futures.ThreadPoolExecutor() as executor:
-                            future = executor.submit(run_async, chat, user_question, email_user,  type_learning_to_int(alexandria_type_learning))
-                            metada, respuesta, url = future.result()
-                        end = time.time()
-
-                        # Guardar respuesta
-                        st.session_state.messages.append({"role": "assistant", "content": respuesta})
+                    if STREAM_ANSWER:
+                        # Mostrar respuesta mientras se genera
+                        answer_stream = chat_stream(user_question, email_user, type_learning_to_int(alexandria_type_learning))
+                        with st.chat_message("assistant", avatar=IMG_BOT):
+                            st.write_stream(answer_stream)
 
-                        # Mostrar metadatos
-                        for doc in metada:
-                            st.caption(f"Fuente: {doc.metadata.get('name', 'N/A')} || Página: {doc.metadata.get('page_number', 'N/A')}")
-                            st.caption(f"URL: {doc.metadata.get('url', 'N/A')}")
+                        final_state = answer_stream.final_state or {}
+                        metada = final_state.get('node_retrieve_docs') or []
+                        respuesta = final_state.get('chatbot_answer', ".|.")
+                        url = final_state.get('chatbot_answer_visualization')
+                    else:
+                        with st.spinner("Consultando..."):
+                            metada, respuesta, url = run_async(chat, user_question, email_user,  type_learning_to_int(alexandria_type_learning))
 
                         # Mostrar respuesta
                         with st.chat_message("assistant", avatar=IMG_BOT):
                             st.markdown(respuesta)
 
-                        # Mostrar imagen o video
-                        if url:
-                            if url.lower().endswith((".jpg", ".jpeg", ".png", ".gif", ".webp")):
-                                st.image(f"{URL_AZURE_STORAGE}{url}")
-                            elif url.lower().endswith((".mp4", ".webm", ".mov", ".ogg")):
-                                st.video(f"{URL_AZURE_STORAGE}{url}")
-                            else:
-                                st.error("Tipo de archivo no reconocido")
+                    end = time.time()
+
+                    # Guardar respuesta
+                    st.session_state.messages.append({"role": "assistant", "content": respuesta})
+
+                    # Mostrar metadatos
+                    for doc in metada or []:
+                        st.caption(f"Fuente: {doc.metadata.get('name', 'N/A')} || Página: {doc.metadata.get('page_number', 'N/A')}")
+                        st.caption(f"URL: {doc.metadata.get('url', 'N/A')}")
+
+                    # Mostrar imagen o video
+                    if url:
+                        if url.lower().endswith((".jpg", ".jpeg", ".png", ".gif", ".webp")):
+                            st.image(f"{URL_AZURE_STORAGE}{url}")
+                        elif url.lower().endswith((".mp4", ".webm", ".mov", ".ogg")):
+                            st.video(f"{URL_AZURE_STORAGE}{url}")
+                        else:
+                            st.error("Tipo de archivo no reconocido")
 
 
-                        # Mostrar tiempo
-                        st.caption(f"⏳ Tiempo de respuesta: {end - start:.2f} segundos")
+                    # Mostrar tiempo
+                    st.caption(f"⏳ Tiempo de respuesta: {end - start:.2f} segundos")
 
                 except Exception as e:
                     import traceback
@@ -0,0 +1,213 @@
+import os
+import re
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+import numpy as np
+from pathlib import Path
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_CACHE_FILE = Path("data/silver/embedding_cache.sqlite")
+
+
+def _normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCacheDiskStore:
+    """Local SQLite store of embeddings, keyed by the cache key (model + normalized text hash)."""
+
+    def __init__(self, file_path: Path = None):
+        self.file_path = Path(file_path) if file_path else EMBEDDING_CACHE_FILE
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, embedding BLOB)")
+
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.file_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self.lock, self._connect() as conn:
+            # SQLite limits the number of bound parameters per query
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, embedding FROM embedding_cache WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+
+    def _set_many(self, items: Dict[str, List[float]]):
+        with self.lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, embedding) VALUES (?, ?)",
+                [(key, np.asarray(embedding, dtype=np.float32).tobytes()) for key, embedding in items.items()]
+            )
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that never embeds the same (model, normalized text) twice.
+    In memory LRU first, then the optional local SQLite store, then the wrapped model.
+    Used by the retrieve path (queries) and by UpdateVectorDB (document chunks).
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, max_entries: int = None, disk_store: Optional[EmbeddingCacheDiskStore] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+        self.disk_store = disk_store
+
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+
+    def _get_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{_normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+    def _get_cached(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+            self.memory_hits += len(found)
+
+        pending = [key for key in dict.fromkeys(keys) if key not in found]
+        if pending and self.disk_store is not None:
+            try:
+                from_disk = self.disk_store._get_many(pending)
+            except Exception as e:
+                logging.error(f"Error reading embedding cache store: {e}")
+                from_disk = {}
+
+            self.disk_hits += len(from_disk)
+            self._remember(from_disk)
+            found.update(from_disk)
+
+        return found
+
+
+    def _remember(self, items: Dict[str, List[float]]):
+        with self.lock:
+            for key, embedding in items.items():
+                self.memory[key] = embedding
+                self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+
+    def _store(self, items: Dict[str, List[float]]):
+        self._remember(items)
+        if self.disk_store is not None and items:
+            try:
+                self.disk_store._set_many(items)
+            except Exception as e:
+                logging.error(f"Error writing embedding cache store: {e}")
+
+
+    def _split_missing(self, texts: List[str]):
+        keys = [self._get_key(text) for text in texts]
+        found = self._get_cached(keys)
+
+        # Unique texts still to embed, in order
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        self.misses += len(missing)
+
+        return keys, found, missing
+
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split_missing(texts)
+
+        if missing:
+            embedded = self.embeddings.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), embedded))
+            self._store(new_items)
+            found.update(new_items)
+
+        return [found[key] for key in keys]
+
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._get_key(text)
+        found = self._get_cached([key])
+        if key in found:
+            return found[key]
+
+        self.misses += 1
+        embedding = self.embeddings.embed_query(text)
+        self._store({key: embedding})
+        return embedding
+
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split_missing(texts)
+
+        if missing:
+            embedded = await self.embeddings.aembed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), embedded))
+            self._store(new_items)
+            found.update(new_items)
+
+        return [found[key] for key in keys]
+
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._get_key(text)
+        found = self._get_cached([key])
+        if key in found:
+            return found[key]
+
+        self.misses += 1
+        embedding = await self.embeddings.aembed_query(text)
+        self._store({key: embedding})
+        return embedding
+
+
+    def _get_stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
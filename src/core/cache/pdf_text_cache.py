@@ -0,0 +1,136 @@
+import os
+import gzip
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+import pypdf
+from pathlib import Path
+from contextlib import contextmanager
+from typing import List, Optional
+
+LOCAL_PDF_TEXT_CACHE_FILE = Path("data/silver/local_pdf_text_cache.sqlite")
+PDF_TEXT_CACHE_DIR = Path("data/silver/pdf_text_cache")
+
+
+class PdfTextCache:
+    """
+    Content addressed cache of extracted PDF text, shared by every loader (Drive, Azure, local).
+    Keyed by the sha256 of the file bytes and the pypdf version (a new pypdf may extract differently),
+    one gzip JSON file per PDF: <dir>/<pypdf version>/<hash[:2]>/<hash>.json.gz.
+    Used from the parser processes, writes are atomic (tmp file + rename) so concurrent writers are safe.
+    """
+
+    def __init__(self, cache_dir: Path = None):
+        cache_dir = Path(cache_dir) if cache_dir else Path(os.getenv("PDF_TEXT_CACHE_DIR", str(PDF_TEXT_CACHE_DIR)))
+        self.cache_dir = cache_dir / pypdf.__version__
+        self.enabled = os.getenv("PDF_TEXT_CACHE", "true").lower() == "true"
+
+
+    def _get_content_hash(self, data) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+
+    def _get_path(self, content_hash: str) -> Path:
+        return self.cache_dir / content_hash[:2] / f"{content_hash}.json.gz"
+
+
+    def _get(self, content_hash: str) -> Optional[List[str]]:
+        if not self.enabled:
+            return None
+
+        file_path = self._get_path(content_hash)
+        if not file_path.exists():
+            return None
+
+        try:
+            with gzip.open(file_path, "rt", encoding="utf-8") as f:
+                return json.load(f)["pages"]
+        except Exception as e:
+            logging.warning(f"Ignoring corrupted PDF text cache entry {file_path}: {e}")
+            return None
+
+
+    def _set(self, content_hash: str, pages: List[str]):
+        if not self.enabled:
+            return
+
+        file_path = self._get_path(content_hash)
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump({"pages": pages, "total_pages": len(pages), "pypdf_version": pypdf.__version__}, f, ensure_ascii=False)
+            os.replace(tmp_path, file_path)
+
+        except Exception as e:
+            logging.error(f"Error writing PDF text cache: {e}")
+
+
+class LocalPdfTextCache:
+    """
+    Index of local PDFs into PdfTextCache: absolute path + mtime + size -> content hash.
+    A file that was not touched since the last run is not opened, hashed nor parsed again;
+    the page text itself lives only in the shared content addressed cache.
+    """
+
+    def __init__(self, file_path: Path = None, text_cache: PdfTextCache = None):
+        self.file_path = Path(file_path) if file_path else LOCAL_PDF_TEXT_CACHE_FILE
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.text_cache = text_cache or PdfTextCache()
+        self.lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS pdf_hash (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, content_hash TEXT)")
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.file_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+    def _get(self, path: str, mtime_ns: int, size: int) -> Optional[List[str]]:
+        try:
+            with self.lock, self._connect() as conn:
+                row = conn.execute("SELECT content_hash FROM pdf_hash WHERE path = ? AND mtime_ns = ? AND size = ?",
+                                   (path, mtime_ns, size)).fetchone()
+        except Exception as e:
+            logging.error(f"Error reading local PDF text cache: {e}")
+            row = None
+
+        # The shared entry may be gone (cache dir cleared, new pypdf version): parsed again
+        pages = self.text_cache._get(row[0]) if row else None
+        if pages is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return pages
+
+
+    def _set(self, path: str, mtime_ns: int, size: int, content_hash: str):
+        """Records the content hash of a file, its pages were stored in PdfTextCache by the parser."""
+        try:
+            with self.lock, self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO pdf_hash (path, mtime_ns, size, content_hash) VALUES (?, ?, ?, ?)",
+                             (path, mtime_ns, size, content_hash))
+        except Exception as e:
+            logging.error(f"Error writing local PDF text cache: {e}")
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
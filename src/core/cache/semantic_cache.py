@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from langchain_core.documents import Document
+
+SEMANTIC_CACHE_FILE = Path("data/silver/semantic_cache.sqlite")
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _serialize_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Keeps only the answer fields of the final State, with Documents as plain dicts."""
+    docs = response.get("node_retrieve_docs") or []
+    return {
+        "chatbot_answer": response.get("chatbot_answer"),
+        "chatbot_answer_visualization": response.get("chatbot_answer_visualization"),
+        "node_retrieve_docs": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs],
+    }
+
+
+def _deserialize_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    response = dict(response)
+    response["node_retrieve_docs"] = [Document(page_content=doc["page_content"], metadata=doc["metadata"])
+                                      for doc in response.get("node_retrieve_docs", [])]
+    return response
+
+
+class SemanticCacheMemoryBackend:
+    """In process LRU with TTL. Lost on restart, fastest lookups."""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.entries = OrderedDict()
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+
+    def _lookup(self, embedding: np.ndarray, alexandria_type_learning: int, index_version: str, threshold: float):
+        with self.lock:
+            self._evict_expired()
+
+            candidates = [(entry_id, entry) for entry_id, entry in self.entries.items()
+                          if entry["alexandria_type_learning"] == alexandria_type_learning
+                          and entry["index_version"] == index_version]
+            if not candidates:
+                return None, 0.0
+
+            scores = np.stack([entry["embedding"] for _, entry in candidates]) @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None, float(scores[best])
+
+            entry_id, entry = candidates[best]
+            self.entries.move_to_end(entry_id)
+            return entry["response"], float(scores[best])
+
+
+    def _store(self, embedding: np.ndarray, alexandria_type_learning: int, index_version: str, response: Dict[str, Any]):
+        with self.lock:
+            self.entries[self.next_id] = {
+                "embedding": embedding,
+                "alexandria_type_learning": alexandria_type_learning,
+                "index_version": index_version,
+                "response": response,
+                "created_at": time.time(),
+            }
+            self.next_id += 1
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+    def _invalidate(self, index_version: str = None):
+        """Drops every entry not built on index_version (all entries if None)."""
+        with self.lock:
+            for entry_id in [entry_id for entry_id, entry in self.entries.items()
+                             if index_version is None or entry["index_version"] != index_version]:
+                del self.entries[entry_id]
+
+
+    def _evict_expired(self):
+        expires_before = time.time() - self.ttl_seconds
+        for entry_id in [entry_id for entry_id, entry in self.entries.items() if entry["created_at"] < expires_before]:
+            del self.entries[entry_id]
+
+
+class SemanticCacheDiskBackend:
+    """Local SQLite file, survives restarts and is shared by every process of the host."""
+
+    def __init__(self, file_path: Path = None, max_entries: int = 1000, ttl_seconds: float = 86400):
+        self.file_path = Path(file_path) if file_path else SEMANTIC_CACHE_FILE
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS semantic_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    alexandria_type_learning INTEGER,
+                    index_version TEXT,
+                    embedding BLOB,
+                    response TEXT,
+                    created_at REAL,
+                    last_access REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_key ON semantic_cache (alexandria_type_learning, index_version)")
+
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.file_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+    def _lookup(self, embedding: np.ndarray, alexandria_type_learning: int, index_version: str, threshold: float):
+        with self.lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, embedding, response FROM semantic_cache "
+                "WHERE alexandria_type_learning = ? AND index_version = ? AND created_at >= ?",
+                (alexandria_type_learning, index_version, time.time() - self.ttl_seconds)
+            ).fetchall()
+            if not rows:
+                return None, 0.0
+
+            scores = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None, float(scores[best])
+
+            conn.execute("UPDATE semantic_cache SET last_access = ? WHERE id = ?", (time.time(), rows[best][0]))
+            return json.loads(rows[best][2]), float(scores[best])
+
+
+    def _store(self, embedding: np.ndarray, alexandria_type_learning: int, index_version: str, response: Dict[str, Any]):
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO semantic_cache (alexandria_type_learning, index_version, embedding, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (alexandria_type_learning, index_version, embedding.astype(np.float32).tobytes(),
+                 json.dumps(response, ensure_ascii=False), now, now)
+            )
+
+            # TTL, then LRU
+            conn.execute("DELETE FROM semantic_cache WHERE created_at < ?", (now - self.ttl_seconds, ))
+            conn.execute(
+                "DELETE FROM semantic_cache WHERE id NOT IN "
+                "(SELECT id FROM semantic_cache ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries, )
+            )
+
+
+    def _invalidate(self, index_version: str = None):
+        with self.lock, self._connect() as conn:
+            if index_version is None:
+                conn.execute("DELETE FROM semantic_cache")
+            else:
+                conn.execute("DELETE FROM semantic_cache WHERE index_version != ?", (index_version, ))
+
+
+class SemanticCache:
+    """
+    Answer cache in front of the graph.
+    A question is a hit when a previously answered question with the same learning type,
+    built on the same index version, has cosine similarity >= threshold.
+    Backend: "memory" (LRU/TTL in process) or "disk" (local SQLite).
+    """
+
+    def __init__(self, backend: str = None, threshold: float = None, max_entries: int = None, ttl_seconds: float = None):
+        backend = backend or os.getenv("SEMANTIC_CACHE_BACKEND", "memory")
+        self.threshold = threshold if threshold is not None else float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+        max_entries = max_entries if max_entries is not None else int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+
+        if backend == "memory":
+            self.backend = SemanticCacheMemoryBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        elif backend == "disk":
+            self.backend = SemanticCacheDiskBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        else:
+            raise ValueError(f"Unknown semantic cache backend: {backend}")
+
+        self.hits = 0
+        self.misses = 0
+
+
+    def _lookup(self, question_embedding: List[float], alexandria_type_learning: int, index_version: str) -> Optional[Dict[str, Any]]:
+        try:
+            response, score = self.backend._lookup(_normalize(question_embedding),
+                                                   alexandria_type_learning,
+                                                   index_version,
+                                                   self.threshold)
+
+        except Exception as e:
+            # A broken cache must never break the chat
+            logging.error(f"Error looking up semantic cache: {e}")
+            return None
+
+        if response is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logging.info(f"Semantic cache hit (similarity {score:.3f})")
+        return _deserialize_response(response)
+
+
+    def _store(self, question_embedding: List[float], alexandria_type_learning: int, index_version: str, response: Dict[str, Any]):
+        try:
+            self.backend._store(_normalize(question_embedding),
+                                alexandria_type_learning,
+                                index_version,
+                                _serialize_response(response))
+
+        except Exception as e:
+            logging.error(f"Error storing in semantic cache: {e}")
+
+
+    def _invalidate(self, index_version: str = None):
+        try:
+            self.backend._invalidate(index_version)
+            logging.info("Semantic cache invalidated.")
+
+        except Exception as e:
+            logging.error(f"Error invalidating semantic cache: {e}")
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
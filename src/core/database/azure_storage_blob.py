@@ -1,10 +1,14 @@
-import io
 import os
+import queue
+import asyncio
 import logging
-from pypdf import PdfReader
+import threading
+from typing import Dict, Iterator, List, Optional
 from dotenv import load_dotenv
 from azure.storage.blob import BlobServiceClient
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 from langchain_core.documents import Document
+from src.core.database.pdf_extract import _extract_pdf_pages, _get_pdf_parse_pool
 
 load_dotenv()
 
@@ -17,54 +21,178 @@ class AzureStorageBlobDatabase:
         self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
         self.container_client = self.blob_service_client.get_container_client(container_name)
 
+        # The async client is created on the producer loop of every listing
+        self.connection_string = connection_string
+        self.container_name = container_name
 
-    def _load_pdfs_blob(self, name_folder:str="") -> list:
-        try:
-            docs_loaded = []
-            
-            if name_folder == "":
-                return docs_loaded
-            
-            blob_list = self.container_client.list_blobs()
+        # Download / parse pipeline
+        self.download_workers = int(os.getenv("AZURE_BLOB_DOWNLOAD_WORKERS", "8"))
+        self.max_in_flight = int(os.getenv("AZURE_BLOB_MAX_IN_FLIGHT", "16"))
+        self.blob_timeout = float(os.getenv("AZURE_BLOB_TIMEOUT", "300"))
 
-            for blob in blob_list:
-                logging.info(f"--> Leyendo blob: {blob.name}")
+        # Last listing of _iter_pdfs_blob
+        self.listing = None
 
-                blob_client = self.container_client.get_blob_client(blob.name)
-                blob_content_bytes =blob_client.download_blob().readall()
 
-                pdf_stream = io.BytesIO(blob_content_bytes)
-                pdf_reader = PdfReader(pdf_stream)
+    def _load_pdfs_blob(self, name_folder:str="") -> list:
+        """Whole folder in memory, UpdateVectorDB consumes _iter_pdfs_blob instead."""
+        return list(self._iter_pdfs_blob(name_folder=name_folder))
 
-                total_pages = len(pdf_reader.pages)
 
-                name = os.path.basename(blob.name)
-                name_no_ext = os.path.splitext(name)[0]
+    def _iter_pdfs_blob(self, name_folder: str = "", known_versions: Optional[Dict[str, str]] = None) -> Iterator[Document]:
+        """
+        Yields the page documents of the PDFs under name_folder, the pages of a blob one after the other.
 
-                for i, page in enumerate(pdf_reader.pages):
+        Blobs are listed with the folder as prefix and downloaded concurrently by the async client on a
+        background event loop; text extraction runs in the PDF process pool. At most max_in_flight blobs
+        are downloaded / parsed / waiting for the consumer at a time, so memory does not grow with the container.
+        Blobs whose ETag matches known_versions (source_id -> version) are not downloaded at all.
+        """
+        if name_folder == "":
+            return
 
-                    text_page = page.extract_text()
+        self.listing = {"known_versions": known_versions, "listed_source_ids": set(), "skipped": 0}
+        results = queue.Queue(maxsize=self.max_in_flight)
+        stop = threading.Event()
+        total_docs = 0
 
-                    metadata = {
-                        "name": name_no_ext,
-                        "page_number": i + 1,
-                        "url": f"https://{self.blob_service_client.account_name}.blob.core.windows.net/{self.container_client.container_name}/{blob.name}",
-                        "total_pages": total_pages,
-                    }
+        producer = threading.Thread(target=asyncio.run,
+                                    args=(self._produce_blobs(name_folder, known_versions or {}, results, stop),),
+                                    daemon=True)
+        producer.start()
+
+        try:
+            while True:
+                kind, payload = results.get()
+                if kind == "done":
+                    break
+                if kind == "error":
+                    raise payload
 
-                    doc = Document(page_content=text_page,
-                                   metadata=metadata)
-                    
-                    docs_loaded.append(doc)
+                for doc in payload:
+                    total_docs += 1
+                    yield doc
 
-            logging.info(f"Total blobs cargados desde '{name_folder}': {len(docs_loaded)}")
+            logging.info(f"Total blobs cargados desde '{name_folder}': {len(self.listing['listed_source_ids'])} "
+                         f"({self.listing['skipped']} sin cambios), {total_docs} paginas")
 
         except Exception as e:
             logging.error(f"Error loading blobs: {e}")
             raise
 
-        return docs_loaded
-    
+        finally:
+            # Also when the consumer stops early: unblock and finish the producer
+            stop.set()
+            producer.join(timeout=self.blob_timeout)
+
+
+    def _get_removed_source_ids(self) -> Optional[List[str]]:
+        """
+        After _iter_pdfs_blob: None when every blob was yielded (anything not yielded is gone),
+        otherwise the known sources that are no longer in the folder (unchanged blobs were not yielded).
+        """
+        if not self.listing or self.listing["known_versions"] is None:
+            return None
+        return [source_id for source_id in self.listing["known_versions"]
+                if source_id not in self.listing["listed_source_ids"]]
+
+
+    async def _produce_blobs(self, name_folder: str, known_versions: Dict[str, str], results: queue.Queue, stop: threading.Event):
+        """Runs on the producer thread: lists, downloads and parses blobs and puts their documents in results."""
+        prefix = name_folder.rstrip("/") + "/"
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        download_slots = asyncio.Semaphore(self.download_workers)
+        tasks = set()
+
+        try:
+            with _get_pdf_parse_pool() as parse_pool:
+                async with AsyncBlobServiceClient.from_connection_string(self.connection_string) as service_client:
+                    container_client = service_client.get_container_client(self.container_name)
+
+                    async for blob in container_client.list_blobs(name_starts_with=prefix):
+                        if stop.is_set():
+                            break
+                        if not blob.name.lower().endswith(".pdf"):
+                            continue
+
+                        self.listing["listed_source_ids"].add(blob.name)
+                        if blob.etag and known_versions.get(blob.name) == blob.etag:
+                            self.listing["skipped"] += 1
+                            continue
+
+                        # Backpressure: the listing waits while max_in_flight blobs are in the pipeline
+                        await in_flight.acquire()
+                        task = asyncio.create_task(self._process_blob(container_client, blob, parse_pool,
+                                                                      download_slots, in_flight, results, stop))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+
+                    if tasks:
+                        await asyncio.gather(*tasks)
+
+            self._put_result(results, stop, ("done", None))
+
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            self._put_result(results, stop, ("error", e))
+
+
+    async def _process_blob(self, container_client, blob, parse_pool, download_slots: asyncio.Semaphore,
+                            in_flight: asyncio.Semaphore, results: queue.Queue, stop: threading.Event):
+        try:
+            logging.info(f"--> Leyendo blob: {blob.name}")
+
+            async with download_slots:
+                downloader = await container_client.get_blob_client(blob.name).download_blob()
+                blob_content_bytes = await asyncio.wait_for(downloader.readall(), timeout=self.blob_timeout)
+
+            pages = await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(parse_pool, _extract_pdf_pages, blob_content_bytes),
+                timeout=self.blob_timeout)
+            del blob_content_bytes
+
+            docs = self._build_pdf_docs(pages, blob.name, blob.etag)
+            await asyncio.to_thread(self._put_result, results, stop, ("docs", docs))
+
+        except Exception as e:
+            # The blob stays listed, so its indexed chunks are kept until the next sync
+            logging.error(f"Error loading blob {blob.name}: {e}")
+
+        finally:
+            in_flight.release()
+
+
+    def _put_result(self, results: queue.Queue, stop: threading.Event, item: tuple):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+    def _build_pdf_docs(self, pages: List[str], blob_name: str, etag: str) -> List[Document]:
+        docs = []
+        total_pages = len(pages)
+
+        name = os.path.basename(blob_name)
+        name_no_ext = os.path.splitext(name)[0]
+
+        for i, text_page in enumerate(pages):
+            metadata = {
+                "name": name_no_ext,
+                "page_number": i + 1,
+                "url": f"https://{self.blob_service_client.account_name}.blob.core.windows.net/{self.container_name}/{blob_name}",
+                "total_pages": total_pages,
+                "source_id": blob_name,
+                "source_version": etag,
+            }
+
+            docs.append(Document(page_content=text_page, metadata=metadata))
+
+        return docs
+
 
 #    _____
 #   ( \/ @\____
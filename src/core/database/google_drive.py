@@ -1,22 +1,35 @@
 import os
 import io
+import json
+import time
 import logging
-from typing import List
+import threading
+from pathlib import Path
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 # from google.oauth2 import service_account
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
-from pypdf import PdfReader
 from langchain_core.documents import Document
 from dotenv import load_dotenv
+from src.core.database.pdf_extract import _extract_pdf_pages, _get_pdf_parse_pool
 
 load_dotenv()
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+# Start page tokens of the Drive changes API, one file per synced folder
+DRIVE_CHANGES_DIR = Path("data/silver")
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+RELEVANT_MIME_TYPES_QUERY = "mimeType = 'application/pdf' or mimeType contains 'image/' or mimeType contains 'video/'"
+FILE_FIELDS = "id, name, mimeType, webViewLink, webContentLink, modifiedTime, md5Checksum"
+
 class GoogleDriveDatabase:
     
     def __init__(self):
@@ -77,100 +90,339 @@ class GoogleDriveDatabase:
         else:
             self.service = None
 
-    def _load_files_drive(self, folder_id: str) -> List[Document]:
+        # Download / parse pipeline
+        self.download_workers = int(os.getenv("DRIVE_DOWNLOAD_WORKERS", "8"))
+        self.max_in_flight = int(os.getenv("DRIVE_MAX_IN_FLIGHT", "16"))
+        self.file_timeout = float(os.getenv("DRIVE_FILE_TIMEOUT", "300"))
+
+        # googleapiclient services (httplib2) are not thread safe: one per download thread
+        self._thread_local = threading.local()
+
+        # Last listing of _iter_files_drive (partial when only changes were listed)
+        self.listing = None
+
+    def _load_files_drive(self, folder_id: str, progress_callback: Optional[Callable[[int, int, str], None]] = None) -> List[Document]:
         """
-        Loads PDFs, Images, and Videos from a Google Drive folder.
+        Loads PDFs, Images, and Videos from a Google Drive folder and its subfolders.
         - PDFs: Content is extracted text.
         - Images/Videos: Content is the filename (for searching) and Metadata contains the URL.
+        Whole folder in memory, UpdateVectorDB consumes _iter_files_drive instead.
+        """
+        return list(self._iter_files_drive(folder_id=folder_id, progress_callback=progress_callback))
+
+
+    def _iter_files_drive(self, folder_id: str, progress_callback: Optional[Callable[[int, int, str], None]] = None,
+                          changes_only: bool = False, changes_key: str = None) -> Iterator[Document]:
+        """
+        Yields the documents of a Drive folder tree lazily, the pages of a file one after the other.
+
+        The tree is listed page by page (nextPageToken) and subfolders are traversed as they are found.
+        With changes_only and a stored start page token (see _commit_changes_token), only the files
+        modified since the last committed sync are listed, through the Drive changes API; files removed
+        since then are reported by _get_removed_source_ids once the generator is exhausted.
+
+        PDFs go through a pipeline: a bounded thread pool downloads them and a process pool
+        extracts the text. At most max_in_flight files are in the pipeline at the same time.
+        progress_callback(done, listed, file_name) is called from the caller thread.
         """
-        docs_loaded = []
         try:
             if not self.service:
                 logging.error("Google Drive service not initialized. Check credentials.")
-                return []
+                return
 
-            # Query for files in folder (excluding trash)
-            # MimeTypes: application/pdf, image/*, video/*
-            query = f"'{folder_id}' in parents and trashed = false and (mimeType = 'application/pdf' or mimeType contains 'image/' or mimeType contains 'video/')"
-            
-            results = self.service.files().list(
-                q=query, 
-                pageSize=100, 
-                fields="nextPageToken, files(id, name, mimeType, webViewLink, webContentLink)"
-            ).execute()
-            
-            items = results.get('files', [])
+            changes_key = changes_key or folder_id
+            state = self._load_changes_state(changes_key) if changes_only else None
 
-            if not items:
-                logging.warning(f"No relevant files found in Drive folder ID: {folder_id}")
-                return docs_loaded
+            self.listing = {
+                "changes_key": changes_key,
+                "partial": state is not None,
+                "removed_source_ids": [],
+                # Files that could not be downloaded / parsed: kept indexed, listed again next sync
+                "failed_source_ids": set(),
+                "folder_ids": set(state["folder_ids"]) if state else set(),
+                "changes_token": None,
+            }
 
-            for item in items:
-                file_id = item['id']
-                file_name = item['name']
-                mime_type = item['mimeType']
-                web_view_link = item.get('webViewLink', '')
-                
-                logging.info(f"--> Processing Drive file: {file_name} ({mime_type})")
-                
-                name_no_ext = os.path.splitext(file_name)[0]
-                
-                if 'application/pdf' in mime_type:
-                    # Process PDF
-                    docs_loaded.extend(self._process_pdf(file_id, file_name, web_view_link))
-                else:
-                    # Process Image or Video (Metadata only)
-                    # We create a document where the "content" is the filename so it can be retrieved.
-                    metadata = {
-                        "name": name_no_ext,
-                        "page_number": 1,
-                        "url": web_view_link, # Link to view in Drive
-                        "total_pages": 1,
-                        "source_type": "google_drive",
-                        "content_type": mime_type
-                    }
-                    # Content is just the name for now
-                    doc = Document(page_content=f"Archivo multimedia: {file_name}", metadata=metadata)
-                    docs_loaded.append(doc)
-
-            logging.info(f"Total documents loaded from Drive: {len(docs_loaded)}")
+            if state:
+                logging.info(f"Listing Drive changes of folder {folder_id} since the last sync")
+                items = self._list_changes(state["start_page_token"])
+            else:
+                # Taken before listing, changes made while the tree is listed show up in the next sync
+                self.listing["changes_token"] = self.service.changes().getStartPageToken().execute().get("startPageToken")
+                items = self._list_folder_tree(folder_id)
+
+            total_docs = 0
+            for doc in self._iter_item_docs(items, progress_callback):
+                total_docs += 1
+                yield doc
+
+            logging.info(f"Total documents loaded from Drive: {total_docs}")
 
         except Exception as e:
             logging.error(f"Error interacting with Google Drive: {e}")
             raise
 
-        return docs_loaded
 
-    def _process_pdf(self, file_id, file_name, web_view_link):
+    def _get_removed_source_ids(self) -> Optional[List[str]]:
+        """
+        After _iter_files_drive: None when the whole tree was listed (anything not yielded is gone),
+        the ids of the removed / trashed / moved out files when only changes were listed.
+        """
+        if not self.listing or not self.listing["partial"]:
+            return None
+        return list(self.listing["removed_source_ids"])
+
+
+    def _get_failed_source_ids(self) -> List[str]:
+        """After _iter_files_drive: files listed but not loaded, their indexed chunks must not be removed."""
+        if not self.listing:
+            return []
+        return sorted(self.listing["failed_source_ids"])
+
+
+    def _commit_changes_token(self):
+        """Stores the start page token of the last listing. Call it once its documents are synced."""
+        if not self.listing or not self.listing["changes_token"]:
+            return
+
+        if self.listing["failed_source_ids"]:
+            # The changes of the failed files would be lost, the same changes are listed again next time
+            logging.warning(f"{len(self.listing['failed_source_ids'])} Drive files failed, changes token not committed")
+            return
+
+        try:
+            file_path = self._get_changes_state_path(self.listing["changes_key"])
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+
+            tmp_path = file_path.with_suffix(".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump({
+                    "start_page_token": self.listing["changes_token"],
+                    "folder_ids": sorted(self.listing["folder_ids"]),
+                }, f)
+            os.replace(tmp_path, file_path)
+
+        except Exception as e:
+            logging.error(f"Error saving Drive changes token: {e}")
+            raise
+
+
+    def _get_changes_state_path(self, changes_key: str) -> Path:
+        return DRIVE_CHANGES_DIR / f"drive_changes_{changes_key}.json"
+
+
+    def _load_changes_state(self, changes_key: str) -> Optional[dict]:
+        file_path = self._get_changes_state_path(changes_key)
+        if not file_path.exists():
+            return None
+        with file_path.open("r", encoding="utf-8") as f:
+            try:
+                state = json.load(f)
+            except json.JSONDecodeError:
+                logging.warning(f"Corrupted Drive changes token {file_path}, listing the whole folder")
+                return None
+        return state if state.get("start_page_token") else None
+
+
+    def _list_folder_tree(self, folder_id: str) -> Iterator[dict]:
+        """Relevant files of folder_id and all its subfolders, one API page at a time."""
+        folder_ids = self.listing["folder_ids"]
+        pending_folders = [folder_id]
+
+        while pending_folders:
+            current_folder = pending_folders.pop()
+            if current_folder in folder_ids:
+                continue
+            folder_ids.add(current_folder)
+
+            query = f"'{current_folder}' in parents and trashed = false and (mimeType = '{FOLDER_MIME_TYPE}' or {RELEVANT_MIME_TYPES_QUERY})"
+            page_token = None
+            while True:
+                results = self.service.files().list(
+                    q=query,
+                    pageSize=1000,
+                    pageToken=page_token,
+                    fields=f"nextPageToken, files({FILE_FIELDS})"
+                ).execute()
+
+                for item in results.get('files', []):
+                    if item['mimeType'] == FOLDER_MIME_TYPE:
+                        pending_folders.append(item['id'])
+                    else:
+                        yield item
+
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+
+
+    def _list_changes(self, page_token: str) -> Iterator[dict]:
+        """Relevant files of the tree modified since page_token, removed ones go to listing["removed_source_ids"]."""
+        folder_ids = self.listing["folder_ids"]
+        removed_source_ids = self.listing["removed_source_ids"]
+
+        while page_token:
+            results = self.service.changes().list(
+                pageToken=page_token,
+                pageSize=1000,
+                spaces='drive',
+                includeRemoved=True,
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}, parents, trashed))"
+            ).execute()
+
+            for change in results.get('changes', []):
+                item = change.get('file')
+                if change.get('removed') or not item or item.get('trashed'):
+                    if change['fileId'] in folder_ids:
+                        logging.warning(f"Drive folder {change['fileId']} was removed, run a full rebuild to drop its files")
+                    removed_source_ids.append(change['fileId'])
+                    continue
+
+                in_tree = any(parent in folder_ids for parent in item.get('parents', []))
+
+                if item['mimeType'] == FOLDER_MIME_TYPE:
+                    if in_tree:
+                        folder_ids.add(item['id'])
+                    continue
+
+                if not self._is_relevant_item(item):
+                    continue
+
+                if in_tree:
+                    yield item
+                else:
+                    # Moved out of the tree (no-op for files never indexed)
+                    removed_source_ids.append(item['id'])
+
+            if results.get('newStartPageToken'):
+                self.listing["changes_token"] = results['newStartPageToken']
+            page_token = results.get('nextPageToken')
+
+
+    def _is_relevant_item(self, item: dict) -> bool:
+        mime_type = item.get('mimeType', '')
+        return mime_type == 'application/pdf' or mime_type.startswith('image/') or mime_type.startswith('video/')
+
+
+    def _iter_item_docs(self, items: Iterable[dict], progress_callback=None) -> Iterator[Document]:
+        """Download / parse pipeline over a lazy listing, documents come out in listing order."""
+        download_slots = threading.BoundedSemaphore(self.download_workers)
+        pending = deque()
+        listed, done = 0, 0
+
+        # Threads = downloads + files waiting for the parser, downloads themselves are capped by download_slots
+        with ThreadPoolExecutor(max_workers=self.download_workers + self.max_in_flight) as download_pool, \
+             _get_pdf_parse_pool() as parse_pool:
+
+            for item in items:
+                logging.info(f"--> Processing Drive file: {item['name']} ({item['mimeType']})")
+                listed += 1
+
+                if 'application/pdf' in item['mimeType']:
+                    future = download_pool.submit(self._process_pdf_item, item, parse_pool, download_slots)
+                else:
+                    future = download_pool.submit(self._process_media_item, item)
+                pending.append((item, future))
+
+                # Backpressure: the listing waits while max_in_flight files are in the pipeline
+                while pending and (len(pending) >= self.max_in_flight or pending[0][1].done()):
+                    done += 1
+                    yield from self._get_item_docs(*pending.popleft(), done, listed, progress_callback)
+
+            while pending:
+                done += 1
+                yield from self._get_item_docs(*pending.popleft(), done, listed, progress_callback)
+
+
+    def _get_item_docs(self, item: dict, future, done: int, listed: int, progress_callback) -> List[Document]:
         docs = []
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-            
-            fh.seek(0)
-            
-            pdf_reader = PdfReader(fh)
-            total_pages = len(pdf_reader.pages)
-            name_no_ext = os.path.splitext(file_name)[0]
-
-            for i, page in enumerate(pdf_reader.pages):
-                text_page = page.extract_text()
-                if text_page:
-                    metadata = {
-                        "name": name_no_ext,
-                        "page_number": i + 1,
-                        "url": web_view_link,
-                        "total_pages": total_pages,
-                        "source_type": "google_drive",
-                        "content_type": "application/pdf"
-                    }
-                    doc = Document(page_content=text_page, metadata=metadata)
-                    docs.append(doc)
+            docs = future.result()
         except Exception as e:
-             logging.error(f"Error parsing PDF {file_name}: {e}")
-        
+            logging.error(f"Error processing Drive file {item['name']}: {e}")
+            self.listing["failed_source_ids"].add(item['id'])
+
+        if progress_callback is not None:
+            try:
+                progress_callback(done, listed, item['name'])
+            except Exception as e:
+                logging.warning(f"Progress callback failed: {e}")
+
+        return docs
+
+
+    def _get_thread_service(self):
+        service = getattr(self._thread_local, "service", None)
+        if service is None:
+            service = build('drive', 'v3', credentials=self.creds, cache_discovery=False)
+            self._thread_local.service = service
+        return service
+
+
+    def _get_source_version(self, item: dict) -> str:
+        # Changes whenever the file content changes (used by incremental sync)
+        return item.get('md5Checksum') or item.get('modifiedTime', '')
+
+
+    def _process_media_item(self, item: dict) -> List[Document]:
+        # Process Image or Video (Metadata only)
+        # We create a document where the "content" is the filename so it can be retrieved.
+        file_name = item['name']
+        metadata = {
+            "name": os.path.splitext(file_name)[0],
+            "page_number": 1,
+            "url": item.get('webViewLink', ''), # Link to view in Drive
+            "total_pages": 1,
+            "source_type": "google_drive",
+            "content_type": item['mimeType'],
+            "source_id": item['id'],
+            "source_version": self._get_source_version(item)
+        }
+        # Content is just the name for now
+        return [Document(page_content=f"Archivo multimedia: {file_name}", metadata=metadata)]
+
+
+    def _process_pdf_item(self, item: dict, parse_pool, download_slots: threading.BoundedSemaphore) -> List[Document]:
+        with download_slots:
+            pdf_bytes = self._download_file(item['id'])
+
+        pages = parse_pool.submit(_extract_pdf_pages, pdf_bytes).result(timeout=self.file_timeout)
+
+        return self._build_pdf_docs(pages, item['id'], item['name'], item.get('webViewLink', ''), self._get_source_version(item))
+
+
+    def _download_file(self, file_id: str) -> bytes:
+        request = self._get_thread_service().files().get_media(fileId=file_id)
+        fh = io.BytesIO()
+        downloader = MediaIoBaseDownload(fh, request)
+        deadline = time.time() + self.file_timeout
+        done = False
+        while done is False:
+            if time.time() > deadline:
+                raise TimeoutError(f"Download of {file_id} took more than {self.file_timeout}s")
+            status, done = downloader.next_chunk()
+
+        return fh.getvalue()
+
+
+    def _build_pdf_docs(self, pages: List[str], file_id, file_name, web_view_link, source_version="") -> List[Document]:
+        docs = []
+        total_pages = len(pages)
+        name_no_ext = os.path.splitext(file_name)[0]
+
+        for i, text_page in enumerate(pages):
+            if text_page:
+                metadata = {
+                    "name": name_no_ext,
+                    "page_number": i + 1,
+                    "url": web_view_link,
+                    "total_pages": total_pages,
+                    "source_type": "google_drive",
+                    "content_type": "application/pdf",
+                    "source_id": file_id,
+                    "source_version": source_version
+                }
+                doc = Document(page_content=text_page, metadata=metadata)
+                docs.append(doc)
+
         return docs
@@ -9,6 +9,8 @@ import streamlit as st
 class GoogleSheetsHistory:
     def __init__(self):
         self.creds = None
+        # Sheet name that accepted the last append
+        self.sheet_name = None
         SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
         
         # Load credentials using the existing logic (Streamlit Secrets priority)
@@ -28,14 +30,19 @@ class GoogleSheetsHistory:
 
     def append_log(self, spreadsheet_id: str, user_id: str, question: str, answer: str):
         """Appends a new conversation log to the specified Google Sheet."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.append_rows(spreadsheet_id, [[timestamp, user_id, question, answer]])
+
+    def append_rows(self, spreadsheet_id: str, values: list) -> bool:
+        """Appends several log rows with a single request. Returns False when they were not written."""
         if not self.service:
             logging.error("Sheets service not initialized.")
-            return
+            return False
 
-        # Attempt to find the correct sheet name
+        # Attempt to find the correct sheet name, the one that worked is tried first next time
         possible_names = ["Sheet1", "sheets1", "Hoja1", "Logs"]
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        values = [[timestamp, user_id, question, answer]]
+        if self.sheet_name:
+            possible_names = [self.sheet_name] + [name for name in possible_names if name != self.sheet_name]
         body = {'values': values}
 
         for sheet_name in possible_names:
@@ -46,8 +53,9 @@ class GoogleSheetsHistory:
                     valueInputOption="RAW",
                     body=body
                 ).execute()
-                logging.info(f"Log appended successfully to {sheet_name}")
-                return # Success!
+                self.sheet_name = sheet_name
+                logging.info(f"{len(values)} logs appended successfully to {sheet_name}")
+                return True # Success!
             except Exception as e:
                 # If it's a "not found" error, try next one. Otherwise log error.
                 if "not found" in str(e).lower():
@@ -55,3 +63,5 @@ class GoogleSheetsHistory:
                 else:
                     logging.error(f"Error appending to Google Sheets ({sheet_name}): {e}")
                     break
+
+        return False
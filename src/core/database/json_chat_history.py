@@ -1,9 +1,13 @@
 import json
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 CHAT_HISTORY_FILE = Path("data/silver/chat_history.json")
 
+# Nodes write from worker threads, serialize the read-modify-write cycle
+_FILE_LOCK = threading.Lock()
+
 class JsonChatHistory:
 	"""Code made by GPT-5.1-Codex and revised by Ali Campos"""
 
@@ -14,10 +18,11 @@ class JsonChatHistory:
 
 	def add_responses(self, user_id: str, message: str, response: str) -> None:
 		"""Agrega un par mensaje-respuesta para un usuario."""
-		data = self._load()
-		user_history = data.setdefault(user_id, [])
-		user_history.append({"message": message, "response": response})
-		self._save(data)
+		with _FILE_LOCK:
+			data = self._load()
+			user_history = data.setdefault(user_id, [])
+			user_history.append({"message": message, "response": response})
+			self._save(data)
 
 
 	def get_last_responses(self, user_id: str, n: int) -> List[Dict[str, Any]]:
@@ -32,18 +37,19 @@ class JsonChatHistory:
 		"""Elimina las últimas n respuestas de un usuario y regresa cuántas se eliminaron."""
 		if n <= 0:
 			return 0
-		data = self._load()
-		history = data.get(user_id, [])
-		if not history:
-			return 0
+		with _FILE_LOCK:
+			data = self._load()
+			history = data.get(user_id, [])
+			if not history:
+				return 0
 
-		removed = min(n, len(history))
-		del history[-removed:]
-		if history:
-			data[user_id] = history
-		else:
-			data.pop(user_id, None)
-		self._save(data)
+			removed = min(n, len(history))
+			del history[-removed:]
+			if history:
+				data[user_id] = history
+			else:
+				data.pop(user_id, None)
+			self._save(data)
 		return removed
 
 
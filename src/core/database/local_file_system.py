@@ -1,71 +1,143 @@
 import os
-import glob
 import logging
-from typing import List
-from pypdf import PdfReader
+from collections import deque
+from typing import Dict, Iterator, List, Optional
 from langchain_core.documents import Document
+from src.core.cache.pdf_text_cache import LocalPdfTextCache
+from src.core.database.pdf_extract import _extract_pdf_file_pages, _get_pdf_parse_pool
 
 class LocalFileSystemDatabase:
-    
+
     def __init__(self):
-        pass
+        # Files being parsed / waiting for the consumer at the same time
+        self.max_in_flight = int(os.getenv("LOCAL_MAX_IN_FLIGHT", "16"))
+        self.file_timeout = float(os.getenv("LOCAL_FILE_TIMEOUT", "300"))
+
+        # Page text of unchanged files (same path, mtime and size) is not extracted again
+        self.text_cache = LocalPdfTextCache()
+
+        # Last listing of _iter_pdfs_local
+        self.listing = None
 
     def _load_pdfs_local(self, directory_path: str) -> List[Document]:
         """
-        Loads all PDF files from a specific local directory (recursive or flat).
+        Loads all PDF files from a local directory and its subdirectories.
+        Whole directory in memory, UpdateVectorDB consumes _iter_pdfs_local instead.
+        """
+        return list(self._iter_pdfs_local(directory_path=directory_path))
+
+
+    def _iter_pdfs_local(self, directory_path: str, known_versions: Optional[Dict[str, str]] = None) -> Iterator[Document]:
+        """
+        Yields the page documents of every PDF under directory_path (recursive), file after file.
+
+        Files are parsed in the PDF process pool (memory mapped, at most max_in_flight at a time) unless
+        the local text cache already has them. Files whose version matches known_versions
+        (source_id -> version) are skipped without being opened.
         """
-        docs_loaded = []
-        
+        self.listing = {"known_versions": known_versions, "listed_source_ids": set(), "skipped": 0}
+
         if not os.path.exists(directory_path):
             logging.error(f"Directory not found: {directory_path}")
-            return docs_loaded
-
-        # Find all PDFs in the directory
-        # Using glob for potential recursive search if needed, here just flat for simplicity 
-        # or use os.walk for recursive
-        pdf_files = glob.glob(os.path.join(directory_path, "*.pdf"))
-        
-        # If flat search yielded nothing, maybe try recursive? 
-        # Let's stick to flat for now unless requested.
-        
-        if not pdf_files:
+            return
+
+        pending = deque()
+        total_docs = 0
+
+        with _get_pdf_parse_pool() as parse_pool:
+            for file_path in self._walk_pdfs(directory_path):
+                try:
+                    file_stat = os.stat(file_path)
+                except OSError as e:
+                    logging.error(f"Error reading PDF {file_path}: {e}")
+                    continue
+
+                source_id = os.path.abspath(file_path)
+                source_version = f"{file_stat.st_mtime_ns}-{file_stat.st_size}"
+                self.listing["listed_source_ids"].add(source_id)
+
+                if known_versions and known_versions.get(source_id) == source_version:
+                    self.listing["skipped"] += 1
+                    continue
+
+                pages = self.text_cache._get(source_id, file_stat.st_mtime_ns, file_stat.st_size)
+                if pages is None:
+                    logging.info(f"--> Processing file: {file_path}")
+                    future = parse_pool.submit(_extract_pdf_file_pages, source_id)
+                else:
+                    future = None
+                pending.append((source_id, file_stat, pages, future))
+
+                # Backpressure: the walk waits while max_in_flight files are in the pool
+                while pending and (len(pending) >= self.max_in_flight or pending[0][3] is None or pending[0][3].done()):
+                    docs = self._get_file_docs(*pending.popleft())
+                    total_docs += len(docs)
+                    yield from docs
+
+            while pending:
+                docs = self._get_file_docs(*pending.popleft())
+                total_docs += len(docs)
+                yield from docs
+
+        if not self.listing["listed_source_ids"]:
             logging.warning(f"No PDF files found in directory: {directory_path}")
-            return docs_loaded
-            
-        logging.info(f"Found {len(pdf_files)} PDF files in {directory_path}")
-
-        for file_path in pdf_files:
-            try:
-                logging.info(f"--> Processing file: {file_path}")
-                
-                # Read PDF
-                with open(file_path, "rb") as f:
-                    pdf_reader = PdfReader(f)
-                    total_pages = len(pdf_reader.pages)
-                    name = os.path.basename(file_path)
-                    name_no_ext = os.path.splitext(name)[0]
-                    
-                    # For local files, the 'url' might be the file path itself 
-                    # or a file:// URI
-                    file_uri = f"file://{os.path.abspath(file_path)}"
-
-                    for i, page in enumerate(pdf_reader.pages):
-                        text_page = page.extract_text()
-                        if text_page:
-                            metadata = {
-                                "name": name_no_ext,
-                                "page_number": i + 1,
-                                "url": file_uri, 
-                                "total_pages": total_pages,
-                                "source_type": "local_filesystem"
-                            }
-                            
-                            doc = Document(page_content=text_page, metadata=metadata)
-                            docs_loaded.append(doc)
-                            
-            except Exception as e:
-                logging.error(f"Error parsing PDF {file_path}: {e}")
-                continue
-
-        logging.info(f"Total pages loaded from local directory: {len(docs_loaded)}")
-        return docs_loaded
+
+        logging.info(f"Total pages loaded from local directory: {total_docs} "
+                     f"({len(self.listing['listed_source_ids'])} files, {self.listing['skipped']} unchanged, "
+                     f"{self.text_cache.hits} from text cache)")
+
+
+    def _get_removed_source_ids(self) -> Optional[List[str]]:
+        """
+        After _iter_pdfs_local: None when every file was yielded (anything not yielded is gone),
+        otherwise the known sources that are no longer in the directory (unchanged files were not yielded).
+        """
+        if not self.listing or self.listing["known_versions"] is None:
+            return None
+        return [source_id for source_id in self.listing["known_versions"]
+                if source_id not in self.listing["listed_source_ids"]]
+
+
+    def _walk_pdfs(self, directory_path: str) -> Iterator[str]:
+        for root, dirs, files in os.walk(directory_path):
+            # Stable order between runs
+            dirs.sort()
+            for file_name in sorted(files):
+                if file_name.lower().endswith(".pdf"):
+                    yield os.path.join(root, file_name)
+
+
+    def _get_file_docs(self, file_path: str, file_stat: os.stat_result, pages: Optional[List[str]], future) -> List[Document]:
+        docs = []
+        try:
+            if pages is None:
+                content_hash, pages = future.result(timeout=self.file_timeout)
+                self.text_cache._set(file_path, file_stat.st_mtime_ns, file_stat.st_size, content_hash)
+
+        except Exception as e:
+            logging.error(f"Error parsing PDF {file_path}: {e}")
+            return docs
+
+        total_pages = len(pages)
+        name = os.path.basename(file_path)
+        name_no_ext = os.path.splitext(name)[0]
+
+        # For local files, the 'url' is a file:// URI
+        file_uri = f"file://{file_path}"
+
+        for i, text_page in enumerate(pages):
+            if text_page:
+                metadata = {
+                    "name": name_no_ext,
+                    "page_number": i + 1,
+                    "url": file_uri,
+                    "total_pages": total_pages,
+                    "source_type": "local_filesystem",
+                    "source_id": file_path,
+                    "source_version": f"{file_stat.st_mtime_ns}-{file_stat.st_size}"
+                }
+
+                doc = Document(page_content=text_page, metadata=metadata)
+                docs.append(doc)
+
+        return docs
@@ -0,0 +1,62 @@
+import io
+import os
+import mmap
+import multiprocessing
+from typing import List, Tuple
+from pypdf import PdfReader
+from concurrent.futures import ProcessPoolExecutor
+from src.core.cache.pdf_text_cache import PdfTextCache
+
+# Kept free of heavy imports: it is re-imported by every parser process
+
+
+def _extract_pdf_pages(pdf_bytes: bytes) -> List[str]:
+    """Text of every page of a PDF ("" for pages without text). Runs inside the parser processes."""
+    text_cache = PdfTextCache()
+    content_hash = text_cache._get_content_hash(pdf_bytes)
+
+    pages = text_cache._get(content_hash)
+    if pages is None:
+        pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
+        pages = [page.extract_text() or "" for page in pdf_reader.pages]
+        text_cache._set(content_hash, pages)
+
+    return pages
+
+
+def _extract_pdf_file_pages(file_path: str) -> Tuple[str, List[str]]:
+    """
+    Same as _extract_pdf_pages for a local file, memory mapped instead of read into a bytes copy.
+    Also returns the content hash, LocalPdfTextCache indexes the file by it.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Empty file: {file_path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            text_cache = PdfTextCache()
+            content_hash = text_cache._get_content_hash(mapped)
+
+            pages = text_cache._get(content_hash)
+            if pages is None:
+                pdf_reader = PdfReader(mapped)
+                pages = [page.extract_text() or "" for page in pdf_reader.pages]
+                text_cache._set(content_hash, pages)
+
+            return content_hash, pages
+
+
+def _get_pdf_parse_pool(max_workers: int = None) -> ProcessPoolExecutor:
+    """
+    Process pool for pypdf text extraction (CPU bound, the GIL would serialize it in threads).
+    "spawn" because the app process is multi-threaded (Streamlit, download threads).
+    """
+    max_workers = max_workers or int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 2)))
+    return ProcessPoolExecutor(max_workers=max_workers,
+                               mp_context=multiprocessing.get_context("spawn"))
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import queue
+import shutil
+import atexit
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Tuple
+from src.core.database.google_sheets_history import GoogleSheetsHistory
+
+SHEETS_LOG_SPOOL_DIR = Path("data/silver")
+
+# Sentinel that asks the worker to ship what it holds and exit
+_STOP = object()
+
+
+class SheetsLogShipper:
+    """
+    Ships the chat logs to Google Sheets in the background, off the request path.
+
+    _enqueue appends the row to a local JSONL spool and returns: a worker thread batches the rows and writes
+    them with a single values().append per batch, when SHEETS_LOG_BATCH_SIZE rows are waiting or the oldest
+    one waited SHEETS_LOG_FLUSH_SECONDS. Failed batches are retried with exponential backoff. The spool offset
+    is committed only after Sheets accepted the rows, so records survive restarts and Sheets outages;
+    shipped rows are cut from the head of the spool once they take SHEETS_LOG_SPOOL_COMPACT_BYTES. The spool is capped at SHEETS_LOG_SPOOL_MAX_BYTES
+    (rows beyond are dropped), and without Sheets credentials the shipper disables itself and stops spooling.
+    """
+
+    _instances: Dict[str, "SheetsLogShipper"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, spreadsheet_id: str, spool_dir: Path = None, sheets_history: GoogleSheetsHistory = None):
+        self.spreadsheet_id = spreadsheet_id
+
+        self.batch_size = int(os.getenv("SHEETS_LOG_BATCH_SIZE", "50"))
+        self.flush_seconds = float(os.getenv("SHEETS_LOG_FLUSH_SECONDS", "5"))
+        self.retry_base_seconds = float(os.getenv("SHEETS_LOG_RETRY_BASE_SECONDS", "5"))
+        self.retry_max_seconds = float(os.getenv("SHEETS_LOG_RETRY_MAX_SECONDS", "300"))
+        # Shipped spool bytes kept before they are cut from the spool
+        self.compact_bytes = int(os.getenv("SHEETS_LOG_SPOOL_COMPACT_BYTES", str(1024 * 1024)))
+        # Unshipped rows kept on disk during a long outage
+        self.max_spool_bytes = int(os.getenv("SHEETS_LOG_SPOOL_MAX_BYTES", str(50 * 1024 * 1024)))
+
+        spool_dir = Path(spool_dir) if spool_dir else SHEETS_LOG_SPOOL_DIR
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        self.spool_path = spool_dir / f"sheets_log_spool_{spreadsheet_id}.jsonl"
+        self.offset_path = spool_dir / f"sheets_log_spool_{spreadsheet_id}.offset"
+
+        # Credentials + discovery service are built once, by the worker
+        self.sheets_history = sheets_history
+
+        # (row, logical spool offset after the row), in spool order
+        self.queue: "queue.Queue" = queue.Queue()
+        # Serializes spool appends with the truncation
+        self.lock = threading.Lock()
+
+        # False once the worker found no Sheets service (no credentials): nothing is spooled anymore
+        self.enabled = True
+        # Queued offsets are logical (spool position + bytes already cut from the head), valid across compactions
+        self.spool_shift = 0
+        self.spool_bytes = 0
+
+        # Metrics
+        self.shipped = 0
+        self.failed_attempts = 0
+        self.dropped = 0
+
+        # Rows spooled by a previous process and never shipped go first
+        self._load_spool()
+
+        self.worker = threading.Thread(target=self._run, name="sheets-log-shipper", daemon=True)
+        self.worker.start()
+        atexit.register(self._stop)
+
+
+    @classmethod
+    def _get_instance(cls, spreadsheet_id: str) -> "SheetsLogShipper":
+        """One shipper (worker + spool) per spreadsheet and process."""
+        shipper = cls._instances.get(spreadsheet_id)
+        if shipper is None:
+            with cls._instances_lock:
+                shipper = cls._instances.get(spreadsheet_id)
+                if shipper is None:
+                    shipper = cls(spreadsheet_id)
+                    cls._instances[spreadsheet_id] = shipper
+        return shipper
+
+
+    def _enqueue(self, user_id: str, question: str, answer: str):
+        """Spools the log row and returns, the timestamp is the time of the question, not of the shipping."""
+        if not self.enabled:
+            return
+
+        row = [datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user_id, question, answer]
+        line = (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with self.lock:
+            if self.spool_bytes + len(line) > self.max_spool_bytes:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logging.warning(f"Sheets log spool {self.spool_path} is full ({self.spool_bytes} bytes), "
+                                    f"{self.dropped} logs dropped")
+                return
+
+            with self.spool_path.open("ab") as f:
+                f.write(line)
+                self.spool_bytes = f.tell()
+            end_offset = self.spool_bytes + self.spool_shift
+
+        self.queue.put((row, end_offset))
+
+
+#region Worker
+    def _run(self):
+        batch: List[Tuple[list, int]] = []
+        first_at, retry_at, failures = 0.0, 0.0, 0
+
+        while True:
+            if batch:
+                wait = max(0.0, max(first_at + self.flush_seconds, retry_at) - time.monotonic())
+            else:
+                wait = None
+
+            try:
+                item = self.queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                # Last attempt, whatever is not shipped stays in the spool for the next start
+                while batch and self._ship(batch[:self.batch_size]):
+                    batch = batch[self.batch_size:]
+                return
+
+            if item is not None:
+                if not batch:
+                    first_at = time.monotonic()
+                batch.append(item)
+
+            now = time.monotonic()
+            if not batch or now < retry_at:
+                continue
+            if len(batch) < self.batch_size and now - first_at < self.flush_seconds:
+                continue
+
+            if self._ship(batch[:self.batch_size]):
+                batch = batch[self.batch_size:]
+                first_at, retry_at, failures = now, 0.0, 0
+            elif not self.enabled:
+                # No credentials: retrying cannot help, the spooled rows wait for a start with credentials
+                return
+            else:
+                failures += 1
+                self.failed_attempts += 1
+                backoff = min(self.retry_base_seconds * 2 ** (failures - 1), self.retry_max_seconds)
+                retry_at = now + backoff
+                logging.warning(f"Sheets log shipping failed ({len(batch)} rows waiting), retrying in {backoff:.0f}s")
+
+
+    def _ship(self, batch: List[Tuple[list, int]]) -> bool:
+        if self.sheets_history is None:
+            try:
+                self.sheets_history = GoogleSheetsHistory()
+            except Exception as e:
+                logging.error(f"Error loading Google Sheets credentials: {e}")
+
+        if self.sheets_history is None or getattr(self.sheets_history, "service", True) is None:
+            # Credentials are local config, a missing service does not come back by retrying
+            logging.error(f"Google Sheets service not available, chat logs are not shipped to {self.spreadsheet_id}")
+            self.enabled = False
+            return False
+
+        try:
+            if not self.sheets_history.append_rows(self.spreadsheet_id, [row for row, _ in batch]):
+                return False
+
+        except Exception as e:
+            logging.error(f"Error shipping logs to Google Sheets: {e}")
+            return False
+
+        self.shipped += len(batch)
+        try:
+            self._commit_offset(batch[-1][1])
+        except Exception as e:
+            # Shipped anyway: at worst these rows are shipped again after a restart
+            logging.error(f"Error committing the Sheets log spool offset: {e}")
+        return True
+
+
+    def _stop(self, timeout: float = 10):
+        if self.worker.is_alive():
+            self.queue.put(_STOP)
+            self.worker.join(timeout=timeout)
+#endregion
+
+
+#region Spool
+    def _commit_offset(self, offset: int):
+        """Rows up to (logical) offset are in Sheets. Past compact_bytes they are cut from the spool."""
+        with self.lock:
+            offset -= self.spool_shift
+            if offset < self.compact_bytes:
+                self._write_offset(offset)
+                return
+
+            # Unshipped tail moved to a new spool. Offset 0 is written first: a crash in between
+            # ships some rows twice instead of skipping any
+            tmp_path = self.spool_path.with_name(f"{self.spool_path.name}.tmp")
+            with self.spool_path.open("rb") as src, tmp_path.open("wb") as dst:
+                src.seek(offset)
+                shutil.copyfileobj(src, dst)
+            self._write_offset(0)
+            os.replace(tmp_path, self.spool_path)
+
+            self.spool_shift += offset
+            self.spool_bytes -= offset
+
+
+    def _write_offset(self, offset: int):
+        tmp_path = self.offset_path.with_suffix(".tmp")
+        tmp_path.write_text(str(offset), encoding="utf-8")
+        os.replace(tmp_path, self.offset_path)
+
+
+    def _load_spool(self):
+        if not self.spool_path.exists():
+            return
+
+        offset = int(self.offset_path.read_text(encoding="utf-8") or 0) if self.offset_path.exists() else 0
+        if offset > self.spool_path.stat().st_size:
+            # Spool cut by hand or lost: nothing to skip
+            offset = 0
+        pending = 0
+
+        with self.lock, self.spool_path.open("r+b") as f:
+            f.seek(offset)
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    # Row cut by a crash mid-write, dropped so the next appends start on a clean line
+                    f.truncate(f.tell() - len(line))
+                    break
+                try:
+                    self.queue.put((json.loads(line), f.tell()))
+                    pending += 1
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping corrupted line in {self.spool_path}")
+
+            self.spool_bytes = f.seek(0, os.SEEK_END)
+
+        if pending:
+            logging.info(f"{pending} spooled Sheets logs from a previous run will be shipped")
+#endregion
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
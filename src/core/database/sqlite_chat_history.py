@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from src.core.database.json_chat_history import CHAT_HISTORY_FILE
+
+SQLITE_CHAT_HISTORY_FILE = Path("data/silver/chat_history.sqlite")
+
+
+class SqliteChatHistory:
+    """
+    Historial de chat en SQLite (WAL), misma interfaz que JsonChatHistory.
+    One row per message/response indexed by (user_id, created_at): an append is a single insert,
+    get_last_responses reads only the rows it returns, and WAL lets concurrent sessions / processes
+    write without losing each other's messages. The old JSON file is imported once and renamed.
+    """
+
+    def __init__(self, file_path: Optional[Path] = None, json_file_path: Optional[Path] = None) -> None:
+        self.file_path = Path(file_path) if file_path else SQLITE_CHAT_HISTORY_FILE
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS chat_history (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, "
+                         "created_at REAL NOT NULL, message TEXT, response TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS chat_history_user ON chat_history (user_id, created_at, id)")
+
+        self._migrate_json(Path(json_file_path) if json_file_path else CHAT_HISTORY_FILE)
+
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.file_path, timeout=30)
+        try:
+            # WAL + NORMAL: a commit is durable against process crashes without an fsync per message
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+    def add_responses(self, user_id: str, message: str, response: str) -> None:
+        """Agrega un par mensaje-respuesta para un usuario."""
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT INTO chat_history (user_id, created_at, message, response) VALUES (?, ?, ?, ?)",
+                             (user_id, time.time(), message, response))
+
+        except Exception as e:
+            logging.error(f"Error saving chat history: {e}")
+            raise
+
+
+    def get_last_responses(self, user_id: str, n: int) -> List[Dict[str, Any]]:
+        """Regresa las últimas n respuestas de un usuario (ordenadas del más reciente al más antiguo)."""
+        if n <= 0:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute("SELECT message, response FROM chat_history WHERE user_id = ? "
+                                "ORDER BY created_at DESC, id DESC LIMIT ?", (user_id, n)).fetchall()
+        return [{"message": message, "response": response} for message, response in rows]
+
+
+    def delete_last_responses(self, user_id: str, n: int) -> int:
+        """Elimina las últimas n respuestas de un usuario y regresa cuántas se eliminaron."""
+        if n <= 0:
+            return 0
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM chat_history WHERE id IN (SELECT id FROM chat_history WHERE user_id = ? "
+                                  "ORDER BY created_at DESC, id DESC LIMIT ?)", (user_id, n))
+        return cursor.rowcount
+
+
+    def _migrate_json(self, json_file_path: Path) -> None:
+        """One-shot import of the JSON history (oldest first), the file is then renamed to *.migrated."""
+        if not json_file_path.exists():
+            return
+
+        try:
+            with json_file_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            logging.warning(f"Corrupted chat history {json_file_path}, not migrated")
+            return
+
+        # The JSON file has no timestamps: entries keep their order, all before the first new message
+        created_at = os.path.getmtime(json_file_path)
+        rows = [(user_id, created_at, item.get("message"), item.get("response"))
+                for user_id, history in data.items() for item in history]
+
+        try:
+            with self._connect() as conn:
+                # Another process may be migrating the same file, the rename below happens only once
+                conn.execute("BEGIN IMMEDIATE")
+                if not json_file_path.exists():
+                    return
+                conn.executemany("INSERT INTO chat_history (user_id, created_at, message, response) VALUES (?, ?, ?, ?)", rows)
+                json_file_path.rename(json_file_path.with_name(json_file_path.name + ".migrated"))
+
+            logging.info(f"Chat history migrated from {json_file_path}: {len(rows)} messages of {len(data)} users")
+
+        except Exception as e:
+            logging.error(f"Error migrating chat history from {json_file_path}: {e}")
+            raise
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
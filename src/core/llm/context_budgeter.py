@@ -0,0 +1,122 @@
+import os
+import re
+import math
+from typing import Dict, List, Tuple
+from langchain_core.documents import Document
+from src.core.vector_db.vdb_bm25 import _tokenize
+from src.core.vector_db.vdb_chunker import SENTENCE_END_PATTERN, _get_encoding, _count_tokens
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class ContextBudgeter:
+    """
+    Builds the document context of the NodeChat prompt within a token budget.
+
+    Chunks are cut into sentences (in retrieval order) and sentences already seen are dropped, which removes
+    duplicated chunks and the overlap between neighbouring chunks. When the rest still exceeds budget_tokens,
+    the sentences most relevant to the question (idf weighted overlap, better ranked chunks first on ties)
+    are kept and written back in document order; " … " marks the text left out.
+    """
+
+    def __init__(self, budget_tokens: int = None, model: str = "gpt-4o"):
+        self.budget_tokens = budget_tokens or int(os.getenv("CHAT_CONTEXT_BUDGET_TOKENS", "1500"))
+        self.encoding = _get_encoding(model)
+
+
+    def _count_tokens(self, text: str) -> int:
+        return _count_tokens(self.encoding, text)
+
+
+    def _build_context(self, question: str, docs: List[Document]) -> Tuple[str, Dict[str, int]]:
+        """Context text for the prompt and its token counts (before / after dedup / final)."""
+        units = self._get_units(docs)
+        tokens_in = sum(self._count_tokens(doc.page_content) for doc in docs)
+
+        # Sentence level dedup: repeated chunks and chunk overlap appear only once
+        seen, unique_units = set(), []
+        for unit in units:
+            key = WHITESPACE_PATTERN.sub(" ", unit["text"].lower()).strip()
+            if key in seen:
+                continue
+            seen.add(key)
+            unit["tokens"] = self._count_tokens(unit["text"])
+            # Renumbered so only sentences left out by the budget show as a gap
+            unit["position"] = len(unique_units)
+            unique_units.append(unit)
+
+        tokens_deduped = sum(unit["tokens"] for unit in unique_units)
+        if tokens_deduped <= self.budget_tokens:
+            selected = unique_units
+        else:
+            selected = self._select_units(question, unique_units)
+
+        context = self._join_units(selected)
+        stats = {
+            "context_chunks": len(docs),
+            "context_tokens_in": tokens_in,
+            "context_tokens_deduped": tokens_deduped,
+            "context_tokens": self._count_tokens(context),
+            "context_sentences_dropped": len(units) - len(selected),
+            "context_budget_tokens": self.budget_tokens,
+        }
+        return context, stats
+
+
+    def _get_units(self, docs: List[Document]) -> List[Dict]:
+        """Sentences of every chunk, with their position (chunk rank, line, order) to rebuild the text."""
+        units = []
+        for rank, doc in enumerate(docs):
+            for line_number, line in enumerate((doc.page_content or "").splitlines()):
+                for sentence in SENTENCE_END_PATTERN.split(line.strip()):
+                    if sentence:
+                        units.append({"rank": rank, "line": line_number, "position": len(units), "text": sentence})
+        return units
+
+
+    def _select_units(self, question: str, units: List[Dict]) -> List[Dict]:
+        """Most relevant sentences that fit in the budget, back in document order."""
+        question_terms = set(_tokenize(question))
+        unit_terms = [set(_tokenize(unit["text"])) for unit in units]
+
+        idf = {term: math.log(1 + (len(units) + 1) / (1 + sum(term in terms for terms in unit_terms)))
+               for term in question_terms}
+        total_idf = sum(idf.values()) or 1.0
+
+        def score(index: int) -> Tuple[float, float]:
+            relevance = sum(idf[term] for term in question_terms & unit_terms[index]) / total_idf
+            # Ties (e.g. no question term at all) go to the better ranked chunk, then to the earlier sentence
+            return relevance, -units[index]["position"]
+
+        selected, used_tokens = [], 0
+        for index in sorted(range(len(units)), key=score, reverse=True):
+            if used_tokens + units[index]["tokens"] > self.budget_tokens:
+                continue
+            selected.append(units[index])
+            used_tokens += units[index]["tokens"]
+
+        return sorted(selected, key=lambda unit: unit["position"])
+
+
+    def _join_units(self, units: List[Dict]) -> str:
+        parts, previous = [], None
+        for unit in units:
+            if previous is not None:
+                if unit["rank"] != previous["rank"]:
+                    parts.append("\n")
+                elif unit["position"] != previous["position"] + 1:
+                    parts.append(" … ")
+                elif unit["line"] != previous["line"]:
+                    parts.append("\n")
+                else:
+                    parts.append(" ")
+            parts.append(unit["text"])
+            previous = unit
+        return "".join(parts)
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
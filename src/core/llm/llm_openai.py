@@ -1,27 +1,115 @@
 import os
+import httpx
+import threading
 from dotenv import load_dotenv
-from openai import OpenAI
-from typing import Any
+from openai import OpenAI, AsyncOpenAI
+from typing import Any, AsyncIterator, Dict, Optional
 from langchain_openai import OpenAIEmbeddings
+from src.core.cache.embedding_cache import CachedEmbeddings, EmbeddingCacheDiskStore
 from src.graph.state.graph_state import ChatResponseGeneric
 
 load_dotenv()
 
+# Output size of the OpenAI embedding models, for stores that declare it up front (Azure AI Search)
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def _get_embedding_dimensions(model: str) -> int:
+    """Known models from EMBEDDING_DIMENSIONS, OPENAI_EMBEDDING_DIMENSIONS for any other one."""
+    dimensions = os.getenv("OPENAI_EMBEDDING_DIMENSIONS") or EMBEDDING_DIMENSIONS.get(model)
+    if not dimensions:
+        raise ValueError(f"Unknown dimensions of embedding model '{model}', set OPENAI_EMBEDDING_DIMENSIONS")
+    return int(dimensions)
+
+
 class LLMOpenAI:
+    """
+    OpenAI chat and embedding access.
+    Clients and their keep-alive HTTP pools are shared by every LLMOpenAI instance of the
+    process (all nodes and UpdateVectorDB), so connections and TLS sessions are reused
+    between turns instead of being rebuilt on each request.
+    """
+
+    # Process-wide clients, keyed by (kind, api_key, ...). Reentrant: factories build nested shared clients
+    _shared_clients = {}
+    _shared_clients_lock = threading.RLock()
+
+    # Process-wide token usage of the chat calls (prompt cache hit rate)
+    _usage_totals = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+    _usage_lock = threading.Lock()
 
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.chat_model = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o")
         self.embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 
+        # Connection pool limits and timeouts
+        self.http_max_connections = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "100"))
+        self.http_max_keepalive_connections = int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.http_keepalive_expiry = float(os.getenv("OPENAI_HTTP_KEEPALIVE_EXPIRY", "120"))
+        self.http_timeout = float(os.getenv("OPENAI_HTTP_TIMEOUT", "60"))
+        self.http_connect_timeout = float(os.getenv("OPENAI_HTTP_CONNECT_TIMEOUT", "10"))
+        self.max_retries = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+        # Embedding cache (in memory LRU + optional local SQLite store)
+        self.embedding_cache_disk = os.getenv("EMBEDDING_CACHE_DISK", "true").lower() == "true"
+
+        self.client = None
+        self.async_client = None
         self.embeddings = None
 
 
+#region HTTP pool
+    def _get_shared_client(self, key: tuple, factory):
+        client = self._shared_clients.get(key)
+        if client is None:
+            with self._shared_clients_lock:
+                client = self._shared_clients.get(key)
+                if client is None:
+                    client = factory()
+                    self._shared_clients[key] = client
+        return client
+
+
+    def _get_http_limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.http_max_connections,
+                            max_keepalive_connections=self.http_max_keepalive_connections,
+                            keepalive_expiry=self.http_keepalive_expiry)
+
+
+    def _get_http_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.http_timeout, connect=self.http_connect_timeout)
+
+
+    def _get_http_client(self) -> httpx.Client:
+        # httpx.Client is thread safe, one pool for the whole process
+        return self._get_shared_client(("http", ),
+                                       lambda: httpx.Client(limits=self._get_http_limits(),
+                                                            timeout=self._get_http_timeout()))
+
+
+    def _get_async_http_client(self) -> httpx.AsyncClient:
+        # Bound to the event loop where it is first used (the GraphRuntime loop)
+        return self._get_shared_client(("http_async", ),
+                                       lambda: httpx.AsyncClient(limits=self._get_http_limits(),
+                                                                 timeout=self._get_http_timeout()))
+#endregion
+
+
 #region Chat
     def _init_chat_client(self):
         try:
-            client: OpenAI = OpenAI(
-                api_key=self.api_key
+            client: OpenAI = self._get_shared_client(
+                ("chat", self.api_key),
+                lambda: OpenAI(
+                    api_key=self.api_key,
+                    http_client=self._get_http_client(),
+                    max_retries=self.max_retries
+                )
             )
 
         except Exception as e:
@@ -32,7 +120,8 @@ class LLMOpenAI:
 
 
     def _get_chat_client(self):
-        self._init_chat_client()
+        if self.client is None:
+            self._init_chat_client()
         return self.client
 
 
@@ -67,13 +156,15 @@ class LLMOpenAI:
             raise
 
         # return response.choices[0].message.content
-        return response.output_parsed
+        return response.choices[0].message.parsed
     
     
-    def _get_chat_response_instructions(self, max_tokens: int = 4096, temperature: float = 0.0, instructions_message: str = "", input_message: str = "", text_format: Any = ChatResponseGeneric):
+    def _get_chat_response_instructions(self, max_tokens: int = 4096, temperature: float = 0.0, instructions_message: str = "", input_message: str = "", text_format: Any = ChatResponseGeneric,
+                                        prompt_cache_key: Optional[str] = None, metrics: Optional[Dict[str, int]] = None):
         try:
             client = self._get_chat_client()
 
+            # Static instructions first, byte-identical between requests: OpenAI reuses the cached prefix
             response = client.beta.chat.completions.parse(
                 messages=[
                     {"role": "system", "content": instructions_message},
@@ -82,35 +173,175 @@ class LLMOpenAI:
                 max_tokens=max_tokens,
                 temperature=temperature,
                 model=self.chat_model,
-                response_format=text_format
+                response_format=text_format,
+                **self._get_cache_kwargs(prompt_cache_key)
             )
+            self._record_usage(response.usage, metrics)
 
         except Exception as e:
             print(f"Error getting chat response: {e}")
             raise
 
         # return response.choices[0].message.content
-        return response.output_parsed
+        return response.choices[0].message.parsed
+#endregion
+
+
+#region Async Chat
+    def _init_async_chat_client(self):
+        try:
+            async_client: AsyncOpenAI = self._get_shared_client(
+                ("chat_async", self.api_key),
+                lambda: AsyncOpenAI(
+                    api_key=self.api_key,
+                    http_client=self._get_async_http_client(),
+                    max_retries=self.max_retries
+                )
+            )
+
+        except Exception as e:
+            print(f"Error initializing AsyncOpenAI client: {e}")
+            raise
+
+        self.async_client = async_client
+
+
+    def _get_async_chat_client(self):
+        if self.async_client is None:
+            self._init_async_chat_client()
+        return self.async_client
+
+
+    async def _aget_chat_response_instructions(self, max_tokens: int = 4096, temperature: float = 0.0, instructions_message: str = "", input_message: str = "", text_format: Any = ChatResponseGeneric,
+                                               prompt_cache_key: Optional[str] = None, metrics: Optional[Dict[str, int]] = None):
+        try:
+            client = self._get_async_chat_client()
+
+            response = await client.beta.chat.completions.parse(
+                messages=[
+                    {"role": "system", "content": instructions_message},
+                    {"role": "user", "content": input_message}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                model=self.chat_model,
+                response_format=text_format,
+                **self._get_cache_kwargs(prompt_cache_key)
+            )
+            self._record_usage(response.usage, metrics)
+
+        except Exception as e:
+            print(f"Error getting async chat response: {e}")
+            raise
+
+        return response.choices[0].message.parsed
+
+
+    async def _astream_chat_response_instructions(self, max_tokens: int = 4096, temperature: float = 0.0, instructions_message: str = "", input_message: str = "",
+                                                  prompt_cache_key: Optional[str] = None, metrics: Optional[Dict[str, int]] = None) -> AsyncIterator[str]:
+        """
+        Yields the answer tokens as they are generated.
+        Plain text instead of structured output: ChatResponseGeneric only wraps a string,
+        and JSON mode would stream the wrapper too.
+        """
+        try:
+            client = self._get_async_chat_client()
+
+            stream = await client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": instructions_message},
+                    {"role": "user", "content": input_message}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                model=self.chat_model,
+                stream=True,
+                # Last chunk carries the token usage (cached tokens included)
+                stream_options={"include_usage": True},
+                **self._get_cache_kwargs(prompt_cache_key)
+            )
+
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage is not None:
+                    self._record_usage(chunk.usage, metrics)
+
+        except Exception as e:
+            print(f"Error streaming chat response: {e}")
+            raise
+#endregion
+
+
+#region Usage
+    def _get_cache_kwargs(self, prompt_cache_key: Optional[str]) -> dict:
+        # Requests sharing a key are routed to the same prompt cache
+        return {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else {}
+
+
+    def _record_usage(self, usage, metrics: Optional[Dict[str, int]] = None):
+        """Token usage of one chat call into metrics (prompt / cached / completion tokens) and the process totals."""
+        if usage is None:
+            return
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+
+        if metrics is not None:
+            metrics["prompt_tokens"] = usage.prompt_tokens
+            metrics["cached_tokens"] = cached_tokens
+            metrics["completion_tokens"] = usage.completion_tokens
+
+        with self._usage_lock:
+            self._usage_totals["requests"] += 1
+            self._usage_totals["prompt_tokens"] += usage.prompt_tokens
+            self._usage_totals["cached_tokens"] += cached_tokens
+            self._usage_totals["completion_tokens"] += usage.completion_tokens
+
+
+    @classmethod
+    def _get_usage_stats(cls) -> dict:
+        with cls._usage_lock:
+            totals = dict(cls._usage_totals)
+        totals["cached_fraction"] = totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0
+        return totals
 #endregion
 
 
 #region Embeddings
     def _init_embedding(self):
         try:
-            embeddings: OpenAIEmbeddings = OpenAIEmbeddings(
-                api_key=self.api_key,
-                model=self.embedding_model,
+            embeddings: OpenAIEmbeddings = self._get_shared_client(
+                ("embedding", self.api_key, self.embedding_model),
+                lambda: OpenAIEmbeddings(
+                    api_key=self.api_key,
+                    model=self.embedding_model,
+                    http_client=self._get_http_client(),
+                    http_async_client=self._get_async_http_client(),
+                    max_retries=self.max_retries
+                )
+            )
+
+            # Same cache for queries (NodeRetrieve, semantic cache) and chunks (UpdateVectorDB)
+            cached_embeddings: CachedEmbeddings = self._get_shared_client(
+                ("embedding_cache", self.api_key, self.embedding_model),
+                lambda: CachedEmbeddings(
+                    embeddings=embeddings,
+                    model=self.embedding_model,
+                    disk_store=EmbeddingCacheDiskStore() if self.embedding_cache_disk else None
+                )
             )
 
         except Exception as e:
             print(f"Error initializing AzureOpenAIEmbeddings: {e}")
             raise
 
-        self.embeddings = embeddings
+        self.embeddings = cached_embeddings
 
   
     def _get_embedding(self):
-        self._init_embedding()
+        if self.embeddings is None:
+            self._init_embedding()
         return self.embeddings
 #endregion
 
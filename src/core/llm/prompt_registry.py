@@ -0,0 +1,130 @@
+import os
+import time
+import string
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+# Relative to this module, not to the working directory
+PROMPTS_DIR = Path(__file__).resolve().parents[2] / "prompts"
+
+# Prompt name -> placeholders it must contain. System prompts have none: they are sent byte-identical
+# on every request so OpenAI can reuse the cached prefix; everything per-request goes in the input templates.
+PROMPT_SPECS: Dict[str, Tuple[str, ...]] = {
+    "node_router": (),
+    "node_router_input": ("question",),
+    "node_chat_kinestesico": (),
+    "node_chat_visual": (),
+    "node_chat_input": ("context", "question"),
+}
+
+
+class PromptRegistry:
+    """
+    Prompt templates of the graph, loaded and validated once per process and served from memory.
+    Every PROMPT_RELOAD_SECONDS the file mtimes are checked and changed prompts are reloaded (hot reload);
+    a prompt that no longer validates keeps its previous version. Content is normalized (newlines, surrounding
+    whitespace) so the same file always gives the same bytes.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, prompts_dir: Path = None, specs: Dict[str, Tuple[str, ...]] = None):
+        self.prompts_dir = Path(prompts_dir) if prompts_dir else PROMPTS_DIR
+        self.specs = specs or PROMPT_SPECS
+        self.reload_seconds = float(os.getenv("PROMPT_RELOAD_SECONDS", "2"))
+
+        self.lock = threading.Lock()
+        # name -> (mtime, text, cache key)
+        self.prompts: Dict[str, Tuple[float, str, str]] = {}
+        self.last_check = 0.0
+
+        # Startup: every prompt must exist and be valid
+        for name in self.specs:
+            self.prompts[name] = self._load(name)
+        self.last_check = time.monotonic()
+
+
+    @classmethod
+    def _get_instance(cls) -> "PromptRegistry":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    try:
+                        cls._instance = cls()
+                        logging.info(f"Prompt registry loaded: {sorted(cls._instance.prompts)}")
+                    except Exception as e:
+                        logging.error(f"Error loading prompt registry: {e}")
+                        raise
+
+        return cls._instance
+
+
+    def _get_path(self, name: str) -> Path:
+        return self.prompts_dir / f"{name}.txt"
+
+
+    def _load(self, name: str) -> Tuple[float, str, str]:
+        file_path = self._get_path(name)
+        mtime = file_path.stat().st_mtime
+        text = file_path.read_text(encoding="utf-8").replace("\r\n", "\n").strip()
+
+        self._validate(name, text)
+        cache_key = f"{name}-{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+        return mtime, text, cache_key
+
+
+    def _validate(self, name: str, text: str):
+        if not text:
+            raise ValueError(f"Prompt '{name}' is empty")
+
+        placeholders = {field for _, field, _, _ in string.Formatter().parse(text) if field is not None}
+        expected = set(self.specs[name])
+        if placeholders != expected:
+            raise ValueError(f"Prompt '{name}' has placeholders {sorted(placeholders)}, expected {sorted(expected)}")
+
+
+    def _reload_changed(self):
+        now = time.monotonic()
+        if self.reload_seconds <= 0 or now - self.last_check < self.reload_seconds:
+            return
+
+        with self.lock:
+            if now - self.last_check < self.reload_seconds:
+                return
+            self.last_check = now
+
+            for name, (mtime, _, _) in list(self.prompts.items()):
+                try:
+                    if self._get_path(name).stat().st_mtime == mtime:
+                        continue
+                    self.prompts[name] = self._load(name)
+                    logging.info(f"Prompt '{name}' reloaded")
+
+                except Exception as e:
+                    logging.error(f"Error reloading prompt '{name}', keeping the previous version: {e}")
+
+
+    def _get(self, name: str) -> str:
+        self._reload_changed()
+        return self.prompts[name][1]
+
+
+    def _get_cache_key(self, name: str) -> str:
+        """Stable id of the current version of a prompt, sent as prompt_cache_key to route to the same cache."""
+        self._reload_changed()
+        return self.prompts[name][2]
+
+
+    def _format(self, name: str, **values) -> str:
+        return self._get(name).format(**values)
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
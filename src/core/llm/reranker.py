@@ -0,0 +1,145 @@
+import os
+import math
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from langchain_core.documents import Document
+from src.core.vector_db.vdb_bm25 import _tokenize, _get_doc_key, _reciprocal_rank_fusion
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+
+class Reranker:
+    """
+    Second stage of retrieval for NodeRerank: scores (question, chunk) pairs on the local CPU.
+
+    RERANK_MODEL="lexical" (default) uses a lightweight scorer: idf weighted coverage of the question terms
+    plus a bonus for question bigrams found in order. Its order is fused (RRF) with the incoming retrieval order,
+    weighted by RERANK_RETRIEVAL_WEIGHT / RERANK_LEXICAL_WEIGHT: hybrid retrieval already used BM25, so lexical
+    evidence alone must not push the best semantic hits out of the top_n. Any other value is a
+    sentence-transformers cross-encoder (e.g. "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1", multilingual),
+    loaded once and run in batches; without sentence-transformers installed it falls back to lexical.
+    Cross-encoder scores are cached per (model, question, chunk) in an in memory LRU (lexical scores depend
+    on the whole candidate set and cost microseconds, they are not cached).
+    """
+
+    def __init__(self, model_name: str = None):
+        self.model_name = model_name or os.getenv("RERANK_MODEL", "lexical")
+        self.batch_size = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+        self.max_entries = int(os.getenv("RERANK_CACHE_MAX_ENTRIES", "20000"))
+        # Lexical scorer only: weights of the retrieval / lexical orders in the fusion
+        self.retrieval_weight = float(os.getenv("RERANK_RETRIEVAL_WEIGHT", "1.0"))
+        self.lexical_weight = float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.5"))
+        self.rrf_k = int(os.getenv("RERANK_RRF_K", "60"))
+
+        if self.model_name != "lexical" and CrossEncoder is None:
+            logging.warning(f"sentence-transformers not installed, reranking with the lexical scorer instead of {self.model_name}")
+            self.model_name = "lexical"
+
+        self.model = None
+        self.lock = threading.Lock()
+        self.cache: "OrderedDict[str, float]" = OrderedDict()
+
+        # Metrics
+        self.cache_hits = 0
+        self.scored_pairs = 0
+
+
+    def _load(self):
+        """Loads the cross-encoder once (first query or warm up), nothing to load for the lexical scorer."""
+        if self.model_name == "lexical" or self.model is not None:
+            return
+
+        with self.lock:
+            if self.model is None:
+                try:
+                    self.model = CrossEncoder(self.model_name, device="cpu")
+                except Exception as e:
+                    logging.error(f"Error loading rerank model {self.model_name}: {e}")
+                    raise
+
+
+    def _rerank(self, question: str, docs: List[Document], top_n: int) -> List[Tuple[Document, float]]:
+        """Best top_n docs for question, highest score first."""
+        if not docs:
+            return []
+
+        if self.model_name == "lexical":
+            scores = self._score_lexical(question, docs)
+            self.scored_pairs += len(docs)
+            # Stable sort: equal lexical scores keep the retrieval order; no question term at all, no lexical rank
+            lexical_order = [doc for doc, score in sorted(zip(docs, scores), key=lambda item: item[1], reverse=True)
+                             if score > 0]
+            return _reciprocal_rank_fusion([docs, lexical_order], [self.retrieval_weight, self.lexical_weight],
+                                           rrf_k=self.rrf_k)[:top_n]
+
+        question_key = hashlib.sha1(f"{self.model_name}\x00{question}".encode("utf-8")).hexdigest()
+        keys = [f"{question_key}:{_get_doc_key(doc)}" for doc in docs]
+
+        with self.lock:
+            scores = [self.cache.get(key) for key in keys]
+        missing = [position for position, score in enumerate(scores) if score is None]
+        self.cache_hits += len(docs) - len(missing)
+
+        if missing:
+            new_scores = self._score_cross_encoder(question, [docs[position] for position in missing])
+            self.scored_pairs += len(missing)
+
+            with self.lock:
+                for position, score in zip(missing, new_scores):
+                    scores[position] = score
+                    self.cache[keys[position]] = score
+                    self.cache.move_to_end(keys[position])
+                while len(self.cache) > self.max_entries:
+                    self.cache.popitem(last=False)
+
+        return sorted(zip(docs, scores), key=lambda item: item[1], reverse=True)[:top_n]
+
+
+    def _score_cross_encoder(self, question: str, docs: List[Document]) -> List[float]:
+        self._load()
+        pairs = [(question, doc.page_content) for doc in docs]
+        return [float(score) for score in self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)]
+
+
+    def _score_lexical(self, question: str, docs: List[Document]) -> List[float]:
+        question_terms = list(dict.fromkeys(_tokenize(question)))
+        if not question_terms:
+            return [0.0] * len(docs)
+
+        doc_tokens = [_tokenize(doc.page_content) for doc in docs]
+        doc_terms = [set(tokens) for tokens in doc_tokens]
+
+        # idf over the candidates: terms found in every candidate do not tell them apart
+        idf = {term: math.log(1 + (len(docs) + 1) / (1 + sum(term in terms for terms in doc_terms)))
+               for term in question_terms}
+        total_idf = sum(idf.values())
+        question_bigrams = set(zip(question_terms, question_terms[1:]))
+
+        scores = []
+        for tokens, terms in zip(doc_tokens, doc_terms):
+            coverage = sum(idf[term] for term in question_terms if term in terms) / total_idf
+            bigrams = len(question_bigrams & set(zip(tokens, tokens[1:]))) / len(question_bigrams) if question_bigrams else 0.0
+            scores.append(coverage + 0.5 * bigrams)
+        return scores
+
+
+    def _get_stats(self) -> Dict[str, float]:
+        total = self.cache_hits + self.scored_pairs
+        return {
+            "model": self.model_name,
+            "scored_pairs": self.scored_pairs,
+            "cache_hit_rate": self.cache_hits / total if total else 0.0,
+        }
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import logging
+import threading
+import numpy as np
+from typing import List, Optional
+from src.core.llm.llm_openai import LLMOpenAI
+from src.core.llm.prompt_registry import PROMPTS_DIR
+
+ROUTER_EXEMPLARS_FILE = str(PROMPTS_DIR / "node_router_exemplars.json")
+
+class RouterClassifier:
+    """
+    Local fast path for NodeRouter.
+    Compares the question embedding against labeled exemplars (educational = True / not = False).
+    Returns the route when one side clearly wins, None when uncertain so the LLM router decides.
+    """
+
+    def __init__(self, exemplars_path: str = ROUTER_EXEMPLARS_FILE, top_k: int = 3):
+        self.exemplars_path = exemplars_path
+        self.top_k = top_k
+        self.margin = float(os.getenv("ROUTER_FAST_PATH_MARGIN", "0.1"))
+        self.min_similarity = float(os.getenv("ROUTER_FAST_PATH_MIN_SIMILARITY", "0.45"))
+
+        self.llmOpenAI = LLMOpenAI()
+        self.embeddingOpenAI = self.llmOpenAI._get_embedding()
+
+        self.exemplars_true = None
+        self.exemplars_false = None
+        self.lock = threading.Lock()
+
+        # Metrics, updated from concurrent sessions
+        self.stats_lock = threading.Lock()
+        self.local_decisions = 0
+        self.llm_decisions = 0
+        self.local_seconds = 0.0
+        self.llm_seconds = 0.0
+        # Local classification of the questions that still went to the LLM: pure overhead
+        self.uncertain_seconds = 0.0
+        # Question embeddings computed only for the fast path (not already in the state)
+        self.embedding_seconds = 0.0
+
+
+    def _load(self):
+        if self.exemplars_true is not None:
+            return
+
+        with self.lock:
+            if self.exemplars_true is not None:
+                return
+
+            try:
+                with open(self.exemplars_path, "r", encoding="utf-8") as f:
+                    exemplars = json.load(f)
+
+                # Embedded once per process (and cached on disk by CachedEmbeddings)
+                self.exemplars_false = self._to_matrix(self.embeddingOpenAI.embed_documents(exemplars["false"]))
+                self.exemplars_true = self._to_matrix(self.embeddingOpenAI.embed_documents(exemplars["true"]))
+
+            except Exception as e:
+                logging.error(f"Error loading router exemplars: {e}")
+                raise
+
+
+    def _to_matrix(self, embeddings: List[List[float]]) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+    def _classify(self, question_embedding: List[float]) -> Optional[bool]:
+        """True / False when confident, None to fall back to the LLM router."""
+        start = time.perf_counter()
+        self._load()
+
+        vector = np.asarray(question_embedding, dtype=np.float32)
+        vector = vector / np.linalg.norm(vector)
+
+        score_true = float(np.mean(np.sort(self.exemplars_true @ vector)[-self.top_k:]))
+        score_false = float(np.mean(np.sort(self.exemplars_false @ vector)[-self.top_k:]))
+
+        decision = None
+        if max(score_true, score_false) >= self.min_similarity:
+            if score_true - score_false >= self.margin:
+                decision = True
+            elif score_false - score_true >= self.margin:
+                decision = False
+
+        seconds = time.perf_counter() - start
+        with self.stats_lock:
+            if decision is not None:
+                self.local_decisions += 1
+                self.local_seconds += seconds
+            else:
+                self.uncertain_seconds += seconds
+
+        logging.info(f"Router fast path: true={score_true:.3f} false={score_false:.3f} decision={decision}")
+        return decision
+
+
+    def _record_llm_decision(self, seconds: float):
+        with self.stats_lock:
+            self.llm_decisions += 1
+            self.llm_seconds += seconds
+
+
+    def _record_embedding(self, seconds: float):
+        with self.stats_lock:
+            self.embedding_seconds += seconds
+
+
+    def _get_stats(self) -> dict:
+        with self.stats_lock:
+            local_decisions, llm_decisions = self.local_decisions, self.llm_decisions
+            local_seconds, llm_seconds, uncertain_seconds = self.local_seconds, self.llm_seconds, self.uncertain_seconds
+            embedding_seconds = self.embedding_seconds
+
+        total = local_decisions + llm_decisions
+        avg_llm_seconds = llm_seconds / llm_decisions if llm_decisions else 0.0
+        return {
+            "local_decisions": local_decisions,
+            "llm_decisions": llm_decisions,
+            "local_fraction": local_decisions / total if total else 0.0,
+            "avg_llm_seconds": avg_llm_seconds,
+            "embedding_seconds": embedding_seconds,
+            # Each local decision avoids one LLM routing call; every local attempt (confident or not) costs time,
+            # plus the question embeddings it had to compute. Negative when the fast path costs more than it saves
+            "seconds_saved": local_decisions * avg_llm_seconds - local_seconds - uncertain_seconds - embedding_seconds,
+        }
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -0,0 +1,79 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+
+ALIAS_FILE = Path("data/silver/vdb_alias.json")
+
+class VectorDBAlias:
+    """
+    Alias from an index name to its live namespace (blue/green rebuilds).
+    Readers resolve the namespace on every query; UpdateVectorDB builds a new namespace
+    and flips the alias with an atomic file replace once the new namespace is complete.
+    An index without alias reads the default namespace ("").
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, file_path: Path = None):
+        self.file_path = Path(file_path) if file_path else ALIAS_FILE
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Cached file content, reloaded only when the file mtime changes
+        self._aliases = {}
+        self._mtime = None
+
+
+    def _get_namespace(self, index_name: str) -> str:
+        try:
+            mtime = os.path.getmtime(self.file_path) if self.file_path.exists() else None
+
+            if mtime != self._mtime:
+                self._aliases = self._load()
+                self._mtime = mtime
+
+        except Exception as e:
+            logging.error(f"Error reading vector DB alias: {e}")
+            raise
+
+        return self._aliases.get(index_name, {}).get("namespace", "")
+
+
+    def _flip(self, index_name: str, namespace: str) -> str:
+        """Points the alias to namespace and returns the previous live namespace."""
+        try:
+            with self._lock:
+                aliases = self._load()
+                previous = aliases.get(index_name, {}).get("namespace", "")
+                aliases[index_name] = {"namespace": namespace, "previous": previous}
+
+                tmp_path = self.file_path.with_suffix(".tmp")
+                with tmp_path.open("w", encoding="utf-8") as f:
+                    json.dump(aliases, f, indent=2)
+                os.replace(tmp_path, self.file_path)
+
+            logging.info(f"Alias '{index_name}' flipped: '{previous}' -> '{namespace}'")
+
+        except Exception as e:
+            logging.error(f"Error flipping vector DB alias: {e}")
+            raise
+
+        return previous
+
+
+    def _load(self) -> dict:
+        if not self.file_path.exists():
+            return {}
+        with self.file_path.open("r", encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return {}
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
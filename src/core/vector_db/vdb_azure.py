@@ -1,104 +1,177 @@
 import os
+import json
+import hashlib
+import time
+import asyncio
 import logging
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from langchain_community.vectorstores.azuresearch import AzureSearch
+from langchain_core.documents import Document
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import ResourceNotFoundError
+from azure.search.documents import SearchClient
+from azure.search.documents.models import VectorizedQuery
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
-    ScoringProfile,
+    HnswAlgorithmConfiguration,
     SearchableField,
     SearchField,
     SearchFieldDataType,
+    SearchIndex,
     SimpleField,
-    TextWeights,
+    VectorSearch,
+    VectorSearchProfile,
 )
+from src.core.vector_db.vdb_alias import VectorDBAlias
+from src.core.llm.llm_openai import _get_embedding_dimensions
 
 load_dotenv()
 
 class AzureVectorStore:
-    
+    """
+    Azure AI Search backend of the VectorStore protocol (VECTOR_DB_BACKEND=azure).
+    Azure Search has no namespaces: every document carries a filterable "namespace" field
+    and every query / count / delete is scoped by it. Chunk ids are the same in every namespace,
+    so the document key is sha1(namespace + chunk id) and the chunk id is kept in "chunk_id".
+    """
+
     def __init__(self, embedding, index_name: str = "langchain-vector-demo"):
         try:
-            self.index_name = index_name
+            # Name of the Azure Search index; index_name keys the manifest / alias / checkpoints
+            self.search_index_name = os.getenv("AZURE_AI_SEARCH_INDEX_NAME", index_name)
+            self.index_name = f"azure-{self.search_index_name}"
 
+            self.embedding = embedding
             self.embedding_function = embedding.embed_query
+            # Size of content_vector, from the embedding model config instead of probing the API
+            self.vector_dimensions = _get_embedding_dimensions(
+                getattr(embedding, "model", None) or os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"))
+
+            self.endpoint = os.getenv("AZURE_AI_SEARCH_ENDPOINT")
+            self.credential = AzureKeyCredential(os.getenv("AZURE_AI_SEARCH_KEY"))
+
+            self.client = SearchIndexClient(endpoint=self.endpoint, credential=self.credential)
+            self.search_client = None
+
+            # Live namespace of the index (blue/green rebuilds)
+            self.alias = VectorDBAlias()
 
-            self.fields = [
-                SimpleField(
-                    name="id",
-                    type=SearchFieldDataType.String,
-                    key=True,
-                    filterable=True,
-                ),
-                SearchableField(
-                    name="content",
-                    type=SearchFieldDataType.String,
-                    searchable=True,
-                ),
-                SearchField(
-                    name="content_vector",
-                    type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-                    searchable=True,
-                    vector_search_dimensions=len(self.embedding_function("Text")),
-                    vector_search_profile_name="myHnswProfile",
-                ),
-                SearchableField(
-                    name="metadata",
-                    type=SearchFieldDataType.String,
-                    searchable=True,
-                ),
-                # Additional field to store the title
-                SearchableField(
-                    name="name",
-                    type=SearchFieldDataType.String,
-                    searchable=True,
-                ),
-                # Additional field to store the title
-                SearchableField(
-                    name="page_number",
-                    type=SearchFieldDataType.String,
-                    searchable=True,
-                ),
-                # Additional field for filtering on document source
-                SimpleField(
-                    name="source",
-                    type=SearchFieldDataType.String,
-                    filterable=True,
-                ),
-            ]
-            
-            self.client = SearchIndexClient(endpoint=os.getenv("AZURE_AI_SEARCH_ENDPOINT"),
-                                            credential=AzureKeyCredential(os.getenv("AZURE_AI_SEARCH_KEY")))
-            
         except Exception as e:
             logging.error(f"Error initializing AzureVectorStore: {e}")
             raise
 
-    
+
+    def _get_fields(self) -> list:
+        return [
+            SimpleField(
+                name="id",
+                type=SearchFieldDataType.String,
+                key=True,
+                filterable=True,
+            ),
+            SearchableField(
+                name="content",
+                type=SearchFieldDataType.String,
+                searchable=True,
+            ),
+            SearchField(
+                name="content_vector",
+                type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+                searchable=True,
+                vector_search_dimensions=self.vector_dimensions,
+                vector_search_profile_name="myHnswProfile",
+            ),
+            SearchableField(
+                name="metadata",
+                type=SearchFieldDataType.String,
+                searchable=True,
+            ),
+            # Additional field to store the title
+            SearchableField(
+                name="name",
+                type=SearchFieldDataType.String,
+                searchable=True,
+                filterable=True,
+            ),
+            # Additional field to store the title
+            SearchableField(
+                name="page_number",
+                type=SearchFieldDataType.String,
+                searchable=True,
+            ),
+            # Additional field for filtering on document source
+            SimpleField(
+                name="source",
+                type=SearchFieldDataType.String,
+                filterable=True,
+            ),
+            SimpleField(
+                name="source_id",
+                type=SearchFieldDataType.String,
+                filterable=True,
+            ),
+            # Blue/green namespace of the document
+            SimpleField(
+                name="namespace",
+                type=SearchFieldDataType.String,
+                filterable=True,
+            ),
+            # Chunk id of UpdateVectorDB, the key is namespaced
+            SimpleField(
+                name="chunk_id",
+                type=SearchFieldDataType.String,
+                filterable=True,
+            ),
+        ]
+
+
     def _create_vector_store_index(self):
+        """Creates the index if it does not exist yet. Called lazily by every operation."""
+        if self.search_client is not None:
+            return
+
         try:
-            vector_store: AzureSearch = AzureSearch(
-                azure_search_endpoint = os.getenv("AZURE_AI_SEARCH_ENDPOINT"),
-                azure_search_key = os.getenv("AZURE_AI_SEARCH_KEY"),
-                index_name = self.index_name,
-                embedding_function = self.embedding_function,
-                fields=self.fields
-            )
+            try:
+                index = self.client.get_index(self.search_index_name)
+                existing = {field.name for field in index.fields}
+                missing = [field for field in self._get_fields() if field.name not in existing]
+                if missing:
+                    # Index created by an older version (no namespace / source_id / chunk_id): new fields
+                    # can be added in place. Its documents stay in the default namespace (namespace null, see
+                    # _get_filter) until UpdateVectorDB replaces them with a full rebuild. Attributes of existing
+                    # fields (e.g. the old non filterable "name") can't change in place, that needs a new index
+                    index.fields.extend(missing)
+                    self.client.create_or_update_index(index)
+                    logging.warning(f"Added {[field.name for field in missing]} to Azure Search index {self.search_index_name}")
+            except ResourceNotFoundError:
+                index = SearchIndex(
+                    name=self.search_index_name,
+                    fields=self._get_fields(),
+                    vector_search=VectorSearch(
+                        algorithms=[HnswAlgorithmConfiguration(name="myHnsw")],
+                        profiles=[VectorSearchProfile(name="myHnswProfile", algorithm_configuration_name="myHnsw")],
+                    ),
+                )
+                self.client.create_index(index)
+                logging.info(f"Created Azure Search index: {self.search_index_name}")
+
+            self.search_client = SearchClient(endpoint=self.endpoint, index_name=self.search_index_name,
+                                              credential=self.credential)
 
         except Exception as e:
             logging.error(f"Error creating Azure Search index: {e}")
             raise
 
-        self.vector_store = vector_store
-    
 
     def _get_vector_store(self):
-        return self.vector_store
-    
+        self._create_vector_store_index()
+        return self
+
 
     def _delete_vector_store_index(self):
         try:
-            self.client.delete_index(index=self.index_name)
+            self.client.delete_index(index=self.search_index_name)
+            self.search_client = None
             logging.info("Azure Search index deleted successfully.")
 
         except Exception as e:
@@ -106,9 +179,174 @@ class AzureVectorStore:
             raise
 
 
+    def _get_key(self, chunk_id: str, namespace: str = "") -> str:
+        """Document key: the same chunk in two namespaces (live / build) are two documents."""
+        return hashlib.sha1(f"{namespace or ''}\x00{chunk_id}".encode("utf-8")).hexdigest()
+
+
+    def _get_namespace(self) -> str:
+        """Namespace readers must query right now."""
+        return self.alias._get_namespace(self.index_name)
+
+
+#region VectorStore protocol
+    def _upsert_vectors(self, vectors: List[Dict], namespace: str = ""):
+        self._create_vector_store_index()
+        try:
+            documents = []
+            for vector in vectors:
+                metadata = {key: value for key, value in vector.get("metadata", {}).items() if key != "text"}
+                documents.append({
+                    "id": self._get_key(vector["id"], namespace),
+                    "chunk_id": vector["id"],
+                    "content": vector.get("metadata", {}).get("text", ""),
+                    "content_vector": vector["values"],
+                    "metadata": json.dumps(metadata, ensure_ascii=False),
+                    "name": str(metadata.get("name", "")),
+                    "page_number": str(metadata.get("page_number", "")),
+                    "source": str(metadata.get("source", "")),
+                    "source_id": str(metadata.get("source_id", "")),
+                    "namespace": namespace or "",
+                })
+
+            results = self.search_client.merge_or_upload_documents(documents=documents)
+            failed = [result.key for result in results if not result.succeeded]
+            if failed:
+                raise RuntimeError(f"Azure Search rejected {len(failed)} documents, e.g. {failed[0]}")
+
+        except Exception as e:
+            logging.error(f"Error upserting Azure Search documents: {e}")
+            raise
+
+
+    def _delete_vectors(self, ids: List[str], namespace: str = ""):
+        if not ids:
+            return
+        self._create_vector_store_index()
+        try:
+            self.search_client.delete_documents(documents=[{"id": self._get_key(doc_id, namespace)} for doc_id in ids])
+
+        except Exception as e:
+            logging.error(f"Error deleting Azure Search documents: {e}")
+            raise
+
+
+    def _fetch_vectors(self, ids: List[str], namespace: str = "") -> Dict[str, Tuple[str, Dict]]:
+        """id -> (text, metadata) of the stored vectors, missing ids are left out."""
+        self._create_vector_store_index()
+        records = {}
+        try:
+            for start in range(0, len(ids), 100):
+                batch = ids[start:start + 100]
+                # Chunk ids are hex digests, "," is a safe separator for search.in
+                results = self.search_client.search(
+                    search_text="*",
+                    filter=f"{self._get_filter(namespace)} and search.in(chunk_id, '{','.join(batch)}', ',')",
+                    select=["chunk_id", "content", "metadata"],
+                    top=len(batch),
+                )
+                for result in results:
+                    records[result["chunk_id"]] = (result["content"], json.loads(result["metadata"] or "{}"))
+
+        except Exception as e:
+            logging.error(f"Error fetching Azure Search documents: {e}")
+            raise
+
+        return records
+
+
+    def _query_vectors(self, embedding: List[float], k: int = 4, namespace: Optional[str] = None,
+                       filter: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+        self._create_vector_store_index()
+        try:
+            results = self.search_client.search(
+                search_text=None,
+                vector_queries=[VectorizedQuery(vector=embedding, k_nearest_neighbors=k, fields="content_vector")],
+                filter=self._get_filter(namespace, filter),
+                select=["chunk_id", "content", "metadata"],
+                top=k,
+            )
+            return [(Document(id=result.get("chunk_id"), page_content=result["content"],
+                              metadata=json.loads(result["metadata"] or "{}")),
+                     result["@search.score"])
+                    for result in results]
+
+        except Exception as e:
+            logging.error(f"Error querying Azure Search: {e}")
+            raise
+
+
+    async def _aquery_vectors(self, embedding: List[float], k: int = 4, namespace: Optional[str] = None,
+                              filter: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+        return await asyncio.to_thread(self._query_vectors, embedding, k, namespace, filter)
+
+
+    def _get_filter(self, namespace: Optional[str], filter: Optional[Dict] = None) -> str:
+        """OData filter: namespace plus equality filters on the filterable fields (name, source, source_id)."""
+        if namespace:
+            clauses = [f"namespace eq '{self._escape(namespace)}'"]
+        else:
+            # Documents written before namespaces existed have none, they belong to the default one
+            clauses = ["(namespace eq '' or namespace eq null)"]
+        for key, value in (filter or {}).items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            clauses.append("(" + " or ".join(f"{key} eq '{self._escape(str(item))}'" for item in values) + ")")
+        return " and ".join(clauses)
+
+
+    def _escape(self, value: str) -> str:
+        return value.replace("'", "''")
+
+
+    def _count_vectors(self, namespace: str = "") -> int:
+        self._create_vector_store_index()
+        try:
+            results = self.search_client.search(search_text="*", filter=self._get_filter(namespace),
+                                                include_total_count=True, top=0)
+            return results.get_count()
+
+        except Exception as e:
+            logging.error(f"Error counting Azure Search documents: {e}")
+            raise
+
+
+    def _delete_namespace(self, namespace: str):
+        self._create_vector_store_index()
+        try:
+            while True:
+                ids = [result["id"] for result in self.search_client.search(
+                    search_text="*", filter=self._get_filter(namespace), select=["id"], top=1000)]
+                if not ids:
+                    break
+                self.search_client.delete_documents(documents=[{"id": doc_id} for doc_id in ids])
+            logging.info(f"Deleted namespace '{namespace}' from Azure Search index: {self.search_index_name}")
+
+        except Exception as e:
+            logging.error(f"Error deleting Azure Search namespace: {e}")
+            raise
+
+
+    def _health(self) -> Dict:
+        start = time.perf_counter()
+        try:
+            stats = self.client.get_index_statistics(self.search_index_name)
+            return {"backend": "azure", "ok": True, "vectors": stats.get("document_count"),
+                    "latency_ms": (time.perf_counter() - start) * 1000}
+        except Exception as e:
+            logging.warning(f"Azure Search health check failed: {e}")
+            return {"backend": "azure", "ok": False, "error": str(e),
+                    "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+    def _warm_up(self):
+        self._create_vector_store_index()
+        self.search_client.get_document_count()
+#endregion
+
+
 #    _____
 #   ( \/ @\____
 #   /           O
 #  /   (_|||||_/
 # /____/  |||
-#       kimba
\ No newline at end of file
+#       kimba
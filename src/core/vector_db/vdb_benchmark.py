@@ -0,0 +1,67 @@
+import time
+import logging
+import numpy as np
+from typing import Dict, List
+from src.core.vector_db.vdb_factory import _get_vector_db
+
+class VectorDBBenchmark:
+    """
+    Compares vector store backends on the same corpus (each one filled by UpdateVectorDB with its backend).
+    The questions are embedded once, then every backend answers them: latency percentiles and the
+    overlap of its top k with the reference backend (recall of an approximate index against exact search).
+    """
+
+    def __init__(self, embedding, backends: List[str], index_name: str = None, reference: str = None):
+        self.embedding = embedding
+        self.vector_dbs = {backend: _get_vector_db(embedding, index_name=index_name, backend=backend) for backend in backends}
+        self.reference = reference or backends[0]
+
+
+    def _run(self, questions: List[str], k: int = 4, repeats: int = 3) -> Dict[str, Dict]:
+        embeddings = self.embedding.embed_documents(questions)
+        results, report = {}, {}
+
+        for backend, vector_db in self.vector_dbs.items():
+            try:
+                namespace = vector_db._get_namespace()
+                vector_db._warm_up()
+
+                latencies, ids = [], []
+                for embedding in embeddings:
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        docs = vector_db._query_vectors(embedding, k=k, namespace=namespace)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    ids.append([self._get_doc_key(doc) for doc, _ in docs])
+
+                results[backend] = ids
+                report[backend] = {
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p95_ms": float(np.percentile(latencies, 95)),
+                    "vectors": vector_db._count_vectors(namespace),
+                }
+
+            except Exception as e:
+                logging.error(f"Error benchmarking backend {backend}: {e}")
+                report[backend] = {"error": str(e)}
+
+        reference_ids = results.get(self.reference)
+        for backend, ids in results.items():
+            if reference_ids is not None:
+                overlaps = [len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(ids, reference_ids)]
+                report[backend][f"overlap_at_{k}"] = float(np.mean(overlaps)) if overlaps else 0.0
+
+        logging.info(f"Vector DB benchmark: {report}")
+        return report
+
+
+    def _get_doc_key(self, doc) -> str:
+        # Vector ids are not returned by every backend, chunks are identified by source + page + text
+        return f"{doc.metadata.get('source_id', '')}|{doc.metadata.get('page_number', '')}|{doc.page_content[:100]}"
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
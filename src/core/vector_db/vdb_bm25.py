@@ -0,0 +1,266 @@
+import os
+import re
+import json
+import math
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+import numpy as np
+from pathlib import Path
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+
+BM25_DIR = Path("data/silver/bm25")
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Function words that match every chunk (Spanish / English), kept out of the postings
+STOPWORDS = frozenset("""
+a al algo como con de del desde donde el ella ellos en entre era es esa ese eso esta este esto fue ha hay la las le
+les lo los mas me mi muy no nos o para pero por que se sin sobre su sus te tu un una uno unos unas y ya yo
+an and are as at be by for from has have in is it its of on or that the this to was were what which who with
+""".split())
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase, accent free word tokens: "Capítulo" and "capitulo" match, codes like "MAT101" are kept whole."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS]
+
+
+def _get_doc_key(doc: Document) -> str:
+    """Identity of a chunk across backends (dense results do not always carry the vector id)."""
+    return hashlib.sha1(f"{doc.metadata.get('source_id', '')}\x00{doc.page_content}".encode("utf-8")).hexdigest()
+
+
+def _reciprocal_rank_fusion(results: Sequence[List[Document]], weights: Sequence[float] = None,
+                            rrf_k: int = 60) -> List[Tuple[Document, float]]:
+    """
+    Reciprocal rank fusion: score(doc) = sum of weight / (rrf_k + rank) over the rankings it appears in.
+    Only ranks are used, so BM25 and cosine scores never have to be put on the same scale.
+    """
+    weights = weights or [1.0] * len(results)
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+
+    for ranking, weight in zip(results, weights):
+        for rank, doc in enumerate(ranking, start=1):
+            key = _get_doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+            docs.setdefault(key, doc)
+
+    return [(docs[key], score) for key, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)]
+
+
+class BM25Index:
+    """
+    Local BM25 index of the chunks of one index / namespace, built by UpdateVectorDB next to the
+    vector upserts and queried by NodeRetrieve for hybrid retrieval (no network round trip on the lexical side).
+
+    SQLite file per namespace (WAL, readers never block the ingestion) with the term frequencies, text and
+    metadata of every chunk: one row per chunk, so writes stay sequential. Changes are buffered per source
+    and written in one transaction by _flush, the same rhythm as VectorDBWriter. Readers keep the inverted
+    index (term -> chunks, tf) in memory as numpy arrays and rebuild it only when the version changes.
+    """
+
+    def __init__(self, index_name: str, namespace: str = "", index_dir: Path = None):
+        index_dir = Path(index_dir) if index_dir else Path(os.getenv("VDB_BM25_DIR", str(BM25_DIR)))
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        suffix = f"_{namespace}" if namespace else ""
+        self.file_path = index_dir / f"bm25_{index_name}{suffix}.sqlite"
+
+        # Okapi BM25 parameters
+        self.k1 = float(os.getenv("VDB_BM25_K1", "1.2"))
+        self.b = float(os.getenv("VDB_BM25_B", "0.75"))
+
+        # source_id -> [(chunk_id, text, metadata)] (None = remove the source) waiting for _flush
+        self.pending: Dict[str, Optional[List[Tuple[str, str, Dict]]]] = {}
+
+        # In memory inverted index, see _load
+        self.lock = threading.Lock()
+        self.loaded_version = None
+        self.chunk_ids: List[str] = []
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS sources (source_id TEXT PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS docs (chunk_id TEXT PRIMARY KEY, source_id TEXT, length INTEGER, "
+                         "terms TEXT, text TEXT, metadata TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS docs_source ON docs (source_id)")
+
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.file_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+#region Ingestion
+    def _set_source(self, source_id: str, chunks: Iterable[Tuple[str, str, Dict]]):
+        """Replaces every chunk of source_id with chunks [(chunk_id, text, metadata)] on the next _flush."""
+        self.pending[source_id] = list(chunks)
+
+
+    def _remove_source(self, source_id: str):
+        self.pending[source_id] = None
+
+
+    def _flush(self):
+        if not self.pending:
+            return
+
+        pending, self.pending = self.pending, {}
+        try:
+            with self._connect() as conn:
+                for source_id, chunks in pending.items():
+                    conn.execute("DELETE FROM docs WHERE source_id = ?", (source_id,))
+
+                    if chunks is None:
+                        conn.execute("DELETE FROM sources WHERE source_id = ?", (source_id,))
+                        continue
+
+                    conn.execute("INSERT OR IGNORE INTO sources (source_id) VALUES (?)", (source_id,))
+                    rows = []
+                    for chunk_id, text, metadata in chunks:
+                        term_counts = Counter(_tokenize(text))
+                        rows.append((chunk_id, source_id, sum(term_counts.values()), json.dumps(term_counts, ensure_ascii=False),
+                                     text, json.dumps(metadata, ensure_ascii=False)))
+                    conn.executemany("INSERT OR REPLACE INTO docs (chunk_id, source_id, length, terms, text, metadata) "
+                                     "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+                # Readers rebuild their inverted index on the next query
+                self._bump_version(conn)
+
+        except Exception as e:
+            logging.error(f"Error writing BM25 index {self.file_path}: {e}")
+            raise
+
+
+    def _get_version(self, conn) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+
+    def _bump_version(self, conn):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(self._get_version(conn) + 1),))
+
+
+    def _get_source_ids(self) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT source_id FROM sources")]
+
+
+    def _clear(self):
+        self.pending = {}
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sources")
+            conn.execute("DELETE FROM docs")
+            self._bump_version(conn)
+
+
+    def _delete(self):
+        """Removes the index file (namespace garbage collected after a blue/green flip)."""
+        self.pending = {}
+        for path in (self.file_path, Path(f"{self.file_path}-wal"), Path(f"{self.file_path}-shm")):
+            if path.exists():
+                path.unlink()
+#endregion
+
+
+#region Query
+    def _load(self):
+        """Rebuilds the in memory inverted index only when a writer changed the file."""
+        with self._connect() as conn:
+            version = self._get_version(conn)
+            if version == self.loaded_version:
+                return
+            records = conn.execute("SELECT chunk_id, length, terms FROM docs").fetchall()
+
+        chunk_ids, lengths = [], np.zeros(len(records), dtype=np.float32)
+        term_docs: Dict[str, List[int]] = {}
+        term_freqs: Dict[str, List[int]] = {}
+        for position, (chunk_id, length, terms) in enumerate(records):
+            chunk_ids.append(chunk_id)
+            lengths[position] = length
+            for term, tf in json.loads(terms).items():
+                term_docs.setdefault(term, []).append(position)
+                term_freqs.setdefault(term, []).append(tf)
+
+        self.chunk_ids = chunk_ids
+        self.lengths = lengths
+        self.postings = {term: (np.asarray(positions, dtype=np.int32), np.asarray(term_freqs[term], dtype=np.float32))
+                         for term, positions in term_docs.items()}
+        self.loaded_version = version
+
+
+    def _count(self) -> int:
+        with self.lock:
+            self._load()
+            return len(self.chunk_ids)
+
+
+    def _query(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Top k chunks for query by Okapi BM25 score."""
+        terms = list(dict.fromkeys(_tokenize(query)))
+        if not terms:
+            return []
+
+        try:
+            with self.lock:
+                self._load()
+                chunk_ids, lengths, postings = self.chunk_ids, self.lengths, self.postings
+
+            n_docs = len(chunk_ids)
+            if not n_docs:
+                return []
+
+            # Length normalization of every chunk, shared by the query terms
+            norms = self.k1 * (1 - self.b + self.b * lengths / lengths.mean())
+            scores = np.zeros(n_docs, dtype=np.float32)
+            for term in terms:
+                if term not in postings:
+                    continue
+                positions, tfs = postings[term]
+                idf = math.log(1 + (n_docs - len(positions) + 0.5) / (len(positions) + 0.5))
+                # A term appears once per chunk in its postings, plain fancy indexing adds safely
+                scores[positions] += idf * tfs * (self.k1 + 1) / (tfs + norms[positions])
+
+            matched = np.flatnonzero(scores)
+            if not len(matched):
+                return []
+            k = min(k, len(matched))
+            top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            best = [(chunk_ids[position], float(scores[position])) for position in top]
+
+            with self._connect() as conn:
+                records = {row[0]: row[1:] for row in conn.execute(
+                    f"SELECT chunk_id, text, metadata FROM docs WHERE chunk_id IN ({','.join('?' * len(best))})",
+                    [chunk_id for chunk_id, _ in best])}
+
+            return [(Document(id=chunk_id, page_content=records[chunk_id][0], metadata=json.loads(records[chunk_id][1])), score)
+                    for chunk_id, score in best if chunk_id in records]
+
+        except Exception as e:
+            logging.error(f"Error querying BM25 index {self.file_path}: {e}")
+            raise
+#endregion
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
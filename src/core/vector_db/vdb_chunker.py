@@ -0,0 +1,237 @@
+import os
+import re
+import logging
+import tiktoken
+from typing import Dict, List, Tuple
+from langchain_core.documents import Document
+
+# Line that starts a section: markdown heading, numbered title, "Capítulo 2", or a short ALL CAPS line
+# Only the keywords are case insensitive: a numbered heading needs a real capital after the number / roman numeral
+HEADING_PATTERN = re.compile(
+    r"^(#{1,6}\s+\S"
+    r"|\d+(\.\d+)*[.)]?\s+[A-ZÁÉÍÓÚÑ]"
+    # Roman numerals only with a separator: "I Am here" / "IV Resultados del estudio" are prose
+    r"|[IVXLC]+ ?[.):\-]\s+[A-ZÁÉÍÓÚÑ]"
+    r"|(?i:cap[ií]tulo|tema|unidad|secci[oó]n|lecci[oó]n|chapter|section)\b)"
+)
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def _get_encoding(model: str):
+    """Tokenizer of the embedding model, None when tiktoken cannot load it (token counts are estimated)."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its vocabularies on first use
+        logging.warning(f"tiktoken encoding not available ({e}), estimating tokens from characters")
+        return None
+
+
+def _count_tokens(encoding, text: str) -> int:
+    """Tokens of text, about 3 characters per token when the encoding is not available."""
+    if encoding is None:
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class TokenChunker:
+    """
+    Splits the pages of a source into chunks measured in tokens of the embedding model.
+
+    Pages are cut into blocks (headings / paragraphs) and blocks are packed into chunks of up to
+    chunk_tokens; a heading starts a new chunk, paragraphs longer than a chunk are split on sentences.
+    Short pages are merged with the next ones until min_chunk_tokens, the chunk keeps the page range
+    in page_number ("3-4"), page_start and page_end. Overlap is optional: boundaries follow the text structure.
+    """
+
+    def __init__(self, chunk_tokens: int = None, chunk_overlap_tokens: int = None, min_chunk_tokens: int = None,
+                 model: str = "text-embedding-3-small"):
+        self.chunk_tokens = chunk_tokens or int(os.getenv("VDB_CHUNK_TOKENS", "400"))
+        self.chunk_overlap_tokens = chunk_overlap_tokens if chunk_overlap_tokens is not None else int(os.getenv("VDB_CHUNK_OVERLAP_TOKENS", "0"))
+        self.min_chunk_tokens = min_chunk_tokens if min_chunk_tokens is not None else int(os.getenv("VDB_MIN_CHUNK_TOKENS", "100"))
+
+        self.encoding = _get_encoding(model)
+
+        # Token count of every chunk produced, see _get_stats
+        self.chunk_sizes: List[int] = []
+
+
+    def _get_signature(self) -> str:
+        """Settings that change the chunks, stored in the manifest: a change re-chunks every source."""
+        # v2: stricter heading detection (prose lines no longer split paragraphs), v3: roman numerals need a separator
+        return f"tokens-v3-{self.chunk_tokens}-{self.chunk_overlap_tokens}-{self.min_chunk_tokens}"
+
+
+    def _count_tokens(self, text: str) -> int:
+        return _count_tokens(self.encoding, text)
+
+
+    def _split_documents(self, docs: List[Document]) -> List[Document]:
+        """Chunks of the pages of one source, docs in page order (as yielded by the loaders)."""
+        chunks = []
+        parts, parts_tokens, pages = [], 0, []
+        # Parts at the start of parts repeated from the previous chunk
+        carried = 0
+
+        def emit():
+            nonlocal parts, parts_tokens, pages, carried
+            chunks.append(self._build_chunk(parts, pages))
+            overlap = self._get_overlap(parts)
+            parts, parts_tokens = overlap, sum(self._count_tokens(part) for part in overlap)
+            pages = pages[-1:] if overlap else []
+            carried = len(overlap)
+
+        for doc in docs:
+            # Page boundary: cut here unless the chunk is still too short to stand alone
+            if len(parts) > carried and parts_tokens >= self.min_chunk_tokens:
+                emit()
+
+            for text, is_heading in self._get_blocks(doc.page_content):
+                tokens = self._count_tokens(text)
+                pieces = self._split_block(text) if tokens > self.chunk_tokens else [(text, tokens)]
+
+                for piece, piece_tokens in pieces:
+                    if len(parts) > carried and (parts_tokens + piece_tokens > self.chunk_tokens
+                                                 or (is_heading and parts_tokens >= self.min_chunk_tokens)):
+                        emit()
+
+                    parts.append(piece)
+                    parts_tokens += piece_tokens
+                    if not pages or pages[-1] is not doc:
+                        pages.append(doc)
+
+        if len(parts) > carried:
+            chunks.append(self._build_chunk(parts, pages))
+
+        return chunks
+
+
+    def _get_blocks(self, text: str) -> List[Tuple[str, bool]]:
+        """(block text, is heading) in order: paragraphs are separated by blank lines or headings."""
+        blocks, lines = [], []
+        for line in (text or "").splitlines():
+            stripped = line.strip()
+            if not stripped:
+                if lines:
+                    blocks.append(("\n".join(lines), False))
+                    lines = []
+                continue
+
+            if self._is_heading(stripped):
+                if lines:
+                    blocks.append(("\n".join(lines), False))
+                    lines = []
+                blocks.append((stripped, True))
+                continue
+
+            lines.append(stripped)
+
+        if lines:
+            blocks.append(("\n".join(lines), False))
+        return blocks
+
+
+    def _is_heading(self, line: str) -> bool:
+        if len(line) > 80 or line.endswith((".", ",", ";")):
+            return False
+        if HEADING_PATTERN.match(line):
+            return True
+        letters = [c for c in line if c.isalpha()]
+        return len(letters) >= 3 and all(c.isupper() for c in letters)
+
+
+    def _split_block(self, text: str) -> List[Tuple[str, int]]:
+        """Paragraph longer than a chunk: groups of whole sentences, token windows for giant sentences."""
+        pieces, sentences, sentences_tokens = [], [], 0
+
+        for sentence in SENTENCE_END_PATTERN.split(text):
+            tokens = self._count_tokens(sentence)
+
+            if tokens > self.chunk_tokens:
+                if sentences:
+                    pieces.append((" ".join(sentences), sentences_tokens))
+                    sentences, sentences_tokens = [], 0
+                pieces.extend(self._split_tokens(sentence))
+                continue
+
+            if sentences and sentences_tokens + tokens > self.chunk_tokens:
+                pieces.append((" ".join(sentences), sentences_tokens))
+                sentences, sentences_tokens = [], 0
+            sentences.append(sentence)
+            sentences_tokens += tokens
+
+        if sentences:
+            pieces.append((" ".join(sentences), sentences_tokens))
+        return pieces
+
+
+    def _split_tokens(self, text: str) -> List[Tuple[str, int]]:
+        if self.encoding is None:
+            size = self.chunk_tokens * 3
+            return [(text[start:start + size], self.chunk_tokens) for start in range(0, len(text), size)]
+
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return [(self.encoding.decode(tokens[start:start + self.chunk_tokens]), len(tokens[start:start + self.chunk_tokens]))
+                for start in range(0, len(tokens), self.chunk_tokens)]
+
+
+    def _get_overlap(self, parts: List[str]) -> List[str]:
+        """Trailing sentences of the chunk, up to chunk_overlap_tokens, repeated at the start of the next one."""
+        if self.chunk_overlap_tokens <= 0 or not parts:
+            return []
+
+        overlap, tokens = [], 0
+        for sentence in reversed(SENTENCE_END_PATTERN.split(parts[-1])):
+            sentence_tokens = self._count_tokens(sentence)
+            if tokens + sentence_tokens > self.chunk_overlap_tokens:
+                break
+            overlap.insert(0, sentence)
+            tokens += sentence_tokens
+
+        return [" ".join(overlap)] if overlap else []
+
+
+    def _build_chunk(self, parts: List[str], pages: List[Document]) -> Document:
+        text = "\n".join(parts)
+        self.chunk_sizes.append(self._count_tokens(text))
+
+        page_start = pages[0].metadata.get("page_number", "")
+        page_end = pages[-1].metadata.get("page_number", "")
+
+        metadata = dict(pages[0].metadata)
+        metadata["page_number"] = page_start if page_start == page_end else f"{page_start}-{page_end}"
+        metadata["page_start"] = page_start
+        metadata["page_end"] = page_end
+
+        return Document(page_content=text, metadata=metadata)
+
+
+    def _get_stats(self) -> Dict[str, float]:
+        """Chunk size distribution (tokens) since the chunker was created."""
+        if not self.chunk_sizes:
+            return {"chunks": 0}
+
+        sizes = sorted(self.chunk_sizes)
+        percentile = lambda p: sizes[min(int(p * len(sizes)), len(sizes) - 1)]
+        return {
+            "chunks": len(sizes),
+            "total_tokens": sum(sizes),
+            "mean": sum(sizes) / len(sizes),
+            "min": sizes[0],
+            "p10": percentile(0.10),
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "max": sizes[-1],
+            # Chunks that had to stay small (short source or isolated section)
+            "under_min": sum(1 for size in sizes if size < self.min_chunk_tokens),
+        }
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -0,0 +1,44 @@
+import os
+import logging
+from src.core.vector_db.vdb_protocol import VectorStore
+
+VECTOR_DB_BACKENDS = ("pinecone", "azure", "local")
+
+
+def _get_vector_db(embedding, index_name: str = None, backend: str = None) -> VectorStore:
+    """
+    Vector store backend: "pinecone" (default), "azure" (Azure AI Search) or "local" (in-process, no network).
+    backend defaults to VECTOR_DB_BACKEND. All of them implement the VectorStore protocol.
+    """
+    backend = (backend or os.getenv("VECTOR_DB_BACKEND", "pinecone")).lower()
+    kwargs = {"index_name": index_name} if index_name else {}
+
+    if backend == "pinecone":
+        from src.core.vector_db.vdb_pinecone import PineconeVectorDB
+        return PineconeVectorDB(embedding=embedding, **kwargs)
+
+    if backend == "azure":
+        from src.core.vector_db.vdb_azure import AzureVectorStore
+        return AzureVectorStore(embedding=embedding, **kwargs)
+
+    if backend == "local":
+        from src.core.vector_db.vdb_local import LocalVectorDB
+        return LocalVectorDB(embedding=embedding, **kwargs)
+
+    logging.error(f"Unknown vector DB backend '{backend}', expected one of {VECTOR_DB_BACKENDS}")
+    raise ValueError(f"Unknown vector DB backend '{backend}'")
+
+
+def _get_query_vector_db(embedding, index_name: str = None) -> VectorStore:
+    """
+    Backend that answers the chat questions, VECTOR_DB_QUERY_BACKEND (defaults to VECTOR_DB_BACKEND).
+    Lets latency sensitive traffic go to the fastest store while ingestion keeps feeding the others.
+    """
+    return _get_vector_db(embedding, index_name=index_name, backend=os.getenv("VECTOR_DB_QUERY_BACKEND"))
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
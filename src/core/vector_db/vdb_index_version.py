@@ -0,0 +1,80 @@
+import os
+import json
+import uuid
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+
+INDEX_VERSION_FILE = Path("data/silver/vdb_index_version.json")
+
+class IndexVersion:
+    """
+    Version tag of each vector index, bumped by UpdateVectorDB every time the index content changes.
+    Anything derived from the index (e.g. the semantic answer cache) keys on it to be invalidated.
+    Backed by a small JSON file so every process of the host sees the same version.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, file_path: Path = None):
+        self.file_path = Path(file_path) if file_path else INDEX_VERSION_FILE
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Cached file content, reloaded only when the file mtime changes
+        self._versions = {}
+        self._mtime = None
+
+
+    def _get_version(self, index_name: str) -> str:
+        try:
+            mtime = os.path.getmtime(self.file_path) if self.file_path.exists() else None
+
+            if mtime != self._mtime:
+                self._versions = self._load()
+                self._mtime = mtime
+
+        except Exception as e:
+            logging.error(f"Error reading index version: {e}")
+            raise
+
+        return self._versions.get(index_name, "0")
+
+
+    def _bump_version(self, index_name: str) -> str:
+        try:
+            with self._lock:
+                versions = self._load()
+                version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+                versions[index_name] = version
+
+                # Write + rename so readers never see a half written file
+                tmp_path = self.file_path.with_suffix(".tmp")
+                with tmp_path.open("w", encoding="utf-8") as f:
+                    json.dump(versions, f, indent=2)
+                os.replace(tmp_path, self.file_path)
+
+            logging.info(f"Index '{index_name}' version bumped to {version}")
+
+        except Exception as e:
+            logging.error(f"Error bumping index version: {e}")
+            raise
+
+        return version
+
+
+    def _load(self) -> dict:
+        if not self.file_path.exists():
+            return {}
+        with self.file_path.open("r", encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return {}
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -0,0 +1,402 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from src.core.vector_db.vdb_alias import VectorDBAlias
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+LOCAL_VDB_DIR = Path("data/silver/vdb_local")
+
+
+class LocalVectorNamespace:
+    """
+    Vectors of one namespace on local disk: a float32 memmap (one normalized row per vector) plus
+    a SQLite table with id, row, text and metadata. Deleted rows are reused by the next upserts.
+    Readers keep the alive rows in memory and reload them when the store version changes.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / "vectors.f32"
+        self.db_path = self.directory / "store.sqlite"
+
+        self.lock = threading.Lock()
+        self.hnsw_enabled = os.getenv("VDB_LOCAL_HNSW", "true").lower() == "true" and hnswlib is not None
+        self.hnsw_min_vectors = int(os.getenv("VDB_LOCAL_HNSW_MIN_VECTORS", "20000"))
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS vectors (id TEXT PRIMARY KEY, row INTEGER UNIQUE, text TEXT, metadata TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY)")
+
+        # Reader cache, see _load
+        self.loaded_version = None
+        self.matrix = None
+        self.alive_rows = None
+        self.alive_matrix = None
+        self.hnsw_index = None
+
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+    def _get_meta(self, conn, key: str, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+
+    def _set_meta(self, conn, key: str, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+
+    def _open_matrix(self, dim: int, rows: int, mode: str = "r") -> Optional[np.memmap]:
+        if rows == 0 or not self.vectors_path.exists():
+            return None
+        return np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(rows, dim))
+
+
+#region Write
+    def _upsert(self, vectors: List[Dict]):
+        """vectors: [{"id", "values", "metadata"}], the chunk text in metadata["text"] (Pinecone layout)."""
+        if not vectors:
+            return
+
+        values = np.asarray([vector["values"] for vector in vectors], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values = values / np.where(norms == 0, 1, norms)
+
+        with self.lock, self._connect() as conn:
+            dim = self._get_meta(conn, "dim")
+            if dim is None:
+                dim = values.shape[1]
+                self._set_meta(conn, "dim", dim)
+            if values.shape[1] != dim:
+                raise ValueError(f"Vector dimension {values.shape[1]} does not match the store dimension {dim}")
+
+            capacity = self._get_meta(conn, "capacity", 0)
+            next_row = self._get_meta(conn, "next_row", 0)
+
+            rows = []
+            for vector in vectors:
+                existing = conn.execute("SELECT row FROM vectors WHERE id = ?", (vector["id"],)).fetchone()
+                if existing:
+                    rows.append(existing[0])
+                    continue
+                free = conn.execute("SELECT row FROM free_rows LIMIT 1").fetchone()
+                if free:
+                    conn.execute("DELETE FROM free_rows WHERE row = ?", free)
+                    rows.append(free[0])
+                else:
+                    rows.append(next_row)
+                    next_row += 1
+
+            if next_row > capacity:
+                # Grow by doubling, the memmap file is extended in place
+                capacity = max(next_row, capacity * 2, 1024)
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(capacity * dim * 4)
+                self._set_meta(conn, "capacity", capacity)
+
+            matrix = self._open_matrix(dim, capacity, mode="r+")
+            matrix[rows] = values
+            matrix.flush()
+            del matrix
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, text, metadata) VALUES (?, ?, ?, ?)",
+                [(vector["id"], row, vector.get("metadata", {}).get("text", ""),
+                  json.dumps({key: value for key, value in vector.get("metadata", {}).items() if key != "text"}, ensure_ascii=False))
+                 for vector, row in zip(vectors, rows)]
+            )
+            self._set_meta(conn, "next_row", next_row)
+            self._set_meta(conn, "version", self._get_meta(conn, "version", 0) + 1)
+
+
+    def _delete(self, ids: List[str]):
+        if not ids:
+            return
+
+        with self.lock, self._connect() as conn:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(f"INSERT OR IGNORE INTO free_rows (row) SELECT row FROM vectors WHERE id IN ({placeholders})", batch)
+                conn.execute(f"DELETE FROM vectors WHERE id IN ({placeholders})", batch)
+            self._set_meta(conn, "version", self._get_meta(conn, "version", 0) + 1)
+
+
+    def _fetch(self, ids: List[str]) -> Dict[str, Tuple[str, Dict]]:
+        """id -> (text, metadata) of the stored vectors, missing ids are left out."""
+        records = {}
+        with self._connect() as conn:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                for vector_id, text, metadata in conn.execute(
+                        f"SELECT id, text, metadata FROM vectors WHERE id IN ({','.join('?' * len(batch))})", batch):
+                    records[vector_id] = (text, json.loads(metadata))
+        return records
+
+
+    def _count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+#endregion
+
+
+#region Read
+    def _load(self):
+        """Reloads the alive rows (and the HNSW index) only when a writer changed the store."""
+        with self._connect() as conn:
+            version = self._get_meta(conn, "version", 0)
+            if version == self.loaded_version:
+                return
+
+            dim = self._get_meta(conn, "dim")
+            capacity = self._get_meta(conn, "capacity", 0)
+            alive_rows = np.asarray([row for (row,) in conn.execute("SELECT row FROM vectors ORDER BY row")], dtype=np.int64)
+
+        matrix = self._open_matrix(dim, capacity) if dim else None
+        self.matrix = matrix
+        self.alive_rows = alive_rows
+        # Contiguous copy of the alive rows: one BLAS matmul per query
+        self.alive_matrix = np.ascontiguousarray(matrix[alive_rows]) if matrix is not None and len(alive_rows) else None
+        self.hnsw_index = None
+
+        if self.hnsw_enabled and self.matrix is not None and len(alive_rows) >= self.hnsw_min_vectors:
+            # Approximate search for big corpora, brute force is exact and fast enough below the threshold
+            index = hnswlib.Index(space="ip", dim=dim)
+            index.init_index(max_elements=len(alive_rows), ef_construction=200, M=16)
+            index.add_items(self.alive_matrix, alive_rows)
+            index.set_ef(max(64, int(os.getenv("VDB_LOCAL_HNSW_EF", "64"))))
+            self.hnsw_index = index
+
+        self.loaded_version = version
+
+
+    def _query(self, embedding: List[float], k: int, filter: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+        with self.lock:
+            self._load()
+            matrix, alive_rows, alive_matrix, hnsw_index = self.matrix, self.alive_rows, self.alive_matrix, self.hnsw_index
+
+        if alive_matrix is None:
+            return []
+
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1)
+
+        if filter:
+            alive_rows = self._get_filtered_rows(filter)
+            alive_matrix = matrix[alive_rows]
+            hnsw_index = None
+            if len(alive_rows) == 0:
+                return []
+
+        k = min(k, len(alive_rows))
+        if hnsw_index is not None:
+            labels, distances = hnsw_index.knn_query(vector, k=k)
+            rows, scores = labels[0].tolist(), (1 - distances[0]).tolist()
+        else:
+            similarities = alive_matrix @ vector
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top])]
+            rows, scores = alive_rows[top].tolist(), similarities[top].tolist()
+
+        return self._get_documents(rows, scores)
+
+
+    def _get_filtered_rows(self, filter: Dict) -> np.ndarray:
+        """Equality filter on metadata keys ({"source": "google_drive"}), lists mean any of the values."""
+        clauses, params = [], []
+        for key, value in filter.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            clauses.append(f"json_extract(metadata, ?) IN ({','.join('?' * len(values))})")
+            params.extend([f"$.{key}", *values])
+
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT row FROM vectors WHERE {' AND '.join(clauses)} ORDER BY row", params).fetchall()
+        return np.asarray([row for (row,) in rows], dtype=np.int64)
+
+
+    def _get_documents(self, rows: List[int], scores: List[float]) -> List[Tuple[Document, float]]:
+        with self._connect() as conn:
+            records = {row: (text, metadata) for row, text, metadata in conn.execute(
+                f"SELECT row, text, metadata FROM vectors WHERE row IN ({','.join('?' * len(rows))})", rows)}
+
+        return [(Document(page_content=records[row][0], metadata=json.loads(records[row][1])), float(score))
+                for row, score in zip(rows, scores) if row in records]
+#endregion
+
+
+class LocalVectorDB:
+    """
+    In-process vector store, an offline / low latency alternative to PineconeVectorDB
+    (VECTOR_DB_BACKEND=local). Implements the VectorStore protocol (namespaces, alias for
+    blue/green rebuilds) plus the similarity_search* methods of the langchain stores.
+    Stored under data/silver/vdb_local/<index_name>/<namespace>/.
+    """
+
+    def __init__(self, embedding, index_name: str = "alexandria-embeddings2", base_dir: Path = None):
+        # Own manifest / alias / checkpoints: a local index never shares state with the Pinecone one
+        self.index_name = f"local-{os.getenv('PINECONE_INDEX_NAME', index_name)}"
+        self.embedding = embedding
+        self.base_dir = (Path(base_dir) if base_dir else LOCAL_VDB_DIR) / self.index_name
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+        self.vector_store = None
+        self.namespaces: Dict[str, LocalVectorNamespace] = {}
+        self.namespaces_lock = threading.Lock()
+
+        # Live namespace of the index (blue/green rebuilds)
+        self.alias = VectorDBAlias(self.base_dir / "alias.json")
+
+
+    def _create_vector_store_index(self):
+        self.vector_store = self
+
+
+    def _get_vector_store(self):
+        if not self.vector_store:
+            self._create_vector_store_index()
+        return self.vector_store
+
+
+    def _get_namespace(self) -> str:
+        """Namespace readers must query right now."""
+        return self.alias._get_namespace(self.index_name)
+
+
+    def _get_namespace_store(self, namespace: Optional[str]) -> LocalVectorNamespace:
+        namespace = namespace or ""
+        with self.namespaces_lock:
+            if namespace not in self.namespaces:
+                self.namespaces[namespace] = LocalVectorNamespace(self.base_dir / (namespace or "__default__"))
+            return self.namespaces[namespace]
+
+
+    def _upsert_vectors(self, vectors: List[Dict], namespace: str = ""):
+        try:
+            self._get_namespace_store(namespace)._upsert(vectors)
+        except Exception as e:
+            logging.error(f"Error upserting local vectors: {e}")
+            raise
+
+
+    def _delete_vectors(self, ids: List[str], namespace: str = ""):
+        try:
+            self._get_namespace_store(namespace)._delete(ids)
+        except Exception as e:
+            logging.error(f"Error deleting local vectors: {e}")
+            raise
+
+
+    def _fetch_vectors(self, ids: List[str], namespace: str = "") -> Dict[str, Tuple[str, Dict]]:
+        try:
+            return self._get_namespace_store(namespace)._fetch(ids)
+        except Exception as e:
+            logging.error(f"Error fetching local vectors: {e}")
+            raise
+
+
+    def _count_vectors(self, namespace: str = "") -> int:
+        return self._get_namespace_store(namespace)._count()
+
+
+    def _delete_namespace(self, namespace: str):
+        try:
+            namespace_dir = self.base_dir / (namespace or "__default__")
+            with self.namespaces_lock:
+                self.namespaces.pop(namespace or "", None)
+                if namespace_dir.exists():
+                    for file_path in namespace_dir.iterdir():
+                        file_path.unlink()
+                    namespace_dir.rmdir()
+            logging.info(f"Deleted namespace '{namespace}' from local index: {self.index_name}")
+
+        except Exception as e:
+            logging.error(f"Error deleting local namespace: {e}")
+            raise
+
+
+    def _query_vectors(self, embedding: List[float], k: int = 4, namespace: Optional[str] = None,
+                       filter: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+        return self._get_namespace_store(namespace)._query(embedding, k, filter)
+
+
+    async def _aquery_vectors(self, embedding: List[float], k: int = 4, namespace: Optional[str] = None,
+                              filter: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+        return await asyncio.to_thread(self._query_vectors, embedding, k, namespace, filter)
+
+
+    def _health(self) -> Dict:
+        start = time.perf_counter()
+        try:
+            vectors = self._count_vectors(self._get_namespace())
+            return {"backend": "local", "ok": True, "vectors": vectors,
+                    "hnsw": hnswlib is not None, "latency_ms": (time.perf_counter() - start) * 1000}
+        except Exception as e:
+            logging.warning(f"Local vector index health check failed: {e}")
+            return {"backend": "local", "ok": False, "error": str(e),
+                    "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+    def _warm_up(self):
+        """Maps the live namespace (and builds its HNSW index) ahead of the first query."""
+        store = self._get_namespace_store(self._get_namespace())
+        with store.lock:
+            store._load()
+
+
+#region langchain VectorStore methods
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4, filter: Optional[Dict] = None,
+                                               namespace: Optional[str] = None) -> List[Tuple[Document, float]]:
+        return self._query_vectors(embedding, k, namespace, filter)
+
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[Dict] = None,
+                                    namespace: Optional[str] = None) -> List[Document]:
+        return [doc for doc, _ in self._query_vectors(embedding, k, namespace, filter)]
+
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict] = None,
+                          namespace: Optional[str] = None) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k, filter, namespace)
+
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[Dict] = None,
+                                           namespace: Optional[str] = None) -> List[Document]:
+        return [doc for doc, _ in await self._aquery_vectors(embedding, k, namespace, filter)]
+
+
+    async def asimilarity_search(self, query: str, k: int = 4, filter: Optional[Dict] = None,
+                                 namespace: Optional[str] = None) -> List[Document]:
+        embedding = await self.embedding.aembed_query(query)
+        return await self.asimilarity_search_by_vector(embedding, k, filter, namespace)
+#endregion
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
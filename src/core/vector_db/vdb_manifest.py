@@ -0,0 +1,101 @@
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MANIFEST_DIR = Path("data/silver")
+
+class VectorDBManifest:
+    """
+    Local record of what is indexed, used by UpdateVectorDB to sync incrementally.
+    For every source file (Drive file id, blob name or local path) it keeps the origin,
+    the source version (modified time / etag / checksum), the chunker settings and the ids of its chunk vectors.
+    Chunk ids are content hashes, so a changed chunk gets a new id and the old one is deleted.
+    """
+
+    def __init__(self, index_name: str, namespace: str = "", manifest_dir: Path = None):
+        manifest_dir = Path(manifest_dir) if manifest_dir else MANIFEST_DIR
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+
+        # One manifest per namespace: a blue/green rebuild starts from an empty one
+        suffix = f"_{namespace}" if namespace else ""
+        self.file_path = manifest_dir / f"vdb_manifest_{index_name}{suffix}.json"
+        self.sources = self._load()
+
+
+    def _get_source(self, source_id: str) -> Optional[Dict]:
+        return self.sources.get(source_id)
+
+
+    def _get_source_ids(self, origin: str = None) -> List[str]:
+        return [source_id for source_id, source in self.sources.items()
+                if origin is None or source.get("origin") == origin]
+
+
+    def _get_versions(self, origin: str = None, chunker: str = None) -> Dict[str, str]:
+        """
+        source_id -> indexed version, lets loaders skip unchanged sources before downloading them.
+        With chunker, sources chunked with other settings are left out (they must be chunked again).
+        """
+        return {source_id: self.sources[source_id].get("version", "") for source_id in self._get_source_ids(origin)
+                if chunker is None or self.sources[source_id].get("chunker") == chunker}
+
+
+    def _set_source(self, source_id: str, origin: str, version: str, chunk_ids: List[str], chunker: str = None):
+        self.sources[source_id] = {
+            "origin": origin,
+            "version": version,
+            "chunk_ids": chunk_ids,
+            "chunker": chunker,
+        }
+
+
+    def _remove_source(self, source_id: str):
+        self.sources.pop(source_id, None)
+
+
+    def _clear(self):
+        self.sources = {}
+        self._save()
+
+
+    def _get_chunk_count(self) -> int:
+        return sum(len(source.get("chunk_ids", [])) for source in self.sources.values())
+
+
+    def _delete(self):
+        self.sources = {}
+        if self.file_path.exists():
+            self.file_path.unlink()
+
+
+    def _save(self):
+        try:
+            # Write + rename, a crash mid-save keeps the previous manifest
+            tmp_path = self.file_path.with_suffix(".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump({"sources": self.sources}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.file_path)
+
+        except Exception as e:
+            logging.error(f"Error saving vector DB manifest: {e}")
+            raise
+
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.file_path.exists():
+            return {}
+        with self.file_path.open("r", encoding="utf-8") as f:
+            try:
+                return json.load(f).get("sources", {})
+            except json.JSONDecodeError:
+                logging.warning(f"Corrupted manifest {self.file_path}, starting from scratch")
+                return {}
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -1,9 +1,11 @@
 import os
 import time
+import asyncio
 import logging
 from dotenv import load_dotenv
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone, ServerlessSpec
+from src.core.vector_db.vdb_alias import VectorDBAlias
 
 load_dotenv()
 
@@ -20,6 +22,10 @@ class PineconeVectorDB:
 
         self.pc = Pinecone(api_key=self.api_key)
         self.vector_store = None
+        self.index = None
+
+        # Live namespace of the index (blue/green rebuilds)
+        self.alias = VectorDBAlias()
 
     def _create_vector_store_index(self):
         # In Pinecone, "creating" the index usually means provisioning the cloud resource.
@@ -49,12 +55,11 @@ class PineconeVectorDB:
                 logging.error(f"Error creating/checking index: {e}")
                 raise
 
-        # Initialize the LangChain wrapper
+        # Initialize the LangChain wrapper on the pooled index (the one _warm_up opens)
         try:
             self.vector_store = PineconeVectorStore(
-                index_name=self.index_name,
+                index=self._get_index(),
                 embedding=self.embedding,
-                pinecone_api_key=self.api_key
             )
         except Exception as e:
             logging.error(f"Error initializing PineconeVectorStore: {e}")
@@ -87,3 +92,105 @@ class PineconeVectorDB:
             # We don't raise here strictly to allow regeneration flow to proceed usually
             # but let's follow pattern
             raise
+
+
+    def _get_index(self):
+        """Raw Pinecone index, shared by the writer threads."""
+        if self.index is None:
+            self.index = self.pc.Index(self.index_name, pool_threads=int(os.getenv("VDB_UPSERT_CONCURRENCY", "4")))
+        return self.index
+
+
+    def _upsert_vectors(self, vectors: list, namespace: str = ""):
+        """vectors: [{"id", "values", "metadata"}], the chunk text in metadata["text"] (langchain layout)."""
+        self._get_index().upsert(vectors=vectors, namespace=namespace)
+
+
+    def _delete_vectors(self, ids: list, namespace: str = ""):
+        self._get_index().delete(ids=ids, namespace=namespace)
+
+
+    def _fetch_vectors(self, ids: list, namespace: str = "") -> dict:
+        """id -> (text, metadata) of the stored vectors, missing ids are left out."""
+        records = {}
+        try:
+            for start in range(0, len(ids), 100):
+                response = self._get_index().fetch(ids=ids[start:start + 100], namespace=namespace)
+                for vector_id, vector in response.vectors.items():
+                    metadata = dict(vector.metadata or {})
+                    records[vector_id] = (metadata.pop("text", ""), metadata)
+
+        except Exception as e:
+            logging.error(f"Error fetching pinecone vectors: {e}")
+            raise
+
+        return records
+
+
+    def _query_vectors(self, embedding: list, k: int = 4, namespace: str = None, filter: dict = None) -> list:
+        """[(Document, score)] most similar to embedding, filter on metadata ({"source": "google_drive"})."""
+        try:
+            return self._get_vector_store().similarity_search_by_vector_with_score(
+                embedding, k=k, filter=self._to_pinecone_filter(filter), namespace=namespace or None)
+
+        except Exception as e:
+            logging.error(f"Error querying pinecone: {e}")
+            raise
+
+
+    async def _aquery_vectors(self, embedding: list, k: int = 4, namespace: str = None, filter: dict = None) -> list:
+        # langchain's async path opens and closes a PineconeAsyncio client per query (new connection + TLS
+        # handshake every time): the pooled keep-alive sync index runs off the event loop instead
+        return await asyncio.to_thread(self._query_vectors, embedding, k, namespace, filter)
+
+
+    def _to_pinecone_filter(self, filter: dict = None):
+        if not filter:
+            return None
+        return {key: {"$in": list(value)} if isinstance(value, (list, tuple)) else {"$eq": value}
+                for key, value in filter.items()}
+
+
+    def _health(self) -> dict:
+        start = time.perf_counter()
+        try:
+            stats = self._get_index().describe_index_stats()
+            return {"backend": "pinecone", "ok": True, "vectors": stats.total_vector_count,
+                    "latency_ms": (time.perf_counter() - start) * 1000}
+        except Exception as e:
+            logging.warning(f"Pinecone health check failed: {e}")
+            return {"backend": "pinecone", "ok": False, "error": str(e),
+                    "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+    def _warm_up(self):
+        """Opens the connection pool ahead of the first query."""
+        self._get_index().describe_index_stats()
+
+
+    def _get_namespace(self) -> str:
+        """Namespace readers must query right now."""
+        return self.alias._get_namespace(self.index_name)
+
+
+    def _count_vectors(self, namespace: str = "") -> int:
+        try:
+            stats = self.pc.Index(self.index_name).describe_index_stats()
+            namespaces = stats.namespaces or {}
+            # The default namespace is reported as "" or "__default__" depending on the API version
+            names = [namespace] if namespace else ["", "__default__"]
+            return sum(namespaces[name].vector_count for name in names if name in namespaces)
+
+        except Exception as e:
+            logging.error(f"Error counting pinecone vectors: {e}")
+            raise
+
+
+    def _delete_namespace(self, namespace: str):
+        try:
+            self.pc.Index(self.index_name).delete(delete_all=True, namespace=namespace)
+            logging.info(f"Deleted namespace '{namespace}' from Pinecone index: {self.index_name}")
+
+        except Exception as e:
+            logging.error(f"Error deleting pinecone namespace: {e}")
+            raise
@@ -0,0 +1,47 @@
+from typing import Dict, List, Optional, Protocol, Tuple, runtime_checkable
+from langchain_core.documents import Document
+
+
+@runtime_checkable
+class VectorStore(Protocol):
+    """
+    What UpdateVectorDB, VectorDBWriter and NodeRetrieve need from a vector store backend.
+    Implemented by PineconeVectorDB, AzureVectorStore and LocalVectorDB, built by _get_vector_db.
+
+    Vectors use the Pinecone layout: {"id", "values", "metadata"} with the chunk text in metadata["text"].
+    namespace "" is the default namespace; readers resolve the live one with _get_namespace (blue/green alias).
+    Filters are equality filters on metadata keys: {"source": "google_drive"}, a list means any of the values.
+    """
+
+    index_name: str
+
+    def _create_vector_store_index(self) -> None: ...
+
+    def _get_namespace(self) -> str: ...
+
+    def _upsert_vectors(self, vectors: List[Dict], namespace: str = "") -> None: ...
+
+    def _delete_vectors(self, ids: List[str], namespace: str = "") -> None: ...
+
+    def _fetch_vectors(self, ids: List[str], namespace: str = "") -> Dict[str, Tuple[str, Dict]]: ...
+
+    def _query_vectors(self, embedding: List[float], k: int = 4, namespace: Optional[str] = None,
+                       filter: Optional[Dict] = None) -> List[Tuple[Document, float]]: ...
+
+    async def _aquery_vectors(self, embedding: List[float], k: int = 4, namespace: Optional[str] = None,
+                              filter: Optional[Dict] = None) -> List[Tuple[Document, float]]: ...
+
+    def _count_vectors(self, namespace: str = "") -> int: ...
+
+    def _delete_namespace(self, namespace: str) -> None: ...
+
+    def _health(self) -> Dict: ...
+
+    def _warm_up(self) -> None: ...
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
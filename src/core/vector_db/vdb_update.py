@@ -1,14 +1,25 @@
+import os
+import time
+import hashlib
 import logging
+import itertools
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from langchain_core.documents import Document
 from src.core.llm.llm_openai import LLMOpenAI
-from src.core.vector_db.vdb_pinecone import PineconeVectorDB
-from langchain_text_splitters import CharacterTextSplitter
+from src.core.vector_db.vdb_factory import _get_vector_db, _get_query_vector_db
+from src.core.vector_db.vdb_index_version import IndexVersion
+from src.core.vector_db.vdb_manifest import VectorDBManifest
+from src.core.vector_db.vdb_writer import VectorDBWriter
+from src.core.vector_db.vdb_chunker import TokenChunker
+from src.core.vector_db.vdb_bm25 import BM25Index
 from src.core.database.azure_storage_blob import AzureStorageBlobDatabase
 from src.core.database.google_drive import GoogleDriveDatabase
 from src.core.database.local_file_system import LocalFileSystemDatabase
 
 class UpdateVectorDB:
     
-    def __init__(self, index_name: str, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, index_name: str, chunk_tokens: int = None, chunk_overlap_tokens: int = None, backend: str = None):
         # Getting pdf documents from Azure Blob Storage / Google Drive / Local
         self.azure_storage_blob_db = AzureStorageBlobDatabase()
         self.google_drive_db = GoogleDriveDatabase()
@@ -18,102 +29,419 @@ class UpdateVectorDB:
         self.llmOpenAI = LLMOpenAI()
         self.embeddingOpenAI = self.llmOpenAI._get_embedding()
 
-        # Setting up Pinecone Vector Store
+        # Setting up Vector Store (Pinecone, Azure AI Search or the local index, see VECTOR_DB_BACKEND)
         self.index_name = index_name
-        self.vector_store_model = PineconeVectorDB(embedding=self.embeddingOpenAI, 
-                                                         index_name=self.index_name)
+        self.vector_store_model = _get_vector_db(embedding=self.embeddingOpenAI,
+                                                 index_name=self.index_name,
+                                                 backend=backend)
 
-        # Setting up text splitter
-        self.text_splitter = CharacterTextSplitter(chunk_size=chunk_size, 
-                                                   chunk_overlap=chunk_overlap)
+        # Bumped after every upload, invalidates the semantic answer cache
+        self.index_version = IndexVersion()
+        self.version_index_names = self._get_version_index_names(backend)
 
+        # Full rebuilds go to a new namespace and flip the alias when complete (no empty index for readers)
+        self.blue_green = os.getenv("VDB_BLUE_GREEN", "true").lower() == "true"
+        self.blue_green_verify_timeout = float(os.getenv("VDB_BLUE_GREEN_VERIFY_TIMEOUT", "120"))
 
-    def _azure_upload_vector_store(self, name_folder: str):
+        # Setting up chunker (tokens of the embedding model, VDB_CHUNK_TOKENS / VDB_CHUNK_OVERLAP_TOKENS by default)
+        self.chunker = TokenChunker(chunk_tokens=chunk_tokens,
+                                    chunk_overlap_tokens=chunk_overlap_tokens,
+                                    model=self.llmOpenAI.embedding_model)
+
+
+    def _azure_upload_vector_store(self, name_folder: str, full_rebuild: bool = False):
         # NOTE: Keeping method name for compatibility if called elsewhere, but logic is Pinecone now
         # Ideally should rename to _upload_to_vector_store generic
         try:
-            self.vector_store_model._delete_vector_store_index()
-            self.vector_store_model._create_vector_store_index()
+            full_rebuild = full_rebuild or self._needs_full_rebuild()
+            if not full_rebuild:
+                self._reconcile_bm25()
+            # Incremental runs do not even download the blobs whose ETag is already indexed
+            known_versions = None if full_rebuild else self._get_known_versions(origin="azure_blob")
+            docs_loaded = self.azure_storage_blob_db._iter_pdfs_blob(name_folder=name_folder,
+                                                                     known_versions=known_versions)
 
-            docs_loaded = self.azure_storage_blob_db._load_pdfs_blob(name_folder=name_folder)
+            first_doc = next(docs_loaded, None)
+            removed_source_ids = self.azure_storage_blob_db._get_removed_source_ids()
 
-            if not docs_loaded:
-                logging.warning(f"No documents found in folder '{name_folder}'")
+            if first_doc is None and not removed_source_ids:
+                if not self.azure_storage_blob_db.listing or not self.azure_storage_blob_db.listing["listed_source_ids"]:
+                    logging.warning(f"No documents found in folder '{name_folder}'")
+                else:
+                    logging.info(f"No changes in folder '{name_folder}' since the last sync")
                 return
-            
-            docs = self.text_splitter.split_documents(docs_loaded)
-            vector_store = self.vector_store_model._get_vector_store()
 
-            vector_store.add_texts(
-                texts=[doc.page_content for doc in docs],
-                metadatas = [{
-                    "name": doc.metadata.get("name", ""),
-                    "page_number": str(doc.metadata.get("page_number", "")),
-                    "url": doc.metadata.get("url", ""),
-                } for doc in docs])
+            if first_doc is not None:
+                docs_loaded = itertools.chain([first_doc], docs_loaded)
+
+            total_upserted, total_deleted = self._update_vector_store(docs_loaded, origin="azure_blob", full_rebuild=full_rebuild,
+                                                                      get_removed_source_ids=self.azure_storage_blob_db._get_removed_source_ids)
 
-            logging.info(f"Documents added to Pinecone successfully. Total documents: {len(docs)}")
+            logging.info(f"Documents synced to Pinecone successfully. Upserted: {total_upserted}, deleted: {total_deleted}")
 
         except Exception as e:
             logging.error(f"Error uploading to Pinecone: {e}")
             raise
 
 
-    def _local_upload_vector_store(self, directory_path: str):
+    def _local_upload_vector_store(self, directory_path: str, full_rebuild: bool = False):
         try:
-            self.vector_store_model._delete_vector_store_index()
-            self.vector_store_model._create_vector_store_index()
+            full_rebuild = full_rebuild or self._needs_full_rebuild()
+            if not full_rebuild:
+                self._reconcile_bm25()
+            # Incremental runs do not even open the files whose mtime and size are already indexed
+            known_versions = None if full_rebuild else self._get_known_versions(origin="local_filesystem")
+            docs_loaded = self.local_fs_db._iter_pdfs_local(directory_path=directory_path,
+                                                            known_versions=known_versions)
 
-            docs_loaded = self.local_fs_db._load_pdfs_local(directory_path=directory_path)
+            first_doc = next(docs_loaded, None)
+            removed_source_ids = self.local_fs_db._get_removed_source_ids()
 
-            if not docs_loaded:
-                logging.warning(f"No documents found in directory '{directory_path}'")
+            if first_doc is None and not removed_source_ids:
+                if not self.local_fs_db.listing or not self.local_fs_db.listing["listed_source_ids"]:
+                    logging.warning(f"No documents found in directory '{directory_path}'")
+                else:
+                    logging.info(f"No changes in directory '{directory_path}' since the last sync")
                 return
-            
-            docs = self.text_splitter.split_documents(docs_loaded)
-            vector_store = self.vector_store_model._get_vector_store()
 
-            vector_store.add_texts(
-                texts=[doc.page_content for doc in docs],
-                metadatas = [{
-                    "name": doc.metadata.get("name", ""),
-                    "page_number": str(doc.metadata.get("page_number", "")),
-                    "url": doc.metadata.get("url", ""),
-                    "source": "local_filesystem"
-                } for doc in docs])
+            if first_doc is not None:
+                docs_loaded = itertools.chain([first_doc], docs_loaded)
 
-            logging.info(f"Documents from Local Directory added to Pinecone successfully. Total documents: {len(docs)}")
+            total_upserted, total_deleted = self._update_vector_store(docs_loaded, origin="local_filesystem", full_rebuild=full_rebuild,
+                                                                      get_removed_source_ids=self.local_fs_db._get_removed_source_ids)
+
+            logging.info(f"Documents from Local Directory synced to Pinecone successfully. Upserted: {total_upserted}, deleted: {total_deleted}")
 
         except Exception as e:
             logging.error(f"Error uploading from Local Directory to Vector Store: {e}")
             raise
 
-    def _drive_upload_vector_store(self, folder_id: str):
+    def _drive_upload_vector_store(self, folder_id: str, full_rebuild: bool = False, progress_callback=None):
         try:
-            self.vector_store_model._delete_vector_store_index()
-            self.vector_store_model._create_vector_store_index()
+            full_rebuild = full_rebuild or self._needs_full_rebuild()
+            if not full_rebuild:
+                self._reconcile_bm25()
+            # Note: _iter_files_drive handles pdfs, images, and videos, recursively and lazily.
+            # Incremental runs only list the files changed since the last committed sync.
+            docs_loaded = self.google_drive_db._iter_files_drive(folder_id=folder_id,
+                                                                 progress_callback=progress_callback,
+                                                                 changes_only=not full_rebuild,
+                                                                 changes_key=f"{self.index_name}_{folder_id}")
 
-            # Note: _load_files_drive now handles pdfs, images, and videos
-            docs_loaded = self.google_drive_db._load_files_drive(folder_id=folder_id)
+            first_doc = next(docs_loaded, None)
+            removed_source_ids = self.google_drive_db._get_removed_source_ids()
 
-            if not docs_loaded:
-                logging.warning(f"No documents found in Drive folder '{folder_id}'")
+            if first_doc is None and not removed_source_ids:
+                if removed_source_ids is None:
+                    logging.warning(f"No documents found in Drive folder '{folder_id}'")
+                else:
+                    logging.info(f"No changes in Drive folder '{folder_id}' since the last sync")
+                    self.google_drive_db._commit_changes_token()
                 return
-            
-            docs = self.text_splitter.split_documents(docs_loaded)
-            vector_store = self.vector_store_model._get_vector_store()
 
-            vector_store.add_texts(
-                texts=[doc.page_content for doc in docs],
-                metadatas = [{
-                    "name": doc.metadata.get("name", ""),
-                    "page_number": str(doc.metadata.get("page_number", "")),
-                    "url": doc.metadata.get("url", ""),
-                    "source": "google_drive"
-                } for doc in docs])
+            if first_doc is not None:
+                docs_loaded = itertools.chain([first_doc], docs_loaded)
+
+            total_upserted, total_deleted = self._update_vector_store(docs_loaded, origin="google_drive", full_rebuild=full_rebuild,
+                                                                      get_removed_source_ids=self.google_drive_db._get_removed_source_ids,
+                                                                      get_failed_source_ids=self.google_drive_db._get_failed_source_ids)
 
-            logging.info(f"Documents from Drive added to Pinecone successfully. Total documents: {len(docs)}")
+            # Only now (and only without failed files), a failed sync lists the same changes again next time
+            self.google_drive_db._commit_changes_token()
+
+            logging.info(f"Documents from Drive synced to Pinecone successfully. Upserted: {total_upserted}, deleted: {total_deleted}")
 
         except Exception as e:
             logging.error(f"Error uploading from Drive to Pinecone: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+#region Incremental sync
+    def _needs_full_rebuild(self) -> bool:
+        """
+        True when the live namespace has vectors but no manifest, e.g. an index uploaded before incremental sync:
+        its vectors have random ids nobody tracks, an incremental sync would add a second copy of every chunk.
+        """
+        live_namespace = self.vector_store_model._get_namespace()
+        if VectorDBManifest(index_name=self.vector_store_model.index_name, namespace=live_namespace).sources:
+            return False
+
+        self.vector_store_model._create_vector_store_index()
+        count = self.vector_store_model._count_vectors(live_namespace)
+        if count:
+            logging.warning(f"Namespace '{live_namespace}' has {count} vectors but no manifest, running a full rebuild")
+            return True
+        return False
+
+
+    def _get_known_versions(self, origin: str) -> Dict[str, str]:
+        live_namespace = self.vector_store_model._get_namespace()
+        # The manifest is the source of truth, BM25 is brought in line with it by _reconcile_bm25
+        return VectorDBManifest(index_name=self.vector_store_model.index_name, namespace=live_namespace)._get_versions(origin=origin, chunker=self.chunker._get_signature())
+
+
+    def _reconcile_bm25(self):
+        """
+        Brings the BM25 index of the live namespace in line with its manifest (BM25 database lost, or indexed before
+        BM25 existed): missing sources are rebuilt from the chunks stored in the vector store, sources the
+        manifest no longer has are dropped. Nothing is downloaded, parsed nor embedded again.
+        """
+        namespace = self.vector_store_model._get_namespace()
+        manifest = VectorDBManifest(index_name=self.vector_store_model.index_name, namespace=namespace)
+        bm25 = self._get_bm25(namespace)
+        bm25_source_ids = set(bm25._get_source_ids())
+        manifest_source_ids = set(manifest._get_source_ids())
+
+        missing = sorted(manifest_source_ids - bm25_source_ids)
+        stale = bm25_source_ids - manifest_source_ids
+        if not missing and not stale:
+            return
+
+        logging.info(f"Rebuilding BM25 of namespace '{namespace}': {len(missing)} missing sources, {len(stale)} stale")
+        for source_id in stale:
+            bm25._remove_source(source_id)
+
+        for position, source_id in enumerate(missing, start=1):
+            chunk_ids = manifest._get_source(source_id).get("chunk_ids", [])
+            records = self.vector_store_model._fetch_vectors(chunk_ids, namespace)
+            if len(records) != len(chunk_ids):
+                # Left out: _sync_documents re-chunks the source the next time it is listed
+                logging.warning(f"Source {source_id}: {len(chunk_ids) - len(records)} chunks not in the vector store, BM25 not rebuilt")
+                continue
+            bm25._set_source(source_id, [(chunk_id, *records[chunk_id]) for chunk_id in chunk_ids])
+            if position % 100 == 0:
+                bm25._flush()
+
+        bm25._flush()
+
+
+    def _get_version_index_names(self, backend: str = None) -> List[str]:
+        """
+        Indexes whose version a sync bumps: this one and, when the chat queries another backend
+        (VECTOR_DB_QUERY_BACKEND), the queried one, which is what the semantic answer cache keys on.
+        """
+        index_names = [self.vector_store_model.index_name]
+
+        write_backend = (backend or os.getenv("VECTOR_DB_BACKEND", "pinecone")).lower()
+        query_backend = (os.getenv("VECTOR_DB_QUERY_BACKEND") or write_backend).lower()
+        if query_backend != write_backend:
+            try:
+                query_index_name = _get_query_vector_db(embedding=self.embeddingOpenAI).index_name
+                if query_index_name not in index_names:
+                    index_names.append(query_index_name)
+            except Exception as e:
+                logging.warning(f"Could not resolve the '{query_backend}' query index, its answer cache is not invalidated: {e}")
+
+        return index_names
+
+
+    def _bump_index_version(self):
+        for index_name in self.version_index_names:
+            self.index_version._bump_version(index_name)
+
+
+    def _get_bm25(self, namespace: str) -> BM25Index:
+        return BM25Index(index_name=self.vector_store_model.index_name, namespace=namespace)
+
+
+    def _update_vector_store(self, docs_loaded: Iterable[Document], origin: str, full_rebuild: bool = False,
+                             get_removed_source_ids: Optional[Callable[[], Optional[List[str]]]] = None,
+                             get_failed_source_ids: Optional[Callable[[], List[str]]] = None):
+        self.vector_store_model._create_vector_store_index()
+        live_namespace = self.vector_store_model._get_namespace()
+
+        if not full_rebuild:
+            manifest = VectorDBManifest(index_name=self.vector_store_model.index_name, namespace=live_namespace)
+            return self._sync_documents(docs_loaded, origin, live_namespace, manifest, get_removed_source_ids, get_failed_source_ids)
+
+        if not self.blue_green:
+            # Clean slate in place: readers see an empty index until the upload finishes
+            self.vector_store_model._delete_namespace(live_namespace)
+            manifest = VectorDBManifest(index_name=self.vector_store_model.index_name, namespace=live_namespace)
+            manifest._clear()
+            self._get_bm25(live_namespace)._clear()
+            VectorDBWriter(self.vector_store_model, self.embeddingOpenAI, live_namespace)._clear_checkpoint()
+            return self._sync_documents(docs_loaded, origin, live_namespace, manifest)
+
+        # Blue/green: build a new namespace while readers keep using the live one
+        namespace = f"build-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        manifest = VectorDBManifest(index_name=self.vector_store_model.index_name, namespace=namespace)
+        manifest._clear()
+
+        try:
+            total_upserted, total_deleted = self._sync_documents(docs_loaded, origin, namespace, manifest)
+            self._promote_namespace(namespace, manifest)
+
+        except Exception:
+            if self.vector_store_model._get_namespace() != namespace:
+                # Not promoted: the live namespace was never touched, drop the half built one
+                logging.error(f"Blue/green rebuild into '{namespace}' failed, keeping '{live_namespace}' live")
+                try:
+                    self.vector_store_model._delete_namespace(namespace)
+                    manifest._delete()
+                    self._get_bm25(namespace)._delete()
+                    VectorDBWriter(self.vector_store_model, self.embeddingOpenAI, namespace)._clear_checkpoint()
+                except Exception as e:
+                    logging.warning(f"Could not clean up namespace '{namespace}': {e}")
+            raise
+
+        return total_upserted, total_deleted
+
+
+    def _promote_namespace(self, namespace: str, manifest: VectorDBManifest):
+        """Verifies the new namespace is complete, flips the alias and garbage collects the old one."""
+        expected = manifest._get_chunk_count()
+        deadline = time.time() + self.blue_green_verify_timeout
+
+        # Pinecone stats are eventually consistent, wait until every vector is visible
+        count = self.vector_store_model._count_vectors(namespace)
+        while count != expected:
+            if time.time() > deadline:
+                raise RuntimeError(f"Namespace '{namespace}' has {count} vectors, expected {expected}")
+            time.sleep(2)
+            count = self.vector_store_model._count_vectors(namespace)
+
+        previous = self.vector_store_model.alias._flip(self.vector_store_model.index_name, namespace)
+        self._bump_index_version()
+
+        if previous != namespace:
+            self.vector_store_model._delete_namespace(previous)
+            VectorDBManifest(index_name=self.vector_store_model.index_name, namespace=previous)._delete()
+            self._get_bm25(previous)._delete()
+
+
+    def _sync_documents(self, docs_loaded: Iterable[Document], origin: str, namespace: str, manifest: VectorDBManifest,
+                        get_removed_source_ids: Optional[Callable[[], Optional[List[str]]]] = None,
+                        get_failed_source_ids: Optional[Callable[[], List[str]]] = None):
+        """
+        Upserts only new/changed chunks of namespace and deletes the chunks of changed or removed sources.
+        docs_loaded is consumed lazily and must yield the pages of a source one after the other.
+
+        Chunks of several sources are written together by VectorDBWriter (batched, parallel, checkpointed);
+        a source enters the manifest once its chunks are upserted, so an interrupted run resumes where it stopped.
+
+        get_removed_source_ids is called once docs_loaded is exhausted: None means the listing was
+        complete (sources not seen are gone), a list means only changes were listed (delete just those).
+        Sources of get_failed_source_ids were listed but could not be loaded, they are never removed.
+        """
+        writer = VectorDBWriter(self.vector_store_model, self.embeddingOpenAI, namespace)
+        # Lexical side of hybrid retrieval, kept in step with the vectors
+        bm25 = self._get_bm25(namespace)
+        bm25_source_ids = set(bm25._get_source_ids())
+
+        total_upserted, total_deleted = 0, 0
+        seen_source_ids = set()
+        pending_sources = []
+
+        for source_id, source_docs in itertools.groupby(docs_loaded, key=self._get_source_id):
+            source_docs = list(source_docs)
+            if source_id in seen_source_ids:
+                logging.warning(f"Pages of source {source_id} are not consecutive, keeping only the last group")
+            seen_source_ids.add(source_id)
+
+            source_version = str(source_docs[0].metadata.get("source_version", ""))
+            indexed = manifest._get_source(source_id)
+
+            if (indexed and indexed.get("version") == source_version and source_version
+                    and indexed.get("chunker") == self.chunker._get_signature() and source_id in bm25_source_ids):
+                continue
+
+            docs = self.chunker._split_documents(source_docs)
+            chunk_ids = self._get_chunk_ids(source_id, docs)
+
+            old_ids = set(indexed.get("chunk_ids", [])) if indexed else set()
+            new_docs = [(chunk_id, doc) for chunk_id, doc in zip(chunk_ids, docs) if chunk_id not in old_ids]
+            removed_ids = list(old_ids - set(chunk_ids))
+
+            for chunk_id, doc in new_docs:
+                writer._add(chunk_id, doc.page_content, self._get_chunk_metadata(doc, origin))
+            bm25._set_source(source_id, [(chunk_id, doc.page_content, self._get_chunk_metadata(doc, origin))
+                                         for chunk_id, doc in zip(chunk_ids, docs)])
+            pending_sources.append((source_id, source_version, chunk_ids, len(new_docs), removed_ids))
+
+            if writer._should_flush():
+                self._commit_sources(writer, bm25, manifest, origin, pending_sources)
+
+            total_upserted += len(new_docs)
+            total_deleted += len(removed_ids)
+
+        self._commit_sources(writer, bm25, manifest, origin, pending_sources)
+
+        removed_source_ids = get_removed_source_ids() if get_removed_source_ids else None
+        if removed_source_ids is None:
+            # Complete listing: sources of this origin that are gone from the folder
+            removed_source_ids = [source_id for source_id in manifest._get_source_ids(origin=origin)
+                                  if source_id not in seen_source_ids]
+
+        failed_source_ids = set(get_failed_source_ids()) if get_failed_source_ids else set()
+        if failed_source_ids:
+            logging.warning(f"{len(failed_source_ids)} sources failed to load, their indexed chunks are kept")
+
+        for source_id in removed_source_ids:
+            indexed = manifest._get_source(source_id)
+            if (not indexed or indexed.get("origin") != origin or source_id in seen_source_ids
+                    or source_id in failed_source_ids):
+                continue
+
+            removed_ids = indexed.get("chunk_ids", [])
+            writer._delete(removed_ids)
+            bm25._remove_source(source_id)
+            bm25._flush()
+
+            manifest._remove_source(source_id)
+            manifest._save()
+
+            total_deleted += len(removed_ids)
+            logging.info(f"--> Removed source {source_id}: -{len(removed_ids)} chunks")
+
+        # A namespace being built is not live yet, its version is bumped on promotion
+        if (total_upserted or total_deleted) and namespace == self.vector_store_model._get_namespace():
+            self._bump_index_version()
+
+        writer._clear_checkpoint()
+        logging.info(f"Vector writer: {writer.upserted} vectors upserted ({writer.embedded_tokens} tokens embedded), "
+                     f"{writer.resumed} resumed from checkpoint")
+        logging.info(f"Chunk sizes (tokens): {self.chunker._get_stats()}")
+
+        return total_upserted, total_deleted
+
+
+    def _commit_sources(self, writer: VectorDBWriter, bm25: BM25Index, manifest: VectorDBManifest, origin: str, pending_sources: list):
+        """Writes the buffered chunks (vectors and BM25), then drops the outdated chunks and records the sources in the manifest."""
+        writer._flush()
+        bm25._flush()
+
+        for source_id, source_version, chunk_ids, upserted, removed_ids in pending_sources:
+            writer._delete(removed_ids)
+            manifest._set_source(source_id, origin, source_version, chunk_ids, chunker=self.chunker._get_signature())
+            logging.info(f"--> Synced source {source_id}: +{upserted} / -{len(removed_ids)} chunks")
+
+        if pending_sources:
+            manifest._save()
+        pending_sources.clear()
+
+
+    def _get_source_id(self, doc: Document) -> str:
+        return doc.metadata.get("source_id") or doc.metadata.get("url", "")
+
+
+    def _get_chunk_ids(self, source_id: str, docs: List[Document]) -> List[str]:
+        """Deterministic vector ids: hash of source, page and chunk content (+ repetition counter)."""
+        chunk_ids = []
+        seen = {}
+        for doc in docs:
+            key = f"{source_id}\x00{doc.metadata.get('page_number', '')}\x00{doc.page_content}"
+            seen[key] = seen.get(key, 0) + 1
+            chunk_ids.append(hashlib.sha1(f"{key}\x00{seen[key]}".encode("utf-8")).hexdigest())
+        return chunk_ids
+
+
+    def _get_chunk_metadata(self, doc: Document, origin: str) -> dict:
+        return {
+            "name": doc.metadata.get("name", ""),
+            "page_number": str(doc.metadata.get("page_number", "")),
+            "url": doc.metadata.get("url", ""),
+            "source": origin,
+            "source_id": doc.metadata.get("source_id", ""),
+        }
+#endregion
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import random
+import logging
+import openai
+from pathlib import Path
+from typing import Callable, Dict, List, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from src.core.vector_db.vdb_chunker import _get_encoding
+
+CHECKPOINT_DIR = Path("data/silver")
+
+class VectorDBWriter:
+    """
+    Ingestion writer used by UpdateVectorDB: buffers chunks, embeds them in token bounded batches
+    (several batches at a time) and upserts the vectors to the vector store in parallel requests.
+    Rate limits (429) and server errors (5xx) are retried with exponential backoff.
+
+    Every upserted batch is appended to a checkpoint file, so a failed run resumes without
+    embedding / upserting those chunks again. Chunk ids are content hashes, skipping them is safe.
+    """
+
+    def __init__(self, vector_store_model, embedding, namespace: str = "", checkpoint_dir: Path = None):
+        self.vector_store_model = vector_store_model
+        self.embedding = embedding
+        self.namespace = namespace
+
+        # OpenAI accepts up to 2048 inputs / 300k tokens per embeddings request
+        self.embed_batch_size = int(os.getenv("VDB_EMBED_BATCH_SIZE", "512"))
+        self.embed_batch_tokens = int(os.getenv("VDB_EMBED_BATCH_TOKENS", "100000"))
+        self.embed_concurrency = int(os.getenv("VDB_EMBED_CONCURRENCY", "4"))
+        # Pinecone recommends upserts of ~100 vectors (2MB max per request)
+        self.upsert_batch_size = int(os.getenv("VDB_UPSERT_BATCH_SIZE", "100"))
+        self.upsert_concurrency = int(os.getenv("VDB_UPSERT_CONCURRENCY", "4"))
+        self.max_retries = int(os.getenv("VDB_MAX_RETRIES", "5"))
+        self.retry_base_seconds = float(os.getenv("VDB_RETRY_BASE_SECONDS", "1"))
+
+        # Chunks buffered before embedding: enough to keep every embedding worker busy
+        self.flush_size = self.embed_batch_size * self.embed_concurrency
+
+        self.encoding = _get_encoding(getattr(embedding, "model", "text-embedding-3-small"))
+
+        checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else CHECKPOINT_DIR
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        suffix = f"_{namespace}" if namespace else ""
+        self.checkpoint_path = checkpoint_dir / f"vdb_checkpoint_{vector_store_model.index_name}{suffix}.jsonl"
+        self.done_ids = self._load_checkpoint()
+
+        self.pending: List[Tuple[str, str, Dict]] = []
+
+        # Metrics
+        self.upserted = 0
+        self.resumed = 0
+        self.embedded_tokens = 0
+
+
+    def _add(self, chunk_id: str, text: str, metadata: Dict):
+        if chunk_id in self.done_ids:
+            self.resumed += 1
+            return
+        self.pending.append((chunk_id, text, metadata))
+
+
+    def _should_flush(self) -> bool:
+        return len(self.pending) >= self.flush_size
+
+
+    def _flush(self) -> int:
+        """Embeds and upserts every buffered chunk. Returns the number of vectors written."""
+        if not self.pending:
+            return 0
+
+        pending, self.pending = self.pending, []
+        try:
+            batches = self._get_embedding_batches(pending)
+
+            with ThreadPoolExecutor(max_workers=self.embed_concurrency) as pool:
+                embedded = list(pool.map(
+                    lambda batch: self._with_retry(self.embedding.embed_documents, [text for _, text, _ in batch]),
+                    batches))
+
+            # The langchain Pinecone store reads the chunk text from the "text" metadata key
+            vectors = [
+                {"id": chunk_id, "values": values, "metadata": {**metadata, "text": text}}
+                for batch, batch_values in zip(batches, embedded)
+                for (chunk_id, text, metadata), values in zip(batch, batch_values)
+            ]
+            self._upsert(vectors)
+
+        except Exception as e:
+            logging.error(f"Error writing vectors to the vector store: {e}")
+            raise
+
+        return len(vectors)
+
+
+    def _get_embedding_batches(self, items: List[Tuple[str, str, Dict]]) -> List[List[Tuple[str, str, Dict]]]:
+        batches, batch, batch_tokens = [], [], 0
+        for item in items:
+            tokens = self._count_tokens(item[1])
+            if batch and (len(batch) >= self.embed_batch_size or batch_tokens + tokens > self.embed_batch_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(item)
+            batch_tokens += tokens
+            self.embedded_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+
+    def _count_tokens(self, text: str) -> int:
+        if self.encoding is None:
+            return len(text) // 3 + 1
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+    def _upsert(self, vectors: List[Dict]):
+        batches = [vectors[start:start + self.upsert_batch_size] for start in range(0, len(vectors), self.upsert_batch_size)]
+
+        # Parallel requests, each batch retried on its own
+        with ThreadPoolExecutor(max_workers=self.upsert_concurrency) as pool:
+            futures = [(batch, pool.submit(self._with_retry, self.vector_store_model._upsert_vectors, batch, self.namespace))
+                       for batch in batches]
+
+            for batch, future in futures:
+                future.result()
+                self._checkpoint([vector["id"] for vector in batch])
+                self.upserted += len(batch)
+
+
+    def _delete(self, ids: List[str]):
+        if not ids:
+            return
+        # Pinecone deletes at most 1000 ids per request
+        for start in range(0, len(ids), 1000):
+            self._with_retry(self.vector_store_model._delete_vectors, ids[start:start + 1000], self.namespace)
+
+
+    def _with_retry(self, fn: Callable, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = min(self.retry_base_seconds * 2 ** attempt, 60) * (0.5 + random.random())
+                logging.warning(f"Retrying {getattr(fn, '__name__', 'request')} in {delay:.1f}s after: {e}")
+                time.sleep(delay)
+
+
+    def _is_retryable(self, e: Exception) -> bool:
+        # openai errors carry status_code, pinecone errors carry status
+        status = getattr(e, "status_code", None) or getattr(e, "status", None)
+        if isinstance(status, int):
+            return status == 429 or status >= 500
+        return isinstance(e, (ConnectionError, TimeoutError, openai.APIConnectionError, Urllib3HTTPError))
+
+
+#region Checkpoint
+    def _checkpoint(self, ids: List[str]):
+        with self.checkpoint_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(ids) + "\n")
+        self.done_ids.update(ids)
+
+
+    def _load_checkpoint(self) -> Set[str]:
+        done_ids = set()
+        if not self.checkpoint_path.exists():
+            return done_ids
+
+        with self.checkpoint_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done_ids.update(json.loads(line))
+                except json.JSONDecodeError:
+                    # Last line of a run killed mid-write
+                    continue
+
+        if done_ids:
+            logging.info(f"Resuming from checkpoint {self.checkpoint_path}: {len(done_ids)} vectors already upserted")
+        return done_ids
+
+
+    def _clear_checkpoint(self):
+        """Called once the manifest records everything, the checkpoint is not needed anymore."""
+        self.done_ids = set()
+        if self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
+#endregion
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -1,23 +1,40 @@
+import os
 import logging
+from typing import List
 from langgraph.graph import END, START, StateGraph
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 from src.graph.state.graph_state import State
 from src.graph.nodes.node_chat import NodeChat
 from src.graph.nodes.node_crack import NodeCrack
 from src.graph.nodes.node_router import NodeRouter
 from src.graph.nodes.node_retrieve import NodeRetrieve
+from src.graph.nodes.node_rerank import NodeRerank
+from src.graph.nodes.node_router_retrieve import NodeRouterRetrieve
 from src.graph.nodes.node_chat_history import NodeChatHistory
 
 
 class GraphBuilder:
 
-    def __init__(self):
+    def __init__(self, speculative_retrieve: bool = None, rerank: bool = None):
+        # Router and retrieve run concurrently unless disabled
+        if speculative_retrieve is None:
+            speculative_retrieve = os.getenv("GRAPH_SPECULATIVE_RETRIEVE", "true").lower() == "true"
+        self.speculative_retrieve = speculative_retrieve
+
+        # Rerank stage between retrieve and chat unless disabled
+        if rerank is None:
+            rerank = os.getenv("GRAPH_RERANK", "true").lower() == "true"
+        self.rerank = rerank
+
         # Router
         self.node_router = NodeRouter()
 
-        # Retrieve
-        self.node_retrieve = NodeRetrieve()
+        # Retrieve (over-fetches candidates for the rerank stage)
+        self.node_rerank = NodeRerank() if self.rerank else None
+        self.node_retrieve = NodeRetrieve(top_k=self.node_rerank.candidates if self.rerank else None)
+        self.node_router_retrieve = NodeRouterRetrieve(node_router=self.node_router,
+                                                       node_retrieve=self.node_retrieve)
 
         # Nodes Chat
         self.node_chat = NodeChat()
@@ -30,23 +47,48 @@ class GraphBuilder:
             builder = StateGraph(State)
 
             # region ADD NODES 
-            builder.add_node("router", self.node_router.run)
-            builder.add_node("retrieve", self.node_retrieve.run)
-            builder.add_node("chat", self.node_chat.run)
-            builder.add_node("crack", self.node_crack.run)
-            builder.add_node("chat_history", self.node_chat_history.run)
+            # Sync "run" for invoke, native async "arun" for ainvoke
+            builder.add_node("chat", RunnableLambda(self.node_chat.run, afunc=self.node_chat.arun))
+            builder.add_node("crack", RunnableLambda(self.node_crack.run, afunc=self.node_crack.arun))
+            builder.add_node("chat_history", RunnableLambda(self.node_chat_history.run, afunc=self.node_chat_history.arun))
+
+            if self.speculative_retrieve:
+                builder.add_node("router_retrieve", RunnableLambda(self.node_router_retrieve.run, afunc=self.node_router_retrieve.arun))
+            else:
+                builder.add_node("router", RunnableLambda(self.node_router.run, afunc=self.node_router.arun))
+                builder.add_node("retrieve", RunnableLambda(self.node_retrieve.run, afunc=self.node_retrieve.arun))
+
+            if self.rerank:
+                builder.add_node("rerank", RunnableLambda(self.node_rerank.run, afunc=self.node_rerank.arun))
             # endregion
 
-            builder.set_entry_point("router")
+            # Retrieved documents go through the rerank stage before the chat
+            after_retrieve = "rerank" if self.rerank else "chat"
 
-            builder.add_conditional_edges("router",
-                                          self._router_conditional,
-                                          {
-                                              "RETRIEVE": "retrieve",
-                                              "CRACK": "crack",
-                                          })
-            
-            builder.add_edge("retrieve", "chat")
+            if self.speculative_retrieve:
+                # Documents are already retrieved when the router decides
+                builder.set_entry_point("router_retrieve")
+
+                builder.add_conditional_edges("router_retrieve",
+                                              self._router_conditional,
+                                              {
+                                                  "RETRIEVE": after_retrieve,
+                                                  "CRACK": "crack",
+                                              })
+            else:
+                builder.set_entry_point("router")
+
+                builder.add_conditional_edges("router",
+                                              self._router_conditional,
+                                              {
+                                                  "RETRIEVE": "retrieve",
+                                                  "CRACK": "crack",
+                                              })
+
+                builder.add_edge("retrieve", after_retrieve)
+
+            if self.rerank:
+                builder.add_edge("rerank", "chat")
 
             builder.add_edge("chat", "chat_history")
             builder.add_edge("crack", "chat_history")
@@ -76,12 +118,13 @@ class GraphBuilder:
             raise
 
     
-    async def run(self, user_question:str, user_id:str, alexandria_type_learning: int):
+    async def run(self, user_question:str, user_id:str, alexandria_type_learning: int, user_question_embedding: List[float] = None):
         try:
             initial_state: State = {
                 "user_id": user_id,
                 "user_question": user_question,
                 "user_question_validation": False,
+                "user_question_embedding": user_question_embedding,
 
                 "chatbot_answer": None,
                 "node_retrieve_docs": None,
@@ -97,6 +140,42 @@ class GraphBuilder:
             raise
         
         return final_state
+
+
+    async def astream(self, user_question:str, user_id:str, alexandria_type_learning: int, user_question_embedding: List[float] = None):
+        """
+        Runs the graph in streaming answer mode.
+        Yields ("token", str) while the chat node generates and ("state", State) once at the end.
+        """
+        try:
+            initial_state: State = {
+                "user_id": user_id,
+                "user_question": user_question,
+                "user_question_validation": False,
+                "user_question_embedding": user_question_embedding,
+
+                "chatbot_answer": None,
+                "chatbot_answer_stream": True,
+                "node_retrieve_docs": None,
+                "alexandria_type_learning": alexandria_type_learning,
+            }
+
+            config = RunnableConfig()
+            final_state = None
+
+            async for mode, chunk in self.graph.astream(initial_state,
+                                                        config=config,
+                                                        stream_mode=["custom", "values"]):
+                if mode == "custom" and "chatbot_answer_token" in chunk:
+                    yield "token", chunk["chatbot_answer_token"]
+                elif mode == "values":
+                    final_state = chunk
+
+        except Exception as e:
+            logging.error(f"Error streaming graph: {e}")
+            raise
+
+        yield "state", final_state
     
 #    _____
 #   ( \/ @\____
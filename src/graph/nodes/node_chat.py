@@ -1,13 +1,22 @@
 import random
 import logging
+from langgraph.config import get_stream_writer
 from src.graph.state.graph_state import State
 from src.core.llm.llm_openai import LLMOpenAI
+from src.core.llm.context_budgeter import ContextBudgeter
+from src.core.llm.prompt_registry import PromptRegistry
 
 class NodeChat:
 
     def __init__(self):
         self.llmOpenAI = LLMOpenAI()
 
+        # Deduplicated, token bounded context (CHAT_CONTEXT_BUDGET_TOKENS)
+        self.context_budgeter = ContextBudgeter(model=self.llmOpenAI.chat_model)
+
+        # Prompts loaded and validated once, served from memory
+        self.prompt_registry = PromptRegistry._get_instance()
+
 
     def run(self, state:State):
         try:
@@ -15,28 +24,24 @@ class NodeChat:
             retrieve_docs = state.get("node_retrieve_docs", [])
             alexandria_type_learning = state.get("alexandria_type_learning", 0)
 
-            combined_content = "\n".join([doc.page_content for doc in retrieve_docs])
+            combined_content, context_stats = self.context_budgeter._build_context(question, retrieve_docs)
 
 
             print("Alexandria Type Learning in NodeChat:", alexandria_type_learning)
 
-            if alexandria_type_learning == 1:
-                with open("src/prompts/node_chat_kinestesico.txt", "r") as f:
-                    prompt_template = f.read()
-
-            elif alexandria_type_learning == 2:
-                with open("src/prompts/node_chat_visual.txt", "r") as f:
-                    prompt_template = f.read()
-            else:
-                # Default fallback
-                with open("src/prompts/node_chat_visual.txt", "r") as f:
-                    prompt_template = f.read()
-            
+            prompt_name = self._get_prompt_name(alexandria_type_learning)
+            prompt_template = self.prompt_registry._get(prompt_name)
+            input_message = self.prompt_registry._format("node_chat_input", context=combined_content, question=question)
+            self._record_context_metrics(state, context_stats, prompt_template, input_message)
 
+            usage = {}
             chat_response = self.llmOpenAI._get_chat_response_instructions(
                 instructions_message=prompt_template,
-                input_message=f"Basado en la siguiente información: {combined_content}, responde a la pregunta: {question}",
+                input_message=input_message,
+                prompt_cache_key=self.prompt_registry._get_cache_key(prompt_name),
+                metrics=usage,
             )
+            self._record_usage_metrics(state, usage)
 
             state["chatbot_answer"] = chat_response.response
             state["chatbot_answer_visualization"] = self._select_visualization(retrieve_docs)
@@ -46,7 +51,87 @@ class NodeChat:
             raise
 
         return dict(state)
-    
+
+
+    async def arun(self, state:State):
+        try:
+            question = state.get("user_question", "")
+            retrieve_docs = state.get("node_retrieve_docs", [])
+            alexandria_type_learning = state.get("alexandria_type_learning", 0)
+
+            combined_content, context_stats = self.context_budgeter._build_context(question, retrieve_docs)
+
+            prompt_name = self._get_prompt_name(alexandria_type_learning)
+            prompt_template = self.prompt_registry._get(prompt_name)
+            input_message = self.prompt_registry._format("node_chat_input", context=combined_content, question=question)
+            self._record_context_metrics(state, context_stats, prompt_template, input_message)
+            prompt_cache_key = self.prompt_registry._get_cache_key(prompt_name)
+            usage = {}
+
+            if state.get("chatbot_answer_stream", False):
+                # Tokens go out through the LangGraph "custom" stream, the full answer stays in the state
+                stream_writer = get_stream_writer()
+                answer_tokens = []
+
+                async for token in self.llmOpenAI._astream_chat_response_instructions(
+                    instructions_message=prompt_template,
+                    input_message=input_message,
+                    prompt_cache_key=prompt_cache_key,
+                    metrics=usage,
+                ):
+                    answer_tokens.append(token)
+                    stream_writer({"chatbot_answer_token": token})
+
+                state["chatbot_answer"] = "".join(answer_tokens)
+            else:
+                chat_response = await self.llmOpenAI._aget_chat_response_instructions(
+                    instructions_message=prompt_template,
+                    input_message=input_message,
+                    prompt_cache_key=prompt_cache_key,
+                    metrics=usage,
+                )
+
+                state["chatbot_answer"] = chat_response.response
+
+            self._record_usage_metrics(state, usage)
+
+            state["chatbot_answer_visualization"] = self._select_visualization(retrieve_docs)
+
+        except Exception as e:
+            logging.error(f"Error in NodeChat arun: {e}")
+            raise
+
+        return dict(state)
+
+
+    def _record_context_metrics(self, state:State, context_stats: dict, prompt_template: str, input_message: str):
+        metrics = dict(state.get("node_metrics") or {})
+        metrics.update(context_stats)
+        metrics["prompt_tokens_estimate"] = (self.context_budgeter._count_tokens(prompt_template)
+                                             + self.context_budgeter._count_tokens(input_message))
+        state["node_metrics"] = metrics
+
+        logging.info(f"Chat context: {context_stats['context_tokens_in']} -> {context_stats['context_tokens']} tokens "
+                     f"({context_stats['context_chunks']} chunks), prompt ~{metrics['prompt_tokens_estimate']} tokens")
+
+
+    def _record_usage_metrics(self, state:State, usage: dict):
+        """Billed tokens of the chat call, cached_tokens is the prefix served from the OpenAI prompt cache."""
+        metrics = dict(state.get("node_metrics") or {})
+        for key, value in usage.items():
+            metrics[f"chat_{key}"] = value
+        state["node_metrics"] = metrics
+
+        logging.info(f"Chat usage: {usage}, process totals: {self.llmOpenAI._get_usage_stats()}")
+
+
+    def _get_prompt_name(self, alexandria_type_learning: int) -> str:
+        if alexandria_type_learning == 1:
+            return "node_chat_kinestesico"
+
+        # 2 = visual, also the default fallback
+        return "node_chat_visual"
+
 
     def _select_visualization(self, retrieve_docs: list):
         try:
@@ -1,14 +1,24 @@
+import asyncio
 import logging
 from src.graph.state.graph_state import State
 from src.core.database.json_chat_history import JsonChatHistory
-from src.core.database.google_sheets_history import GoogleSheetsHistory
+from src.core.database.sqlite_chat_history import SqliteChatHistory
+from src.core.database.sheets_log_shipper import SheetsLogShipper
 import os
 import streamlit as st
 
 class NodeChatHistory:
 
     def __init__(self):
-        pass
+        # "sqlite" (default, indexed appends) or "json" (legacy whole-file rewrite)
+        if os.getenv("CHAT_HISTORY_BACKEND", "sqlite").lower() == "json":
+            self.chat_history = JsonChatHistory()
+        else:
+            self.chat_history = SqliteChatHistory()
+
+        # Google Sheets logs are shipped in background batches, the node only enqueues
+        spreadsheet_id = self._get_spreadsheet_id()
+        self.log_shipper = SheetsLogShipper._get_instance(spreadsheet_id) if spreadsheet_id else None
 
 
     def run(self, state:State):
@@ -17,17 +27,7 @@ class NodeChatHistory:
             user_question = state.get("user_question", "")
             chatbot_answer = state.get("chatbot_answer", "")
 
-            json_chat_history = JsonChatHistory()
-            json_chat_history.add_responses(user_id, user_question, chatbot_answer)
-
-            # --- Log to Google Sheets ---
-            spreadsheet_id = os.getenv("CHAT_LOGS_SPREADSHEET_ID") or st.secrets.get("CHAT_LOGS_SPREADSHEET_ID")
-            if spreadsheet_id:
-                try:
-                    gs_history = GoogleSheetsHistory()
-                    gs_history.append_log(spreadsheet_id, user_id, user_question, chatbot_answer)
-                except Exception as e:
-                    logging.error(f"Failed to log to Google Sheets: {e}")
+            self._save_history(user_id, user_question, chatbot_answer)
 
         except Exception as e:
             logging.error(f"Error in NodeChatHistory run: {e}")
@@ -35,6 +35,42 @@ class NodeChatHistory:
 
         return dict(state)
 
+
+    async def arun(self, state:State):
+        try:
+            user_id = state.get("user_id", "")
+            user_question = state.get("user_question", "")
+            chatbot_answer = state.get("chatbot_answer", "")
+
+            # File and Sheets clients are blocking, run them off the event loop
+            await asyncio.to_thread(self._save_history, user_id, user_question, chatbot_answer)
+
+        except Exception as e:
+            logging.error(f"Error in NodeChatHistory arun: {e}")
+            raise
+
+        return dict(state)
+
+
+    def _save_history(self, user_id: str, user_question: str, chatbot_answer: str):
+        self.chat_history.add_responses(user_id, user_question, chatbot_answer)
+
+        # --- Log to Google Sheets ---
+        if self.log_shipper is not None:
+            try:
+                self.log_shipper._enqueue(user_id, user_question, chatbot_answer)
+            except Exception as e:
+                logging.error(f"Failed to log to Google Sheets: {e}")
+
+
+    def _get_spreadsheet_id(self):
+        try:
+            return os.getenv("CHAT_LOGS_SPREADSHEET_ID") or st.secrets.get("CHAT_LOGS_SPREADSHEET_ID")
+        except Exception as e:
+            # No secrets file: Sheets logging disabled
+            logging.warning(f"Chat logs spreadsheet not configured: {e}")
+            return None
+
 #    _____
 #   ( \/ @\____
 #   /           O
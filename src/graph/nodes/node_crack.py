@@ -1,4 +1,5 @@
 import logging
+from langgraph.config import get_stream_writer
 from src.graph.state.graph_state import State
 
 class NodeCrack:
@@ -17,6 +18,15 @@ class NodeCrack:
 
         return dict(state)
 
+
+    async def arun(self, state:State):
+        state = self.run(state)
+
+        if state.get("chatbot_answer_stream", False):
+            get_stream_writer()({"chatbot_answer_token": state["chatbot_answer"]})
+
+        return state
+
 #    _____
 #   ( \/ @\____
 #   /           O
@@ -0,0 +1,76 @@
+import os
+import time
+import asyncio
+import logging
+from typing import List
+from langchain_core.documents import Document
+from src.graph.state.graph_state import State
+from src.core.llm.llm_openai import LLMOpenAI
+from src.core.llm.reranker import Reranker
+from src.core.vector_db.vdb_chunker import _get_encoding, _count_tokens
+
+class NodeRerank:
+    """
+    Runs between retrieve and chat: NodeRetrieve over-fetches `candidates` chunks, the reranker
+    scores them against the question and only the best `top_n` go into the chat prompt.
+    Stage timings and the prompt tokens saved are written to state["node_metrics"].
+    """
+
+    def __init__(self):
+        self.candidates = int(os.getenv("RERANK_CANDIDATES", "30"))
+        self.top_n = int(os.getenv("RERANK_TOP_N", "3"))
+
+        self.reranker = Reranker()
+        # Tokens of the chat model, for the token savings metric
+        self.encoding = _get_encoding(LLMOpenAI().chat_model)
+
+
+    def run(self, state:State):
+        try:
+            state["node_retrieve_docs"] = self._rerank(state)
+
+        except Exception as e:
+            logging.error(f"Error in NodeRerank run: {e}")
+            raise
+
+        return dict(state)
+
+
+    async def arun(self, state:State):
+        try:
+            # CPU bound (cross-encoder inference), keep it off the event loop
+            state["node_retrieve_docs"] = await asyncio.to_thread(self._rerank, state)
+
+        except Exception as e:
+            logging.error(f"Error in NodeRerank arun: {e}")
+            raise
+
+        return dict(state)
+
+
+    def _rerank(self, state:State) -> List[Document]:
+        start = time.perf_counter()
+        docs = state.get("node_retrieve_docs") or []
+
+        ranked = self.reranker._rerank(state.get("user_question", ""), docs, self.top_n)
+        kept = [doc for doc, _ in ranked]
+
+        metrics = dict(state.get("node_metrics") or {})
+        metrics["rerank_ms"] = (time.perf_counter() - start) * 1000
+        metrics["rerank_candidates"] = len(docs)
+        metrics["rerank_kept"] = len(kept)
+        metrics["rerank_candidate_tokens"] = sum(_count_tokens(self.encoding, doc.page_content) for doc in docs)
+        metrics["rerank_kept_tokens"] = sum(_count_tokens(self.encoding, doc.page_content) for doc in kept)
+        state["node_metrics"] = metrics
+
+        logging.info(f"Rerank: {len(docs)} -> {len(kept)} chunks in {metrics['rerank_ms']:.1f} ms, "
+                     f"{metrics['rerank_candidate_tokens']} -> {metrics['rerank_kept_tokens']} tokens "
+                     f"(retrieve {metrics.get('retrieve_ms', 0):.1f} ms), {self.reranker._get_stats()}")
+        return kept
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -1,37 +1,132 @@
+import os
+import time
+import asyncio
 import logging
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
 from src.graph.state.graph_state import State
 from src.core.llm.llm_openai import LLMOpenAI
-from src.core.vector_db.vdb_pinecone import PineconeVectorDB
+from src.core.vector_db.vdb_factory import _get_query_vector_db
+from src.core.vector_db.vdb_bm25 import BM25Index, _reciprocal_rank_fusion
 
 class NodeRetrieve:
 
-    def __init__(self):
+    def __init__(self, top_k: int = None):
+        # Chunks returned per question (NodeRerank asks for more candidates than it keeps)
+        self.top_k = top_k or int(os.getenv("RETRIEVE_K", "2"))
+
         self.llmOpenAI = LLMOpenAI()
         self.embeddingOpenAI = self.llmOpenAI._get_embedding()
 
-        self.vector_store = PineconeVectorDB(embedding=self.embeddingOpenAI)
+        # Pinecone, Azure AI Search or the local index, see VECTOR_DB_QUERY_BACKEND / VECTOR_DB_BACKEND
+        self.vector_store = _get_query_vector_db(embedding=self.embeddingOpenAI)
         # self.vector_store._create_vector_store_index() # Not needed to explicitly call if we just read
         self.vector_store_model_instance = self.vector_store._get_vector_store()
 
+        # "hybrid": dense + local BM25 (built by UpdateVectorDB) fused by reciprocal rank, "dense": vectors only
+        self.retrieve_mode = os.getenv("RETRIEVE_MODE", "hybrid").lower()
+        self.dense_weight = float(os.getenv("RETRIEVE_DENSE_WEIGHT", "1.0"))
+        self.lexical_weight = float(os.getenv("RETRIEVE_LEXICAL_WEIGHT", "1.0"))
+        self.rrf_k = int(os.getenv("RETRIEVE_RRF_K", "60"))
+        # Candidates taken from each side before fusion
+        self.hybrid_candidates = int(os.getenv("RETRIEVE_HYBRID_CANDIDATES", "20"))
+
+        # BM25 index per namespace, a blue/green flip opens the new one
+        self.bm25_indexes: Dict[str, BM25Index] = {}
+        self.bm25_empty_warned = False
+
 
-    def run(self, state:State, k: int = 2):
+    def run(self, state:State, k: int = None):
         try:
+            start = time.perf_counter()
+            k = k or self.top_k
             user_question = state.get("user_question", "")
+            # Already embedded in front of the graph (semantic cache) most of the time, skip the embedding call
+            user_question_embedding = state.get("user_question_embedding") or self.embeddingOpenAI.embed_query(user_question)
+            # Resolved per query so a blue/green flip is picked up without restarting
+            namespace = self.vector_store._get_namespace()
 
-            # Using similarity_search (standard dense retrieval) instead of hybrid
-            docs = self.vector_store_model_instance.similarity_search(
-                query=user_question, 
-                k=k
-            )
+            bm25 = self._get_bm25(namespace)
+            if bm25 is None:
+                # Standard dense retrieval on the configured backend
+                docs_scores = self.vector_store._query_vectors(user_question_embedding, k=k, namespace=namespace)
+                state["node_retrieve_docs"] = [doc for doc, _ in docs_scores]
+            else:
+                candidates = max(k, self.hybrid_candidates)
+                dense = self.vector_store._query_vectors(user_question_embedding, k=candidates, namespace=namespace)
+                lexical = bm25._query(user_question, k=candidates)
+                state["node_retrieve_docs"] = self._fuse(dense, lexical, k)
+
+            self._record_timing(state, start)
 
-            state["node_retrieve_docs"] = docs
-        
         except Exception as e:
             logging.error(f"Error in NodeRetrieve run: {e}")
             raise
 
         return dict(state)
 
+
+    async def arun(self, state:State, k: int = None):
+        try:
+            start = time.perf_counter()
+            k = k or self.top_k
+            user_question = state.get("user_question", "")
+            user_question_embedding = state.get("user_question_embedding") or await self.embeddingOpenAI.aembed_query(user_question)
+            # Resolved per query so a blue/green flip is picked up without restarting
+            namespace = self.vector_store._get_namespace()
+
+            bm25 = self._get_bm25(namespace)
+            if bm25 is None:
+                # Native async query where the backend has one, the event loop stays free meanwhile
+                docs_scores = await self.vector_store._aquery_vectors(user_question_embedding, k=k, namespace=namespace)
+                state["node_retrieve_docs"] = [doc for doc, _ in docs_scores]
+            else:
+                # Lexical side is local, it runs in a worker thread while the dense query is in flight
+                candidates = max(k, self.hybrid_candidates)
+                dense, lexical = await asyncio.gather(
+                    self.vector_store._aquery_vectors(user_question_embedding, k=candidates, namespace=namespace),
+                    asyncio.to_thread(bm25._query, user_question, candidates)
+                )
+                state["node_retrieve_docs"] = self._fuse(dense, lexical, k)
+
+            self._record_timing(state, start)
+
+        except Exception as e:
+            logging.error(f"Error in NodeRetrieve arun: {e}")
+            raise
+
+        return dict(state)
+
+
+    def _record_timing(self, state:State, start: float):
+        metrics = dict(state.get("node_metrics") or {})
+        metrics["retrieve_ms"] = (time.perf_counter() - start) * 1000
+        state["node_metrics"] = metrics
+
+
+    def _get_bm25(self, namespace: str) -> Optional[BM25Index]:
+        """BM25 index of namespace, None in dense mode or while the index is empty (nothing ingested yet)."""
+        if self.retrieve_mode != "hybrid":
+            return None
+
+        bm25 = self.bm25_indexes.get(namespace)
+        if bm25 is None:
+            bm25 = BM25Index(index_name=self.vector_store.index_name, namespace=namespace)
+            self.bm25_indexes = {namespace: bm25}
+
+        if not bm25._count():
+            if not self.bm25_empty_warned:
+                logging.warning(f"BM25 index of '{self.vector_store.index_name}' is empty, using dense retrieval only")
+                self.bm25_empty_warned = True
+            return None
+        return bm25
+
+
+    def _fuse(self, dense: List[Tuple[Document, float]], lexical: List[Tuple[Document, float]], k: int) -> List[Document]:
+        fused = _reciprocal_rank_fusion([[doc for doc, _ in dense], [doc for doc, _ in lexical]],
+                                        weights=[self.dense_weight, self.lexical_weight], rrf_k=self.rrf_k)
+        return [doc for doc, _ in fused[:k]]
+
 #    _____
 #   ( \/ @\____
 #   /           O
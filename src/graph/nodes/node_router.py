@@ -1,26 +1,47 @@
+import os
+import time
+import asyncio
 import logging
 from src.graph.state.graph_state import State, TaskRoute
 from src.core.llm.llm_openai import LLMOpenAI
+from src.core.llm.router_classifier import RouterClassifier
+from src.core.llm.prompt_registry import PromptRegistry
 
 
 class NodeRouter:
 
     def __init__(self):
         self.llmOpenAI = LLMOpenAI()
+        self.prompt_registry = PromptRegistry._get_instance()
+
+        # Local classifier first, LLM router only when it is not confident
+        if os.getenv("ROUTER_FAST_PATH", "true").lower() == "true":
+            self.router_classifier = RouterClassifier()
+        else:
+            self.router_classifier = None
 
 
     def run(self, state:State):
         try:
-            with open("src/prompts/node_router.txt", "r") as f:
-                prompt_template = f.read()
+            decision = self._classify_local(state)
+            if decision is not None:
+                state["user_question_validation"] = decision
+                return dict(state)
+
+            start = time.perf_counter()
 
+            usage = {}
             chat_response = self.llmOpenAI._get_chat_response_instructions(
-                instructions_message=prompt_template,
-                input_message=f"Responde a la siguiente pregunta: {state['user_question']}",
-                text_format=TaskRoute
+                instructions_message=self.prompt_registry._get("node_router"),
+                input_message=self.prompt_registry._format("node_router_input", question=state["user_question"]),
+                text_format=TaskRoute,
+                prompt_cache_key=self.prompt_registry._get_cache_key("node_router"),
+                metrics=usage,
             )
 
             state["user_question_validation"] = chat_response.response
+            self._record_llm_decision(time.perf_counter() - start)
+            self._record_usage_metrics(state, usage)
 
         except Exception as e:
             logging.error(f"Error in NodeRouter run: {e}")
@@ -29,6 +50,68 @@ class NodeRouter:
         return dict(state)
 
 
+    async def arun(self, state:State):
+        try:
+            # Exemplars are embedded on first use, keep that off the event loop
+            decision = await asyncio.to_thread(self._classify_local, state)
+            if decision is not None:
+                state["user_question_validation"] = decision
+                return dict(state)
+
+            start = time.perf_counter()
+
+            usage = {}
+            chat_response = await self.llmOpenAI._aget_chat_response_instructions(
+                instructions_message=self.prompt_registry._get("node_router"),
+                input_message=self.prompt_registry._format("node_router_input", question=state["user_question"]),
+                text_format=TaskRoute,
+                prompt_cache_key=self.prompt_registry._get_cache_key("node_router"),
+                metrics=usage,
+            )
+
+            state["user_question_validation"] = chat_response.response
+            self._record_llm_decision(time.perf_counter() - start)
+            self._record_usage_metrics(state, usage)
+
+        except Exception as e:
+            logging.error(f"Error in NodeRouter arun: {e}")
+            raise
+
+        return dict(state)
+
+
+    def _classify_local(self, state:State):
+        if self.router_classifier is None:
+            return None
+
+        try:
+            question_embedding = state.get("user_question_embedding")
+            if not question_embedding:
+                start = time.perf_counter()
+                question_embedding = self.router_classifier.embeddingOpenAI.embed_query(state.get("user_question", ""))
+                self.router_classifier._record_embedding(time.perf_counter() - start)
+
+            return self.router_classifier._classify(question_embedding)
+
+        except Exception as e:
+            # The LLM router is always a valid fallback
+            logging.warning(f"Router fast path unavailable: {e}")
+            return None
+
+
+    def _record_usage_metrics(self, state:State, usage: dict):
+        metrics = dict(state.get("node_metrics") or {})
+        for key, value in usage.items():
+            metrics[f"router_{key}"] = value
+        state["node_metrics"] = metrics
+
+
+    def _record_llm_decision(self, seconds: float):
+        if self.router_classifier is not None:
+            self.router_classifier._record_llm_decision(seconds)
+            logging.info(f"Router stats: {self.router_classifier._get_stats()}")
+
+
 #    _____
 #   ( \/ @\____
 #   /           O
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.graph.state.graph_state import State
+from src.graph.nodes.node_router import NodeRouter
+from src.graph.nodes.node_retrieve import NodeRetrieve
+
+class NodeRouterRetrieve:
+    """
+    Speculative router: classifies the question and retrieves documents at the same time.
+    Most questions are routed to RETRIEVE, so the embedding + Pinecone query no longer wait
+    for the router call. If the router sends the question to CRACK the retrieval is discarded.
+    """
+
+    def __init__(self, node_router: NodeRouter, node_retrieve: NodeRetrieve):
+        self.node_router = node_router
+        self.node_retrieve = node_retrieve
+
+
+    def run(self, state:State):
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            future_router = executor.submit(self.node_router.run, dict(state))
+            future_retrieve = executor.submit(self.node_retrieve.run, dict(state))
+
+            state_router = future_router.result()
+            if state_router.get("user_question_validation", False):
+                state_retrieve = future_retrieve.result()
+            else:
+                # CRACK: the speculative retrieval is not needed anymore
+                future_retrieve.cancel()
+                state_retrieve = None
+
+            state = self._merge_states(state, state_router, state_retrieve)
+
+        except Exception as e:
+            logging.error(f"Error in NodeRouterRetrieve run: {e}")
+            raise
+
+        finally:
+            # Not "with": its shutdown would wait for a retrieval that is already running
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return dict(state)
+
+
+    async def arun(self, state:State):
+        task_retrieve = asyncio.create_task(self.node_retrieve.arun(dict(state)))
+
+        try:
+            state_router = await self.node_router.arun(dict(state))
+
+            if state_router.get("user_question_validation", False):
+                state_retrieve = await task_retrieve
+            else:
+                # CRACK: the speculative retrieval is not needed anymore
+                task_retrieve.cancel()
+                state_retrieve = None
+
+            state = self._merge_states(state, state_router, state_retrieve)
+
+        except Exception as e:
+            task_retrieve.cancel()
+            logging.error(f"Error in NodeRouterRetrieve arun: {e}")
+            raise
+
+        return dict(state)
+
+
+    def _merge_states(self, state: State, state_router: dict, state_retrieve: dict = None) -> State:
+        state["user_question_validation"] = state_router.get("user_question_validation", False)
+        state["node_retrieve_docs"] = state_retrieve.get("node_retrieve_docs") if state_retrieve else None
+        # Both branches ran on a copy of the state, keep the metrics of each
+        state["node_metrics"] = {**(state_router.get("node_metrics") or {}),
+                                 **((state_retrieve or {}).get("node_metrics") or {})}
+        return state
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
@@ -0,0 +1,245 @@
+import os
+import queue
+import asyncio
+import logging
+import threading
+from src.graph.builder import GraphBuilder
+from src.core.cache.semantic_cache import SemanticCache
+from src.core.vector_db.vdb_index_version import IndexVersion
+
+
+class GraphRuntime:
+    """
+    Process-wide holder of the compiled graph.
+    The nodes (OpenAI / Pinecone clients) and the compiled StateGraph are built once
+    and shared by every Streamlit session, since nodes only keep read-only clients
+    and every request carries its own State.
+
+    Async clients (AsyncOpenAI) are bound to the event loop that
+    created them, so every graph execution runs on one long-lived loop owned by the
+    runtime. Concurrent questions from different sessions overlap on that loop.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.graph_builder = GraphBuilder()
+        self.graph = self.graph_builder.build()
+        self.warmed_up = False
+
+        # Semantic answer cache in front of the graph (SEMANTIC_CACHE_BACKEND=none disables it)
+        if os.getenv("SEMANTIC_CACHE_BACKEND", "memory") != "none":
+            self.semantic_cache = SemanticCache()
+        else:
+            self.semantic_cache = None
+        self.index_version = IndexVersion()
+        # The queried index (VECTOR_DB_QUERY_BACKEND), UpdateVectorDB bumps it whatever backend it writes
+        self.index_name = self.graph_builder.node_retrieve.vector_store.index_name
+        self.last_index_version = None
+
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever,
+                                            name="graph-runtime-loop",
+                                            daemon=True)
+        self.loop_thread.start()
+
+
+    @classmethod
+    def _get_instance(cls) -> "GraphRuntime":
+        if cls._instance is None:
+            with cls._instance_lock:
+                # Double check: another session may have built it while we waited
+                if cls._instance is None:
+                    try:
+                        cls._instance = cls()
+                        logging.info("Graph runtime built.")
+                    except Exception as e:
+                        logging.error(f"Error building graph runtime: {e}")
+                        raise
+
+        return cls._instance
+
+
+    @classmethod
+    def _reset_instance(cls):
+        """Drops the shared runtime so the next request rebuilds it (e.g. after config changes)."""
+        with cls._instance_lock:
+            cls._instance = None
+
+
+    def _warm_up(self):
+        """Opens the heavyweight connections ahead of the first user question."""
+        if self.warmed_up:
+            return
+
+        try:
+            node_retrieve = self.graph_builder.node_retrieve
+            node_retrieve.vector_store._warm_up()
+            # Builds the in memory BM25 postings of the live namespace (hybrid retrieval)
+            node_retrieve._get_bm25(node_retrieve.vector_store._get_namespace())
+            # Cross-encoder weights are loaded before the first question
+            if self.graph_builder.node_rerank is not None:
+                self.graph_builder.node_rerank.reranker._load()
+
+            # Router exemplars are embedded once, before the first question
+            router_classifier = self.graph_builder.node_router.router_classifier
+            if router_classifier is not None:
+                router_classifier._load()
+            self.warmed_up = True
+            logging.info("Graph runtime warmed up.")
+
+        except Exception as e:
+            # Warm up is best effort, the first request will connect anyway
+            logging.warning(f"Error warming up graph runtime: {e}")
+
+
+    async def run(self, user_question: str, user_id: str, alexandria_type_learning: int):
+        question_embedding, index_version = await self._get_cache_key(user_question)
+
+        cached_state = await self._get_cached_state(user_question, user_id, alexandria_type_learning,
+                                                    question_embedding, index_version)
+        if cached_state is not None:
+            return cached_state
+
+        final_state = await self.graph_builder.run(user_question=user_question,
+                                                   user_id=user_id,
+                                                   alexandria_type_learning=alexandria_type_learning,
+                                                   user_question_embedding=question_embedding)
+
+        self._store_cached_state(final_state, question_embedding, alexandria_type_learning, index_version)
+        return final_state
+
+
+    async def astream(self, user_question: str, user_id: str, alexandria_type_learning: int):
+        """Same contract as GraphBuilder.astream, with the semantic cache in front."""
+        question_embedding, index_version = await self._get_cache_key(user_question)
+
+        cached_state = await self._get_cached_state(user_question, user_id, alexandria_type_learning,
+                                                    question_embedding, index_version)
+        if cached_state is not None:
+            yield "token", cached_state.get("chatbot_answer", "")
+            yield "state", cached_state
+            return
+
+        async for kind, value in self.graph_builder.astream(user_question=user_question,
+                                                            user_id=user_id,
+                                                            alexandria_type_learning=alexandria_type_learning,
+                                                            user_question_embedding=question_embedding):
+            if kind == "state":
+                self._store_cached_state(value, question_embedding, alexandria_type_learning, index_version)
+            yield kind, value
+
+
+#region Semantic cache
+    async def _get_cache_key(self, user_question: str):
+        """Embeds the question once: used for the cache lookup and reused by NodeRetrieve."""
+        if self.semantic_cache is None:
+            return None, None
+
+        try:
+            index_version = self.index_version._get_version(self.index_name)
+            if index_version != self.last_index_version:
+                # UpdateVectorDB rebuilt the index: answers built on the old one are stale
+                if self.last_index_version is not None:
+                    self.semantic_cache._invalidate(index_version)
+                self.last_index_version = index_version
+
+            embedding = self.graph_builder.node_retrieve.embeddingOpenAI
+            question_embedding = await embedding.aembed_query(user_question)
+
+        except Exception as e:
+            logging.error(f"Error computing semantic cache key: {e}")
+            return None, None
+
+        return question_embedding, index_version
+
+
+    async def _get_cached_state(self, user_question: str, user_id: str, alexandria_type_learning: int, question_embedding, index_version):
+        if self.semantic_cache is None or question_embedding is None:
+            return None
+
+        cached = self.semantic_cache._lookup(question_embedding, alexandria_type_learning, index_version)
+        if cached is None:
+            return None
+
+        state = {
+            "user_id": user_id,
+            "user_question": user_question,
+            "user_question_validation": True,
+            "alexandria_type_learning": alexandria_type_learning,
+            **cached,
+        }
+
+        # Cached answers are still part of the user history
+        return await self.graph_builder.node_chat_history.arun(state)
+
+
+    def _store_cached_state(self, final_state, question_embedding, alexandria_type_learning: int, index_version):
+        if self.semantic_cache is None or question_embedding is None or not final_state:
+            return
+
+        # Only answers grounded on the index are cached, CRACK answers are not
+        if final_state.get("user_question_validation") and final_state.get("chatbot_answer"):
+            self.semantic_cache._store(question_embedding, alexandria_type_learning, index_version, final_state)
+#endregion
+
+
+    def _run_coroutine(self, coro, timeout: float = None):
+        """Runs a coroutine on the runtime loop from any (non loop) thread and waits for it."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result(timeout=timeout)
+
+
+    def _stream(self, user_question: str, user_id: str, alexandria_type_learning: int) -> "GraphAnswerStream":
+        """Starts a streaming execution on the runtime loop, consumed from the caller thread."""
+        answer_stream = GraphAnswerStream()
+
+        async def produce():
+            try:
+                async for kind, value in self.astream(user_question=user_question,
+                                                      user_id=user_id,
+                                                      alexandria_type_learning=alexandria_type_learning):
+                    answer_stream.queue.put((kind, value))
+            except Exception as e:
+                answer_stream.queue.put(("error", e))
+
+        asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        return answer_stream
+
+
+class GraphAnswerStream:
+    """
+    Sync iterator over the answer tokens of a streaming graph execution (e.g. for st.write_stream).
+    Once exhausted, final_state holds the complete State (answer, docs and visualization).
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.final_state = None
+
+
+    def __iter__(self):
+        while True:
+            kind, value = self.queue.get()
+
+            if kind == "token":
+                yield value
+            elif kind == "state":
+                self.final_state = value
+                return
+            else:
+                raise value
+
+
+def warm_up_graph_runtime() -> GraphRuntime:
+    runtime = GraphRuntime._get_instance()
+    runtime._warm_up()
+    return runtime
+
+#    _____
+#   ( \/ @\____
+#   /           O
+#  /   (_|||||_/
+# /____/  |||
+#       kimba
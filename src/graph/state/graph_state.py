@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from langchain_core.documents import Document
-from typing import Optional, Union, List, TypedDict, Any
+from typing import Optional, Union, List, Dict, TypedDict, Any
 
 class ChatResponseGeneric(BaseModel):
     response: str
@@ -12,11 +12,15 @@ class State(TypedDict):
     user_id: str
     user_question: str
     user_question_validation: bool
+    user_question_embedding: Optional[List[float]]
 
     chatbot_answer: Optional[str]
     chatbot_answer_visualization: Optional[str]
+    chatbot_answer_stream: Optional[bool]
 
     alexandria_type_learning: Optional[int]
 
     node_upload_vector_store: Optional[bool]
-    node_retrieve_docs: Optional[List[Document]]
\ No newline at end of file
+    node_retrieve_docs: Optional[List[Document]]
+    # Per stage timings (ms) and counters of the request, e.g. retrieve_ms, rerank_ms, rerank_kept_tokens
+    node_metrics: Optional[Dict[str, float]]
\ No newline at end of file
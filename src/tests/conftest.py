@@ -0,0 +1,40 @@
+import hashlib
+import pytest
+
+class FakeEmbeddings:
+    """Deterministic offline embeddings: every word hashed into a small vector."""
+
+    model = "text-embedding-3-small"
+
+    def __init__(self, dimensions: int = 16):
+        self.dimensions = dimensions
+        self.embedded_texts = []
+
+
+    def embed_documents(self, texts):
+        self.embedded_texts.extend(texts)
+        return [self._embed(text) for text in texts]
+
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+    def _embed(self, text):
+        vector = [0.01] * self.dimensions
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimensions] += 1.0
+        return vector
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Every store writes under data/silver/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    return tmp_path
+
+
+@pytest.fixture
+def fake_embedding():
+    return FakeEmbeddings()
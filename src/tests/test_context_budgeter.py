@@ -0,0 +1,52 @@
+from langchain_core.documents import Document
+from src.core.llm.context_budgeter import ContextBudgeter
+
+DOCS = [
+    Document(page_content="La muralla china mide 21.000 km. Fue construida por varias dinastías."),
+    # Overlap with the previous chunk plus a new sentence
+    Document(page_content="Fue construida por varias dinastías. Los Ming la reforzaron con ladrillo."),
+    Document(page_content="La fotosíntesis ocurre en los cloroplastos. Las hojas captan la luz."),
+]
+
+
+def test_context_within_budget_only_drops_repeated_sentences():
+    budgeter = ContextBudgeter(budget_tokens=10_000)
+
+    context, stats = budgeter._build_context("¿Cuánto mide la muralla china?", DOCS)
+
+    assert context == ("La muralla china mide 21.000 km. Fue construida por varias dinastías.\n"
+                       "Los Ming la reforzaron con ladrillo.\n"
+                       "La fotosíntesis ocurre en los cloroplastos. Las hojas captan la luz.")
+    assert stats["context_sentences_dropped"] == 1
+    assert stats["context_tokens_deduped"] < stats["context_tokens_in"]
+
+
+def test_context_over_budget_keeps_the_relevant_sentences():
+    budgeter = ContextBudgeter(budget_tokens=1)
+    budgeter.budget_tokens = budgeter._count_tokens("La fotosíntesis ocurre en los cloroplastos.") + \
+        budgeter._count_tokens("Las hojas captan la luz.")
+
+    context, stats = budgeter._build_context("¿Dónde ocurre la fotosíntesis en las hojas?", DOCS)
+
+    assert context == "La fotosíntesis ocurre en los cloroplastos. Las hojas captan la luz."
+    assert stats["context_tokens"] <= budgeter.budget_tokens
+    assert stats["context_sentences_dropped"] == 4
+
+
+def test_gaps_left_by_the_budget_are_marked():
+    docs = [Document(page_content="Uno sobre volcanes. Dos sin relación. Tres sobre volcanes.")]
+    budgeter = ContextBudgeter(budget_tokens=1)
+    budgeter.budget_tokens = budgeter._count_tokens("Uno sobre volcanes.") + budgeter._count_tokens("Tres sobre volcanes.")
+
+    context, _ = budgeter._build_context("volcanes", docs)
+
+    assert context == "Uno sobre volcanes. … Tres sobre volcanes."
+
+
+def test_no_question_terms_prefers_better_ranked_chunks():
+    budgeter = ContextBudgeter(budget_tokens=1)
+    budgeter.budget_tokens = budgeter._count_tokens("La muralla china mide 21.000 km.")
+
+    context, _ = budgeter._build_context("zzz", DOCS)
+
+    assert context == "La muralla china mide 21.000 km."
@@ -0,0 +1,69 @@
+import os
+import pytest
+from src.core.llm.prompt_registry import PROMPT_SPECS, PromptRegistry
+
+SPECS = {"system": (), "input": ("context", "question")}
+
+
+@pytest.fixture
+def prompts_dir(tmp_path):
+    prompts_dir = tmp_path / "prompts"
+    prompts_dir.mkdir()
+    (prompts_dir / "system.txt").write_text("Eres un tutor.\r\n", encoding="utf-8")
+    (prompts_dir / "input.txt").write_text("Contexto: {context}\nPregunta: {question}", encoding="utf-8")
+    return prompts_dir
+
+
+def _touch(path, text):
+    # New mtime even on file systems with coarse timestamps
+    stat = path.stat()
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_repo_prompts_match_their_specs():
+    registry = PromptRegistry()
+
+    assert set(registry.prompts) == set(PROMPT_SPECS)
+
+
+def test_prompts_are_normalized_and_formatted(prompts_dir):
+    registry = PromptRegistry(prompts_dir=prompts_dir, specs=SPECS)
+
+    assert registry._get("system") == "Eres un tutor."
+    assert registry._format("input", context="C", question="Q") == "Contexto: C\nPregunta: Q"
+    assert registry._get_cache_key("system").startswith("system-")
+
+
+@pytest.mark.parametrize("text", [
+    "Contexto: {context}",
+    "Contexto: {context}\nPregunta: {question}\nUsuario: {user_id}",
+    "   ",
+])
+def test_invalid_placeholders_fail_at_startup(prompts_dir, text):
+    (prompts_dir / "input.txt").write_text(text, encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        PromptRegistry(prompts_dir=prompts_dir, specs=SPECS)
+
+
+def test_system_prompt_with_placeholders_fails(prompts_dir):
+    (prompts_dir / "system.txt").write_text("Eres un tutor de {question}", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="system"):
+        PromptRegistry(prompts_dir=prompts_dir, specs=SPECS)
+
+
+def test_hot_reload_keeps_the_previous_version_when_invalid(prompts_dir, monkeypatch):
+    monkeypatch.setenv("PROMPT_RELOAD_SECONDS", "0.001")
+    registry = PromptRegistry(prompts_dir=prompts_dir, specs=SPECS)
+    cache_key = registry._get_cache_key("system")
+
+    _touch(prompts_dir / "system.txt", "Eres un profesor.")
+    registry.last_check = 0.0
+    assert registry._get("system") == "Eres un profesor."
+    assert registry._get_cache_key("system") != cache_key
+
+    _touch(prompts_dir / "input.txt", "Solo {question}")
+    registry.last_check = 0.0
+    assert registry._format("input", context="C", question="Q") == "Contexto: C\nPregunta: Q"
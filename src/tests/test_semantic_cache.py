@@ -0,0 +1,83 @@
+import pytest
+from langchain_core.documents import Document
+from src.core.cache import semantic_cache
+from src.core.cache.semantic_cache import SemanticCache
+
+RESPONSE = {
+    "chatbot_answer": "La muralla mide unos 21.000 km.",
+    "chatbot_answer_visualization": None,
+    "node_retrieve_docs": [Document(page_content="La muralla china...", metadata={"source_id": "a"})],
+    "user_id": "not cached",
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "disk"])
+def cache(request):
+    return SemanticCache(backend=request.param, threshold=0.9, max_entries=10, ttl_seconds=60)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache.time, "time", clock.time)
+    return clock
+
+
+def test_similar_question_is_a_hit(cache):
+    cache._store([1.0, 0.0, 0.0], 1, "v1", RESPONSE)
+
+    # cos = 0.995
+    response = cache._lookup([1.0, 0.1, 0.0], 1, "v1")
+
+    assert response["chatbot_answer"] == RESPONSE["chatbot_answer"]
+    assert response["node_retrieve_docs"][0].page_content == "La muralla china..."
+    assert "user_id" not in response
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_question_below_threshold_is_a_miss(cache):
+    cache._store([1.0, 0.0, 0.0], 1, "v1", RESPONSE)
+
+    # cos = 0.894
+    assert cache._lookup([1.0, 0.5, 0.0], 1, "v1") is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_learning_type_and_index_version_are_part_of_the_key(cache):
+    cache._store([1.0, 0.0, 0.0], 1, "v1", RESPONSE)
+
+    assert cache._lookup([1.0, 0.0, 0.0], 2, "v1") is None
+    assert cache._lookup([1.0, 0.0, 0.0], 1, "v2") is None
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache._store([1.0, 0.0, 0.0], 1, "v1", RESPONSE)
+
+    clock.now += 59
+    assert cache._lookup([1.0, 0.0, 0.0], 1, "v1") is not None
+
+    clock.now += 2
+    assert cache._lookup([1.0, 0.0, 0.0], 1, "v1") is None
+
+
+def test_invalidate_keeps_only_the_current_index_version(cache):
+    cache._store([1.0, 0.0, 0.0], 1, "v1", RESPONSE)
+    cache._store([0.0, 1.0, 0.0], 1, "v2", RESPONSE)
+
+    cache._invalidate("v2")
+
+    assert cache._lookup([1.0, 0.0, 0.0], 1, "v1") is None
+    assert cache._lookup([0.0, 1.0, 0.0], 1, "v2") is not None
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        SemanticCache(backend="redis")
@@ -0,0 +1,138 @@
+import json
+import pytest
+from src.core.database.sheets_log_shipper import SheetsLogShipper
+
+SPREADSHEET_ID = "sheet"
+
+
+class FakeSheetsHistory:
+    def __init__(self, fail: bool = False, service=True):
+        self.service = object() if service else None
+        self.fail = fail
+        self.rows = []
+
+    def append_rows(self, spreadsheet_id, rows):
+        if self.fail:
+            return False
+        self.rows.extend(rows)
+        return True
+
+
+@pytest.fixture(autouse=True)
+def shipper_env(monkeypatch):
+    # Everything waits for _stop, no retry while the test runs
+    monkeypatch.setenv("SHEETS_LOG_BATCH_SIZE", "1000")
+    monkeypatch.setenv("SHEETS_LOG_FLUSH_SECONDS", "60")
+    monkeypatch.setenv("SHEETS_LOG_RETRY_BASE_SECONDS", "60")
+
+
+def _get_shipper(tmp_path, sheets_history) -> SheetsLogShipper:
+    return SheetsLogShipper(SPREADSHEET_ID, spool_dir=tmp_path, sheets_history=sheets_history)
+
+
+def _write_spool(tmp_path, rows, offset_rows: int = None, tail: bytes = b"") -> bytes:
+    lines = [(json.dumps(row) + "\n").encode("utf-8") for row in rows]
+    (tmp_path / f"sheets_log_spool_{SPREADSHEET_ID}.jsonl").write_bytes(b"".join(lines) + tail)
+    if offset_rows is not None:
+        (tmp_path / f"sheets_log_spool_{SPREADSHEET_ID}.offset").write_text(str(len(b"".join(lines[:offset_rows]))))
+    return b"".join(lines)
+
+
+def _get_offset(tmp_path) -> int:
+    return int((tmp_path / f"sheets_log_spool_{SPREADSHEET_ID}.offset").read_text())
+
+
+def test_rows_are_shipped_and_offset_committed(tmp_path):
+    sheets = FakeSheetsHistory()
+    shipper = _get_shipper(tmp_path, sheets)
+
+    shipper._enqueue("u1", "¿Pregunta?", "Respuesta")
+    shipper._enqueue("u2", "¿Otra?", "Otra respuesta")
+    shipper._stop()
+
+    assert [row[1:] for row in sheets.rows] == [["u1", "¿Pregunta?", "Respuesta"], ["u2", "¿Otra?", "Otra respuesta"]]
+    assert _get_offset(tmp_path) == shipper.spool_path.stat().st_size
+
+
+def test_restart_ships_only_rows_after_the_offset(tmp_path):
+    rows = [["t", "u1", "q1", "a1"], ["t", "u2", "q2", "a2"], ["t", "u3", "q3", "a3"]]
+    spool = _write_spool(tmp_path, rows, offset_rows=1)
+
+    sheets = FakeSheetsHistory()
+    _get_shipper(tmp_path, sheets)._stop()
+
+    assert sheets.rows == rows[1:]
+    assert _get_offset(tmp_path) == len(spool)
+
+
+def test_row_cut_mid_write_is_dropped(tmp_path):
+    rows = [["t", "u1", "q1", "a1"]]
+    spool = _write_spool(tmp_path, rows, tail=b'["t", "u2", "q')
+
+    sheets = FakeSheetsHistory()
+    shipper = _get_shipper(tmp_path, sheets)
+    shipper._enqueue("u3", "q3", "a3")
+    shipper._stop()
+
+    assert [row[1] for row in sheets.rows] == ["u1", "u3"]
+    assert shipper.spool_path.read_bytes().startswith(spool + b'["')
+
+
+def test_offset_past_the_end_ships_everything(tmp_path):
+    rows = [["t", "u1", "q1", "a1"]]
+    _write_spool(tmp_path, rows)
+    (tmp_path / f"sheets_log_spool_{SPREADSHEET_ID}.offset").write_text("100000")
+
+    sheets = FakeSheetsHistory()
+    _get_shipper(tmp_path, sheets)._stop()
+
+    assert sheets.rows == rows
+
+
+def test_failed_rows_are_shipped_after_a_restart(tmp_path):
+    shipper = _get_shipper(tmp_path, FakeSheetsHistory(fail=True))
+    shipper._enqueue("u1", "q1", "a1")
+    shipper._stop()
+
+    sheets = FakeSheetsHistory()
+    _get_shipper(tmp_path, sheets)._stop()
+
+    assert [row[1] for row in sheets.rows] == ["u1"]
+
+
+def test_shipped_rows_are_cut_from_the_spool(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHEETS_LOG_SPOOL_COMPACT_BYTES", "1")
+    sheets = FakeSheetsHistory()
+    shipper = _get_shipper(tmp_path, sheets)
+
+    shipper._enqueue("u1", "q1", "a1")
+    shipper._stop()
+
+    assert len(sheets.rows) == 1
+    assert shipper.spool_path.stat().st_size == 0
+    assert _get_offset(tmp_path) == 0
+
+
+def test_full_spool_drops_rows(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHEETS_LOG_SPOOL_MAX_BYTES", "60")
+    sheets = FakeSheetsHistory()
+    shipper = _get_shipper(tmp_path, sheets)
+
+    for number in range(5):
+        shipper._enqueue(f"u{number}", "q", "a")
+    shipper._stop()
+
+    assert shipper.dropped == 5 - len(sheets.rows) > 0
+    assert shipper.spool_path.stat().st_size <= 60
+
+
+def test_without_credentials_the_shipper_disables_itself(tmp_path):
+    shipper = _get_shipper(tmp_path, FakeSheetsHistory(service=False))
+    shipper._enqueue("u1", "q1", "a1")
+    shipper._stop()
+    size = shipper.spool_path.stat().st_size
+
+    shipper._enqueue("u2", "q2", "a2")
+
+    assert not shipper.enabled
+    assert shipper.spool_path.stat().st_size == size
@@ -0,0 +1,89 @@
+import pytest
+from langchain_core.documents import Document
+from src.core.vector_db.vdb_bm25 import BM25Index, _reciprocal_rank_fusion, _tokenize
+
+
+@pytest.fixture
+def bm25():
+    bm25 = BM25Index(index_name="test")
+    bm25._set_source("a", [
+        ("a1", "La muralla china mide miles de kilómetros.", {"source_id": "a"}),
+        ("a2", "Las dinastías Ming y Qin construyeron la muralla.", {"source_id": "a"}),
+    ])
+    bm25._set_source("b", [
+        ("b1", "Fotosíntesis: las plantas convierten la luz en energía.", {"source_id": "b"}),
+        ("b2", "Código del curso MAT101, álgebra lineal.", {"source_id": "b"}),
+    ])
+    bm25._flush()
+    return bm25
+
+
+def test_tokenize_drops_accents_case_and_stopwords():
+    assert _tokenize("El Capítulo de la MURALLA") == ["capitulo", "muralla"]
+    assert _tokenize("MAT101") == ["mat101"]
+
+
+def test_query_ranks_matching_chunks(bm25):
+    results = bm25._query("¿Cuánto mide la muralla?", k=4)
+
+    assert [doc.id for doc, _ in results] == ["a1", "a2"]
+    assert results[0][1] > results[1][1] > 0
+    assert results[0][0].metadata == {"source_id": "a"}
+
+
+def test_query_matches_codes_and_unaccented_terms(bm25):
+    assert [doc.id for doc, _ in bm25._query("mat101")] == ["b2"]
+    assert [doc.id for doc, _ in bm25._query("fotosintesis", k=1)] == ["b1"]
+
+
+def test_query_without_matches(bm25):
+    assert bm25._query("volcanes") == []
+    assert bm25._query("de la") == []
+
+
+def test_sources_are_replaced_and_removed(bm25):
+    bm25._set_source("a", [("a3", "Volcanes activos de Chile.", {"source_id": "a"})])
+    bm25._remove_source("b")
+    bm25._flush()
+
+    assert bm25._get_source_ids() == ["a"]
+    assert bm25._count() == 1
+    assert bm25._query("muralla") == []
+    assert [doc.id for doc, _ in bm25._query("volcanes")] == ["a3"]
+
+
+def test_readers_see_flushes_of_another_instance(bm25):
+    reader = BM25Index(index_name="test")
+    assert reader._count() == 4
+
+    bm25._remove_source("a")
+    bm25._flush()
+
+    assert reader._count() == 2
+
+
+def _get_doc(text: str) -> Document:
+    return Document(page_content=text, metadata={"source_id": "s"})
+
+
+def test_rrf_rewards_documents_in_both_rankings():
+    dense = [_get_doc("x"), _get_doc("y"), _get_doc("z")]
+    lexical = [_get_doc("z"), _get_doc("w")]
+
+    fused = _reciprocal_rank_fusion([dense, lexical])
+
+    assert [doc.page_content for doc, _ in fused][:2] == ["z", "x"]
+    # y and w are both second in one ranking: same score
+    assert fused[2][1] == fused[3][1] == pytest.approx(1 / 62)
+    assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_rrf_weights_and_duplicate_keys():
+    dense = [_get_doc("x"), _get_doc("y")]
+    lexical = [_get_doc("y"), _get_doc("x")]
+
+    fused = _reciprocal_rank_fusion([dense, lexical], weights=[1.0, 2.0])
+
+    # Same source and text is the same chunk, whatever the backend returned
+    assert len(fused) == 2
+    assert [doc.page_content for doc, _ in fused] == ["y", "x"]
@@ -0,0 +1,79 @@
+import pytest
+from langchain_core.documents import Document
+from src.core.vector_db.vdb_chunker import TokenChunker
+
+
+@pytest.fixture
+def chunker():
+    chunker = TokenChunker(chunk_tokens=40, chunk_overlap_tokens=0, min_chunk_tokens=20)
+    # Character estimate (about 3 per token) whether tiktoken is available or not
+    chunker.encoding = None
+    return chunker
+
+
+def _get_pages(*texts) -> list:
+    return [Document(page_content=text, metadata={"source_id": "a", "page_number": page_number})
+            for page_number, text in enumerate(texts, start=1)]
+
+
+@pytest.mark.parametrize("line", [
+    "# Introducción",
+    "1. Introducción",
+    "2.3 Marco teórico",
+    "IV. La Conquista",
+    "II) Métodos",
+    "III - Resultados",
+    "CAPÍTULO 2",
+    "capítulo uno",
+    "RESUMEN EJECUTIVO",
+])
+def test_headings(chunker, line):
+    assert chunker._is_heading(line)
+
+
+@pytest.mark.parametrize("line", [
+    "I Am here",
+    "IV Resultados del estudio",
+    "3 estudiantes aprobaron",
+    "Temario del curso",
+    "La muralla china mide miles de kilómetros.",
+    "Una línea de prosa que sigue y sigue sin terminar nunca porque es muy larga para ser un título",
+])
+def test_prose_is_not_a_heading(chunker, line):
+    assert not chunker._is_heading(line)
+
+
+def test_heading_starts_a_new_chunk(chunker):
+    text = ("1. Historia\n" + "La muralla fue construida durante siglos por varias dinastías.\n"
+            "2. Geografía\n" + "Atraviesa montañas, desiertos y llanuras del norte de China.")
+
+    chunks = chunker._split_documents(_get_pages(text))
+
+    assert [chunk.page_content.splitlines()[0] for chunk in chunks] == ["1. Historia", "2. Geografía"]
+
+
+def test_short_pages_are_merged(chunker):
+    chunks = chunker._split_documents(_get_pages("Portada", "Índice", "La muralla china mide miles de kilómetros."))
+
+    assert len(chunks) == 1
+    assert chunks[0].page_content == "Portada\nÍndice\nLa muralla china mide miles de kilómetros."
+    assert chunks[0].metadata["page_number"] == "1-3"
+    assert (chunks[0].metadata["page_start"], chunks[0].metadata["page_end"]) == (1, 3)
+
+
+def test_long_pages_are_not_merged(chunker):
+    page = "La muralla china mide miles de kilómetros y cruza el norte del país."
+
+    chunks = chunker._split_documents(_get_pages(page, page))
+
+    assert [chunk.metadata["page_number"] for chunk in chunks] == [1, 2]
+
+
+def test_long_paragraph_is_split_on_sentences(chunker):
+    sentences = [f"La frase número {number} habla de la muralla china." for number in range(6)]
+
+    chunks = chunker._split_documents(_get_pages(" ".join(sentences)))
+
+    assert len(chunks) > 1
+    assert all(chunker._count_tokens(chunk.page_content) <= chunker.chunk_tokens for chunk in chunks)
+    assert " ".join(chunk.page_content for chunk in chunks) == " ".join(sentences)
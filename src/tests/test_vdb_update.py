@@ -0,0 +1,153 @@
+import pytest
+from langchain_core.documents import Document
+from src.core.vector_db.vdb_bm25 import BM25Index
+from src.core.vector_db.vdb_chunker import TokenChunker
+from src.core.vector_db.vdb_index_version import IndexVersion
+from src.core.vector_db.vdb_local import LocalVectorDB
+from src.core.vector_db.vdb_manifest import VectorDBManifest
+from src.core.vector_db.vdb_update import UpdateVectorDB
+
+ORIGIN = "local_filesystem"
+
+
+@pytest.fixture
+def updater(fake_embedding):
+    # Without __init__: no Drive / Azure / OpenAI clients, only what _sync_documents uses
+    updater = UpdateVectorDB.__new__(UpdateVectorDB)
+    updater.embeddingOpenAI = fake_embedding
+    updater.vector_store_model = LocalVectorDB(fake_embedding, index_name="test")
+    updater.chunker = TokenChunker(chunk_tokens=50, chunk_overlap_tokens=0)
+    updater.index_version = IndexVersion()
+    updater.version_index_names = [updater.vector_store_model.index_name]
+    updater.blue_green = True
+    updater.blue_green_verify_timeout = 5
+    return updater
+
+
+def _get_docs(source_id: str, version: str, pages: list) -> list:
+    return [Document(page_content=text, metadata={"source_id": source_id, "source_version": version,
+                                                  "name": f"{source_id}.pdf", "page_number": page_number})
+            for page_number, text in enumerate(pages, start=1)]
+
+
+def _get_manifest(updater) -> VectorDBManifest:
+    return VectorDBManifest(index_name=updater.vector_store_model.index_name, namespace="")
+
+
+def _get_bm25(updater) -> BM25Index:
+    return BM25Index(index_name=updater.vector_store_model.index_name, namespace="")
+
+
+def _assert_in_sync(updater, source_ids: set):
+    manifest = _get_manifest(updater)
+    assert set(manifest._get_source_ids()) == source_ids
+    assert set(_get_bm25(updater)._get_source_ids()) == source_ids
+    assert updater.vector_store_model._count_vectors("") == manifest._get_chunk_count()
+
+
+DOCS_A = _get_docs("a", "1", ["Historia de la muralla china y sus dinastías.", "La muralla mide miles de kilómetros."])
+DOCS_B = _get_docs("b", "1", ["Fotosíntesis: las plantas convierten la luz en energía química."])
+
+
+def test_first_sync_indexes_every_source(updater):
+    upserted, deleted = updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+
+    assert upserted == _get_manifest(updater)._get_chunk_count() > 0
+    assert deleted == 0
+    _assert_in_sync(updater, {"a", "b"})
+
+
+def test_changed_source_replaces_its_chunks_only(updater, fake_embedding):
+    updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+    old_chunk_ids = set(_get_manifest(updater)._get_source("a")["chunk_ids"])
+    fake_embedding.embedded_texts.clear()
+
+    docs_a = _get_docs("a", "2", ["Historia de la muralla china y sus dinastías.", "Construida durante siglos."])
+    upserted, deleted = updater._update_vector_store(iter(docs_a + DOCS_B), origin=ORIGIN)
+
+    new_chunk_ids = set(_get_manifest(updater)._get_source("a")["chunk_ids"])
+    assert upserted == len(new_chunk_ids - old_chunk_ids) > 0
+    assert deleted == len(old_chunk_ids - new_chunk_ids) > 0
+    # b did not change, it is not embedded again
+    assert len(fake_embedding.embedded_texts) == upserted
+    assert not any("Fotosíntesis" in text for text in fake_embedding.embedded_texts)
+    _assert_in_sync(updater, {"a", "b"})
+
+
+def test_removed_source_is_deleted(updater):
+    updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+    chunks_b = len(_get_manifest(updater)._get_source("b")["chunk_ids"])
+
+    # Complete listing without b
+    upserted, deleted = updater._update_vector_store(iter(DOCS_A), origin=ORIGIN)
+
+    assert (upserted, deleted) == (0, chunks_b)
+    _assert_in_sync(updater, {"a"})
+
+
+def test_failed_source_is_not_removed(updater):
+    updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+
+    updater._update_vector_store(iter(DOCS_A), origin=ORIGIN, get_failed_source_ids=lambda: ["b"])
+
+    _assert_in_sync(updater, {"a", "b"})
+
+
+def test_interrupted_sync_resumes_after_committed_sources(updater, fake_embedding, monkeypatch):
+    # Flush after every chunk: each source is committed as soon as the next one starts
+    monkeypatch.setenv("VDB_EMBED_BATCH_SIZE", "1")
+    monkeypatch.setenv("VDB_EMBED_CONCURRENCY", "1")
+
+    def interrupted_docs():
+        yield from DOCS_A
+        yield DOCS_B[0]
+        raise ConnectionError("listing interrupted")
+
+    with pytest.raises(ConnectionError):
+        updater._update_vector_store(interrupted_docs(), origin=ORIGIN)
+    assert _get_manifest(updater)._get_source_ids() == ["a"]
+
+    fake_embedding.embedded_texts.clear()
+    updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+
+    # a is not embedded again
+    assert fake_embedding.embedded_texts == [doc.page_content for doc in DOCS_B]
+    _assert_in_sync(updater, {"a", "b"})
+
+
+def test_bm25_is_rebuilt_from_the_manifest(updater):
+    updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+    _get_bm25(updater)._clear()
+
+    updater._reconcile_bm25()
+
+    _assert_in_sync(updater, {"a", "b"})
+    assert _get_bm25(updater)._count() == _get_manifest(updater)._get_chunk_count()
+
+
+def test_failed_upsert_resumes_from_the_checkpoint(updater, fake_embedding, monkeypatch):
+    monkeypatch.setenv("VDB_UPSERT_BATCH_SIZE", "1")
+    monkeypatch.setenv("VDB_UPSERT_CONCURRENCY", "1")
+    monkeypatch.setenv("VDB_MAX_RETRIES", "0")
+
+    upsert_vectors = updater.vector_store_model._upsert_vectors
+    calls = []
+
+    def failing_upsert(vectors, namespace=""):
+        calls.append(vectors)
+        if len(calls) == 2:
+            raise ValueError("upsert rejected")
+        upsert_vectors(vectors, namespace)
+
+    monkeypatch.setattr(updater.vector_store_model, "_upsert_vectors", failing_upsert)
+    with pytest.raises(ValueError):
+        updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+    first_run_texts = list(fake_embedding.embedded_texts)
+
+    monkeypatch.setattr(updater.vector_store_model, "_upsert_vectors", upsert_vectors)
+    fake_embedding.embedded_texts.clear()
+    updater._update_vector_store(iter(DOCS_A + DOCS_B), origin=ORIGIN)
+
+    # The vector upserted before the failure is not embedded again
+    assert len(fake_embedding.embedded_texts) == len(first_run_texts) - 1
+    _assert_in_sync(updater, {"a", "b"})